@@ -3,36 +3,112 @@ Google Workspace Assistant - Main Agent Definition
 
 Part 1: Implement tools and system instruction for Calendar OR Tasks
 Part 2: Add McpToolset for GitHub integration
+
+ADK imports live inside the factory functions so that importing this module
+(e.g. from main.py) stays cheap until an agent is actually built.
 """
 
-import os
-from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool import McpToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
-from mcp import StdioServerParameters
+from typing import TYPE_CHECKING
 
 from config.settings import Settings
 
-# TODO: Import your chosen tool set
-# from tools.calendar_tools import calendar_tools
-# from tools.tasks_tools import tasks_tools
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
+
+INSTRUCTION = """You are a Google Workspace assistant that helps the user manage
+their Google Calendar, Google Tasks and GitHub work.
+
+Calendar: list upcoming events, check a time range for conflicts, find free
+slots (optionally across several participants) and reschedule events.
+Tasks: list, complete or update tasks, including many at once; tasks can be
+completed or updated by title when their IDs are not known.
+GitHub: search repositories, list and create issues, read files.
+
+Guidelines:
+- Use ISO 8601 times. Times without an offset are in the user's calendar zone.
+- When a request touches several items, use the bulk tools (complete_tasks,
+  update_tasks, reschedule_events) in a single call instead of one call per item.
+- Independent lookups can be requested together in the same turn.
+- Always confirm with the user before changing or creating anything.
+- If a tool returns status 'error' or 'partial', explain what failed in plain
+  language and suggest a next step.
+- Long lists come back one page at a time with a 'next_cursor'; call
+  more_results with it only when the user needs the rest.
+"""
+
+TOOL_SEARCH_INSTRUCTION = """
+GitHub tools are loaded on demand. Before a GitHub action other than
+search_repositories, call search_github_tools with a short description of what
+you need (e.g. "list pull requests"); the tools it returns become available on
+your next step.
+"""
+
 
-# TODO Part 2: Import MCP tools
-# from tools.mcp_tools import mcp_tools
+def _model_kwargs(settings: Settings) -> dict:
+    """Model and model callbacks for an agent.
 
+    With routing on (see runtime/routing.py) each turn goes to a fast or a
+    capable model; otherwise every turn uses Settings.model_name.
+    """
+    from runtime.history import window_history
+    from runtime.routing import get_model_router
 
-def create_agent() -> LlmAgent:
+    router = get_model_router()
+    if router is None:
+        return {"model": settings.model_name, "before_model_callback": window_history}
+    return {
+        "model": router.model(),
+        "before_model_callback": [window_history, router.before_model],
+        "after_model_callback": router.after_model,
+    }
+
+
+def create_agent() -> "LlmAgent":
     """Create the Workspace Assistant agent."""
+    from google.adk.agents import LlmAgent
+
+    from tools.calendar_tools import calendar_tools
+    from tools.compaction import compact_tool_result, more_results
+    from tools.executor import get_tool_executor
+    from tools.mcp_tools import mcp_tools
+    from tools.tasks_tools import tasks_tools
+
     settings = Settings()
+    executor = get_tool_executor()
 
-    # TODO Part 1: Write your system instruction
+    return LlmAgent(
+        name="workspace_assistant",
+        **_model_kwargs(settings),
+        instruction=INSTRUCTION,
+        tools=executor.wrap_tools(calendar_tools + tasks_tools + mcp_tools + [more_results]),
+        after_tool_callback=compact_tool_result,
+    )
 
-    # TODO Part 2: Create McpToolset for GitHub
 
-    # TODO: Create and return your LlmAgent
-    raise NotImplementedError("Implement create_agent")
+def create_agent_with_tool_search() -> "LlmAgent":
+    """Create the agent with GitHub tool schemas loaded on demand.
 
+    Only search_github_tools and the tools it has matched in this session are
+    declared to the model, instead of every tool on the GitHub MCP server.
+    """
+    from google.adk.agents import LlmAgent
+
+    from tools.calendar_tools import calendar_tools
+    from tools.compaction import compact_tool_result, more_results
+    from tools.executor import get_tool_executor
+    from tools.mcp_tools import get_github_mcp_toolset_deferred, search_github_tools
+    from tools.tasks_tools import tasks_tools
+
+    settings = Settings()
+    executor = get_tool_executor()
+    github_tools = [search_github_tools, get_github_mcp_toolset_deferred()]
 
-def create_agent_with_tool_search() -> LlmAgent:
-    """BONUS: Create agent with defer_loading for tool search."""
-    raise NotImplementedError("Bonus: Implement tool search pattern")
+    return LlmAgent(
+        name="workspace_assistant",
+        **_model_kwargs(settings),
+        instruction=INSTRUCTION + TOOL_SEARCH_INSTRUCTION,
+        tools=executor.wrap_tools(
+            calendar_tools + tasks_tools + github_tools + [more_results]
+        ),
+        after_tool_callback=compact_tool_result,
+    )
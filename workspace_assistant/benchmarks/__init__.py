@@ -0,0 +1 @@
+"""Performance benchmarks (run from workspace_assistant/ with python -m)."""
@@ -0,0 +1,100 @@
+"""
+MCP connection benchmark: a fresh server per session vs the shared pool.
+
+Usage: python -m benchmarks.bench_mcp [--sessions 5] [--calls 3] [--npx]
+
+Each "session" lists the tools and makes a few read calls, the way an agent
+turn does. Without the pool every session starts its own server; with the
+pool only the first one pays the connect cost. By default the offline stub
+server from tests/fixtures is used; --npx runs the real GitHub server (needs
+Node.js and GITHUB_PERSONAL_ACCESS_TOKEN).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from google.adk.tools.mcp_tool import McpToolset
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from mcp import StdioServerParameters
+
+from tools.mcp_pool import McpServerPool
+
+STUB_SERVER = Path(__file__).parent.parent / "tests" / "fixtures" / "stub_mcp_server.py"
+CALL = ("search_repositories", {"query": "user:octocat"})
+
+
+def connection_params(use_npx: bool) -> StdioConnectionParams:
+    if use_npx:
+        server = StdioServerParameters(
+            command="npx", args=["-y", "@modelcontextprotocol/server-github"],
+            env=dict(os.environ),
+        )
+    else:
+        server = StdioServerParameters(
+            command=sys.executable, args=[str(STUB_SERVER)], env=dict(os.environ)
+        )
+    return StdioConnectionParams(server_params=server, timeout=60)
+
+
+async def session(toolset, calls: int) -> float:
+    start = time.perf_counter()
+    tools = {tool.name: tool for tool in await toolset.get_tools()}
+    name, args = CALL
+    for _ in range(calls):
+        await tools[name].run_async(args=args, tool_context=None)
+    return time.perf_counter() - start
+
+
+def per_session(params, sessions: int, calls: int) -> list[float]:
+    """Each session builds (and closes) its own McpToolset on its own loop."""
+    async def one():
+        toolset = McpToolset(connection_params=params)
+        try:
+            return await session(toolset, calls)
+        finally:
+            await toolset.close()
+
+    return [asyncio.run(one()) for _ in range(sessions)]
+
+
+def pooled(params, sessions: int, calls: int) -> tuple[list[float], dict]:
+    pool = McpServerPool(health_interval=0)
+    try:
+        toolset = pool.register("github", params)
+        times = [asyncio.run(session(toolset, calls)) for _ in range(sessions)]
+        return times, pool.metrics.snapshot()
+    finally:
+        pool.close()
+
+
+def report(label: str, times: list[float]) -> None:
+    ms = [t * 1000 for t in times]
+    print(f"{label:<12} first {ms[0]:8.1f} ms   median {statistics.median(ms):8.1f} ms"
+          f"   total {sum(ms):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--npx", action="store_true", help="Use the real GitHub server")
+    args = parser.parse_args()
+
+    params = connection_params(args.npx)
+    report("per-session", per_session(params, args.sessions, args.calls))
+    times, stats = pooled(params, args.sessions, args.calls)
+    report("pooled", times)
+
+    server = stats["servers"]["github"]
+    tool = stats["tools"][CALL[0]]
+    print(f"\npool connect {server['first_connect_ms']} ms, "
+          f"{tool['calls']} calls p50 {tool['p50_ms']} ms p99 {tool['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
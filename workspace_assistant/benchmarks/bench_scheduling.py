@@ -0,0 +1,91 @@
+"""
+Scheduling engine benchmark: 100 participants x 10k events each.
+
+Usage: python -m benchmarks.bench_scheduling [--participants 100] [--events 10000]
+
+Reports tree build time, conflict-query latency (p50/p99), the sweep-line
+merge of every participant's busy time, and a four-week slot scan for a
+meeting of --meeting-size participants in different time zones.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from tools.scheduling import IntervalTree, WorkingHours, find_free_slots, merge_busy
+
+ZONES = ["America/Los_Angeles", "America/New_York", "Europe/Berlin", "Asia/Tokyo"]
+
+
+def generate_calendar(rng: random.Random, origin: float, events: int, span_days: int):
+    """Random meetings of 15-120 minutes spread over span_days."""
+    span = span_days * 86400
+    intervals = []
+    for i in range(events):
+        start = origin + rng.randrange(0, span, 900)
+        intervals.append((start, start + rng.choice((15, 30, 45, 60, 120)) * 60, i))
+    return intervals
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduling engine benchmark")
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--span-days", type=int, default=1825)
+    parser.add_argument("--meeting-size", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    origin = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    calendars = [
+        generate_calendar(rng, origin.timestamp(), args.events, args.span_days)
+        for _ in range(args.participants)
+    ]
+
+    start = time.perf_counter()
+    trees = [IntervalTree(c) for c in calendars]
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for _ in range(args.queries):
+        tree = rng.choice(trees)
+        qs = origin.timestamp() + rng.uniform(0, args.span_days * 86400)
+        t = time.perf_counter()
+        tree.overlapping(qs, qs + 3600)
+        latencies.append((time.perf_counter() - t) * 1e6)
+
+    start = time.perf_counter()
+    busy = merge_busy(*([(s, e) for s, e, _ in c] for c in calendars))
+    merge_ms = (time.perf_counter() - start) * 1000
+
+    attendees = calendars[:args.meeting_size]
+    hours = [WorkingHours(zone=ZoneInfo(ZONES[i % 2])) for i in range(len(attendees))]
+    window_start = origin + timedelta(days=rng.randrange(args.span_days - 28))
+    start = time.perf_counter()
+    meeting_busy = merge_busy(*([(s, e) for s, e, _ in c] for c in attendees))
+    slots = find_free_slots(
+        meeting_busy, window_start, window_start + timedelta(weeks=4), 30, hours
+    )
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    total = args.participants * args.events
+    print(f"{args.participants} participants x {args.events} events ({total} intervals)")
+    print(f"  build {len(trees)} interval trees   {build_ms:10.1f} ms")
+    print(f"  conflict query p50            {statistics.median(latencies):10.1f} us")
+    print(f"  conflict query p99            {percentile(latencies, 99):10.1f} us")
+    print(f"  merge all busy intervals      {merge_ms:10.1f} ms  ({len(busy)} merged)")
+    print(f"  {args.meeting_size}-person 4-week slot search {scan_ms:8.1f} ms  ({len(slots)} slots)")
+
+
+if __name__ == "__main__":
+    main()
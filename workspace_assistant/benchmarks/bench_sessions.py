@@ -0,0 +1,94 @@
+"""
+Session soak benchmark: process memory over many turns, SQLite vs in-memory sessions.
+
+Usage: python -m benchmarks.bench_sessions [--turns 10000] [--users 200] [--backend sqlite|memory|both]
+
+Each turn does what the runner does: load the session, then append a user
+message and a ~1 KB model answer. Turns are spread round-robin over users,
+one session each. Resident memory is sampled every tenth of the run. With
+the SQLite service it should stay flat after warm-up, since history lives on
+disk and only the recent window is loaded per turn; the in-memory service
+grows with every turn.
+"""
+
+import argparse
+import asyncio
+import gc
+import tempfile
+import time
+from pathlib import Path
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from runtime.sessions import SqliteSessionService
+
+APP = "bench"
+ANSWER = "Here is what I found on your calendar for next week. " * 20
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def message(author: str, text: str, invocation_id: str) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(author=author, invocation_id=invocation_id,
+                 content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+async def soak(service, turns: int, users: int) -> list[tuple[int, float, float]]:
+    for user in range(users):
+        await service.create_session(app_name=APP, user_id=f"user{user}", session_id="s")
+    samples = []
+    start = time.perf_counter()
+    every = max(turns // 10, 1)
+    for turn in range(1, turns + 1):
+        user_id = f"user{turn % users}"
+        session = await service.get_session(app_name=APP, user_id=user_id, session_id="s")
+        invocation = f"inv{turn}"
+        await service.append_event(session, message("user", f"question {turn}", invocation))
+        await service.append_event(session, message("assistant", ANSWER, invocation))
+        if turn % every == 0:
+            gc.collect()
+            samples.append((turn, rss_mb(), (time.perf_counter() - start) * 1000 / turn))
+    return samples
+
+
+def report(label: str, samples: list[tuple[int, float, float]]) -> None:
+    print(f"\n{label}")
+    for turn, rss, ms in samples:
+        print(f"  turn {turn:>6}   rss {rss:8.1f} MB   {ms:6.2f} ms/turn")
+    growth = samples[-1][1] - samples[0][1]
+    print(f"  growth after first sample: {growth:+.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--backend", choices=["sqlite", "memory", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.backend in ("sqlite", "both"):
+        with tempfile.TemporaryDirectory() as tmp:
+            service = SqliteSessionService(Path(tmp) / "sessions.sqlite3")
+            report("sqlite", asyncio.run(soak(service, args.turns, args.users)))
+            service.close()
+    if args.backend in ("memory", "both"):
+        report("memory", asyncio.run(soak(InMemorySessionService(), args.turns, args.users)))
+
+
+if __name__ == "__main__":
+    main()
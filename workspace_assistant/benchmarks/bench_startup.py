@@ -0,0 +1,93 @@
+"""
+Startup benchmark: import time, --help time and time to first prompt.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--budget-ms 400]
+
+Exits non-zero when the median time to the interactive prompt exceeds the
+budget, so it can guard startup regressions in CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+PROMPT_MARKER = b"You"
+
+
+def time_import(module: str) -> float:
+    """Return the time (ms) to import module in a fresh interpreter."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, check=True
+    )
+    return float(out.stdout.decode().strip().splitlines()[-1])
+
+
+def time_help() -> float:
+    """Return the wall time (ms) of `python main.py --help`."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "--help"], cwd=ROOT, capture_output=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def time_to_prompt(timeout: float = 30.0) -> float:
+    """Return the wall time (ms) until the interactive prompt is printed."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py", "--interactive"],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    output = b""
+    try:
+        while PROMPT_MARKER not in output:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("prompt did not appear")
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("process exited before showing the prompt")
+            output += chunk
+        return (time.perf_counter() - start) * 1000
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    results = {
+        "import main": [time_import("main") for _ in range(args.runs)],
+        "import agent": [time_import("agent") for _ in range(args.runs)],
+        "main.py --help": [time_help() for _ in range(args.runs)],
+        "first prompt": [time_to_prompt() for _ in range(args.runs)],
+    }
+
+    print(f"{'step':<16} {'median ms':>10} {'max ms':>10}")
+    for name, samples in results.items():
+        print(f"{name:<16} {statistics.median(samples):>10.1f} {max(samples):>10.1f}")
+
+    prompt_ms = statistics.median(results["first prompt"])
+    if prompt_ms > args.budget_ms:
+        print(f"\nFAIL: first prompt {prompt_ms:.1f} ms > budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\nOK: first prompt within {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Offline stand-ins for Google APIs and the model, shared by the benchmarks.
+
+FakeWorkspace serves Calendar and Tasks from the recorded account in
+fixtures/workspace.json, with dates taken relative to today so that "this
+week" always has events. Its services mimic the googleapiclient resources
+the tools use: methods return request objects with .uri and .execute(),
+list calls page, honor fields= partial responses, syncToken and
+updatedMin, writes change the data, and new_batch_http_request() batches
+like the real client. Every request can be given a fixed latency, and
+requests are counted per API.
+
+ScriptedLlm replays a recorded sequence of model turns: step n of the list
+is the model's n-th response within a turn, either function calls or text.
+
+install_fake_google() routes get_calendar_service() / get_tasks_service()
+(tools/auth.py) to a FakeWorkspace.
+"""
+
+import asyncio
+import copy
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httplib2
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from googleapiclient.errors import HttpError
+
+from tools import auth
+
+FIXTURE = Path(__file__).parent / "fixtures" / "workspace.json"
+
+CALENDAR_URI = "https://www.googleapis.com/calendar/v3"
+TASKS_URI = "https://tasks.googleapis.com/tasks/v1"
+
+# Calendar ID of the recorded account's own calendar.
+SELF_EMAIL = "me@example.com"
+
+
+def parse_fields(spec: str) -> dict:
+    """Parse a fields= selector ('a,b/c,d(e,f)') into a tree of {name: subtree | None}."""
+    def add(tree: dict, name: str, sub: dict | None) -> None:
+        if not name:
+            return
+        *parents, leaf = name.strip().split("/")
+        for parent in parents:
+            tree = tree.setdefault(parent, {})
+        if sub is None or not isinstance(tree.get(leaf), dict):
+            tree[leaf] = sub
+        else:
+            tree[leaf].update(sub)
+
+    def parse(i: int) -> tuple[dict, int]:
+        tree, name = {}, ""
+        while i < len(spec):
+            char = spec[i]
+            if char == ",":
+                add(tree, name, None)
+                name = ""
+            elif char == "(":
+                sub, i = parse(i + 1)
+                add(tree, name, sub)
+                name = ""
+            elif char == ")":
+                add(tree, name, None)
+                return tree, i
+            else:
+                name += char
+            i += 1
+        add(tree, name, None)
+        return tree, i
+
+    return parse(0)[0]
+
+
+def select_fields(tree: dict | None, value):
+    """Apply a parsed fields= tree to a response, as the API does."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [select_fields(tree, item) for item in value]
+    if isinstance(value, dict):
+        return {key: select_fields(sub, value[key]) for key, sub in tree.items() if key in value}
+    return value
+
+
+def http_error(status: int, uri: str, reason: str) -> HttpError:
+    content = json.dumps({"error": {"code": status, "message": reason,
+                                    "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content, uri=uri)
+
+
+class FakeRequest:
+    """A request that runs handler() on execute(), after the workspace latency."""
+
+    def __init__(self, workspace: "FakeWorkspace", api: str, uri: str, handler,
+                 fields: str | None = None):
+        self.workspace = workspace
+        self.api = api
+        self.uri = uri
+        self._handler = handler
+        self._fields = parse_fields(fields) if fields else None
+
+    def execute(self):
+        self.workspace.count(self.api)
+        if self.workspace.latency:
+            time.sleep(self.workspace.latency)
+        return select_fields(self._fields, self._handler())
+
+
+class FakeBatch:
+    """new_batch_http_request(): one round trip for every request added."""
+
+    def __init__(self, workspace: "FakeWorkspace", callback):
+        self.workspace = workspace
+        self.callback = callback
+        self.requests: list[tuple[str, FakeRequest]] = []
+
+    def add(self, request: FakeRequest, request_id: str | None = None):
+        self.requests.append((request_id or str(len(self.requests)), request))
+
+    def execute(self):
+        self.workspace.count("batch")
+        if self.workspace.latency:
+            time.sleep(self.workspace.latency)
+        for request_id, request in self.requests:
+            self.workspace.count(request.api)
+            try:
+                response = select_fields(request._fields, request._handler())
+            except HttpError as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+def _page(items: list, params: dict, default_size: int) -> tuple[list, str | None]:
+    start = int(params.get("pageToken") or 0)
+    size = params.get("maxResults") or default_size
+    next_token = str(start + size) if start + size < len(items) else None
+    return items[start:start + size], next_token
+
+
+class _Resource:
+    """Groups methods the way googleapiclient resources do (service.events().list)."""
+
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+class FakeCalendarService:
+    def __init__(self, workspace: "FakeWorkspace"):
+        self.workspace = workspace
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self.workspace, callback)
+
+    def events(self):
+        return _Resource(list=self._list, get=self._get, patch=self._patch)
+
+    def freebusy(self):
+        return _Resource(query=self._freebusy)
+
+    def _request(self, path: str, handler, fields: str | None = None) -> FakeRequest:
+        return FakeRequest(self.workspace, "calendar", f"{CALENDAR_URI}/{path}", handler, fields)
+
+    def _list(self, calendarId: str, fields: str | None = None, **params) -> FakeRequest:
+        def handler():
+            ws = self.workspace
+            with ws.lock:
+                sync_token = params.get("syncToken")
+                since = int(sync_token.removeprefix("sync-")) if sync_token else -1
+                items = [copy.deepcopy(e) for e in ws.events.values()
+                         if ws.event_versions[e["id"]] > since]
+                if params.get("timeMin"):
+                    items = [e for e in items if e["end"]["dateTime"] > params["timeMin"]]
+                if params.get("timeMax"):
+                    items = [e for e in items if e["start"]["dateTime"] < params["timeMax"]]
+                items.sort(key=lambda e: e["start"]["dateTime"])
+                page, next_token = _page(items, params, 250)
+                response = {"kind": "calendar#events", "timeZone": ws.time_zone, "items": page}
+                if next_token:
+                    response["nextPageToken"] = next_token
+                elif not params.get("timeMin"):
+                    response["nextSyncToken"] = f"sync-{ws.version}"
+                return response
+
+        return self._request(f"calendars/{calendarId}/events", handler, fields)
+
+    def _event(self, event_id: str, uri: str) -> dict:
+        event = self.workspace.events.get(event_id)
+        if event is None:
+            raise http_error(404, uri, "notFound")
+        return event
+
+    def _get(self, calendarId: str, eventId: str, fields: str | None = None) -> FakeRequest:
+        path = f"calendars/{calendarId}/events/{eventId}"
+
+        def handler():
+            with self.workspace.lock:
+                return copy.deepcopy(self._event(eventId, path))
+
+        return self._request(path, handler, fields)
+
+    def _patch(self, calendarId: str, eventId: str, body: dict,
+               fields: str | None = None) -> FakeRequest:
+        path = f"calendars/{calendarId}/events/{eventId}"
+
+        def handler():
+            ws = self.workspace
+            with ws.lock:
+                event = self._event(eventId, path)
+                event.update(copy.deepcopy(body))
+                ws.version += 1
+                ws.event_versions[eventId] = ws.version
+                return copy.deepcopy(event)
+
+        return self._request(path, handler, fields)
+
+    def _freebusy(self, body: dict) -> FakeRequest:
+        def handler():
+            calendars = {}
+            with self.workspace.lock:
+                for item in body["items"]:
+                    email = SELF_EMAIL if item["id"] == "primary" else item["id"]
+                    if not email.endswith("@example.com"):
+                        calendars[item["id"]] = {"errors": [{"reason": "notFound"}]}
+                        continue
+                    calendars[item["id"]] = {"busy": [
+                        {"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+                        for e in self.workspace.events.values()
+                        if e.get("transparency") != "transparent"
+                        and any(a["email"] == email for a in e.get("attendees", []))
+                        and e["end"]["dateTime"] > body["timeMin"]
+                        and e["start"]["dateTime"] < body["timeMax"]
+                    ]}
+            return {"kind": "calendar#freeBusy", "calendars": calendars}
+
+        return self._request("freeBusy", handler)
+
+
+class FakeTasksService:
+    def __init__(self, workspace: "FakeWorkspace"):
+        self.workspace = workspace
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self.workspace, callback)
+
+    def tasks(self):
+        return _Resource(list=self._list, patch=self._patch)
+
+    def tasklists(self):
+        return _Resource(get=self._get_list, list=self._list_lists)
+
+    def _request(self, path: str, handler, fields: str | None = None) -> FakeRequest:
+        return FakeRequest(self.workspace, "tasks", f"{TASKS_URI}/{path}", handler, fields)
+
+    def _list(self, tasklist: str, fields: str | None = None, **params) -> FakeRequest:
+        def handler():
+            with self.workspace.lock:
+                items = [copy.deepcopy(t) for t in self.workspace.tasks.values()]
+            if not params.get("showCompleted", True):
+                items = [t for t in items if t["status"] != "completed"]
+            if not params.get("showDeleted", False):
+                items = [t for t in items if not t.get("deleted")]
+            if params.get("dueMax"):
+                items = [t for t in items if t.get("due") and t["due"] < params["dueMax"]]
+            if params.get("updatedMin"):
+                items = [t for t in items if t["updated"] >= params["updatedMin"]]
+            page, next_token = _page(items, params, 20)
+            response = {"kind": "tasks#tasks", "items": page}
+            if next_token:
+                response["nextPageToken"] = next_token
+            return response
+
+        return self._request(f"lists/{tasklist}/tasks", handler, fields)
+
+    def _patch(self, tasklist: str, task: str, body: dict,
+               fields: str | None = None) -> FakeRequest:
+        path = f"lists/{tasklist}/tasks/{task}"
+
+        def handler():
+            ws = self.workspace
+            with ws.lock:
+                stored = ws.tasks.get(task)
+                if stored is None:
+                    raise http_error(404, path, "notFound")
+                stored.update(copy.deepcopy(body))
+                stored["updated"] = ws.now()
+                if body.get("status") == "completed":
+                    stored["completed"] = stored["updated"]
+                return copy.deepcopy(stored)
+
+        return self._request(path, handler, fields)
+
+    def _tasklist(self) -> dict:
+        ws = self.workspace
+        with ws.lock:
+            updated = max((t["updated"] for t in ws.tasks.values()), default=ws.now())
+        return {**ws.tasklist, "kind": "tasks#taskList", "updated": updated}
+
+    def _get_list(self, tasklist: str, fields: str | None = None) -> FakeRequest:
+        return self._request(f"users/@me/lists/{tasklist}", self._tasklist, fields)
+
+    def _list_lists(self, fields: str | None = None, **params) -> FakeRequest:
+        def handler():
+            return {"kind": "tasks#taskLists", "items": [self._tasklist()]}
+
+        return self._request("users/@me/lists", handler, fields)
+
+
+class FakeWorkspace:
+    """A recorded Calendar + Tasks account served from memory."""
+
+    def __init__(self, fixture: Path = FIXTURE, latency: float = 0.0,
+                 today: date | None = None):
+        self.fixture = json.loads(Path(fixture).read_text())
+        self.latency = latency
+        self.today = today or datetime.now(timezone.utc).date()
+        self.lock = threading.RLock()
+        self.requests: Counter = Counter()
+        self.reset()
+
+    def now(self) -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")[:-4] + "Z"
+
+    def reset(self) -> None:
+        """Restore the recorded data.
+
+        Calendar versions restart too, so sync tokens stay valid. Tasks that
+        changed since the last reset are restored with a new 'updated' time,
+        as if another client had reverted them, so updatedMin pulls see them.
+        """
+        with self.lock:
+            changed = getattr(self, "tasks", {})
+            self.time_zone = self.fixture["time_zone"]
+            self.tasklist = dict(self.fixture["tasklist"])
+            self.events = {e["id"]: self._event(e) for e in self.fixture["events"]}
+            self.event_versions = {event_id: 0 for event_id in self.events}
+            self.version = 0
+            anchor = datetime.combine(self.today, datetime.min.time(), tzinfo=timezone.utc)
+            self.tasks = {}
+            for index, recorded in enumerate(self.fixture["tasks"]):
+                task = {k: v for k, v in recorded.items() if k != "due_day"}
+                updated = anchor - timedelta(days=1, minutes=index)
+                task["updated"] = updated.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                if recorded["due_day"] is not None:
+                    due = self.today + timedelta(days=recorded["due_day"])
+                    task["due"] = f"{due.isoformat()}T00:00:00.000Z"
+                if task["status"] == "completed":
+                    task["completed"] = task["updated"]
+                previous = changed.get(task["id"])
+                if previous is not None and previous["updated"] > task["updated"]:
+                    task["updated"] = self.now()
+                self.tasks[task["id"]] = task
+
+    def _event(self, recorded: dict) -> dict:
+        event = {k: v for k, v in recorded.items() if k not in ("day", "start", "minutes")}
+        hour, minute = map(int, recorded["start"].split(":"))
+        start = datetime.combine(self.today + timedelta(days=recorded["day"]),
+                                 datetime.min.time(), tzinfo=timezone.utc)
+        start += timedelta(hours=hour, minutes=minute)
+        end = start + timedelta(minutes=recorded["minutes"])
+        event["start"] = {"dateTime": start.isoformat(), "timeZone": self.fixture["time_zone"]}
+        event["end"] = {"dateTime": end.isoformat(), "timeZone": self.fixture["time_zone"]}
+        return event
+
+    def count(self, api: str) -> None:
+        with self.lock:
+            self.requests[api] += 1
+
+    def service(self, api: str):
+        return {"calendar": FakeCalendarService, "tasks": FakeTasksService}[api](self)
+
+
+class FakeServicePool(auth.ServicePool):
+    """ServicePool handing out FakeWorkspace services instead of API clients."""
+
+    def __init__(self, workspace: FakeWorkspace):
+        super().__init__(credentials_loader=lambda scopes: None)
+        self.workspace = workspace
+
+    def get(self, api: str, version: str, scopes: list[str]):
+        return self.workspace.service(api)
+
+
+def install_fake_google(workspace: FakeWorkspace) -> auth.ServicePool:
+    """Serve get_calendar_service() / get_tasks_service() from workspace; returns the old pool."""
+    previous, auth._pool = auth._pool, FakeServicePool(workspace)
+    return previous
+
+
+def _steps_into_turn(contents: list[types.Content]) -> int:
+    """Number of model responses since the user's message started this turn."""
+    steps = 0
+    for content in reversed(contents):
+        parts = content.parts or []
+        if content.role == "user" and not any(p.function_response for p in parts):
+            break
+        steps += content.role == "model"
+    return steps
+
+
+class ScriptedLlm(BaseLlm):
+    """Replays steps: [{"calls": [{"name": ..., "args": {...}}, ...]} | {"text": ...}]."""
+
+    model: str = "scripted"
+    steps: list[dict] = []
+    latency: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        step = self.steps[min(_steps_into_turn(llm_request.contents), len(self.steps) - 1)]
+        if "calls" in step:
+            parts = [types.Part(function_call=types.FunctionCall(
+                name=call["name"], args=call.get("args", {}))) for call in step["calls"]]
+        else:
+            parts = [types.Part(text=step["text"])]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
@@ -0,0 +1,148 @@
+"""
+Server load test: latency and throughput of runtime/server.py under concurrent users.
+
+Usage: python -m benchmarks.load_server [--clients 1,8,32,128] [--requests 4]
+                                        [--llm-ms 300] [--api-ms 80]
+
+Runs offline with the fakes from benchmarks/fakes.py: the model is scripted
+(it calls list_tasks and the GitHub search_repositories tool, then answers,
+waiting --llm-ms per call), Google Tasks is the recorded FakeWorkspace
+waiting --api-ms per request, and GitHub is the stub MCP server from
+tests/fixtures behind the shared MCP pool. The app is
+driven in-process through httpx's ASGI transport, so the numbers measure the
+server's queueing and admission control rather than the network.
+
+Each client is a separate user that sends --requests messages one after
+another. Server sizing comes from Settings (SERVER_RUNNERS,
+SERVER_CONCURRENCY, SERVER_QUEUE_SIZE, ...), so the effect of each knob can
+be measured. Rejected requests (429/503) are counted, not retried.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Every message is the same; measure real turns, not answer-cache hits.
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+# The stub GitHub server has no quota to protect.
+os.environ.setdefault("GITHUB_RATE_LIMIT", "0")
+
+import httpx
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from mcp import StdioServerParameters
+
+from benchmarks.fakes import FakeWorkspace, ScriptedLlm, install_fake_google
+from runtime.history import window_history
+from runtime.server import AgentServer, create_app
+from tools import auth, tasks_tools
+from tools.executor import get_tool_executor
+from tools.mcp_pool import McpServerPool
+
+STUB_SERVER = Path(__file__).parent.parent / "tests" / "fixtures" / "stub_mcp_server.py"
+STEPS = [
+    {"calls": [{"name": "list_tasks", "args": {}},
+               {"name": "search_repositories", "args": {"query": "user:octocat"}}]},
+    {"text": "Here are your open tasks and one matching repository."},
+]
+
+
+def runner_factory(llm_latency: float, github_toolset):
+    sessions = InMemorySessionService()
+
+    def build():
+        agent = LlmAgent(
+            name="workspace_assistant",
+            model=ScriptedLlm(steps=STEPS, latency=llm_latency),
+            tools=get_tool_executor().wrap_tools([tasks_tools.list_tasks, github_toolset]),
+            before_model_callback=window_history,
+        )
+        return Runner(app_name="load", agent=agent, session_service=sessions,
+                      auto_create_session=True)
+    return build
+
+
+async def client(http, user: int, requests: int, latencies: list[float], codes: list[int]):
+    for i in range(requests):
+        start = time.perf_counter()
+        response = await http.post(
+            "/v1/chat",
+            json={"message": "What are my tasks and repositories?", "session_id": "load"},
+            headers={"X-User-Id": f"user{user}"},
+        )
+        codes.append(response.status_code)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+async def run_level(build, clients: int, requests: int) -> dict:
+    server = AgentServer.from_settings(build)
+    app = create_app(server)
+    await server.start()
+    latencies: list[float] = []
+    codes: list[int] = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load",
+                                     timeout=None) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(client(http, user, requests, latencies, codes)
+                                   for user in range(clients)))
+            wall = time.perf_counter() - start
+    finally:
+        await server.stop()
+    latencies.sort()
+    ms = [t * 1000 for t in latencies]
+    return {
+        "clients": clients,
+        "ok": len(latencies),
+        "rejected": sum(code in (429, 503) for code in codes),
+        "errors": sum(code not in (200, 429, 503) for code in codes),
+        "p50_ms": statistics.median(ms) if ms else 0.0,
+        "p99_ms": ms[min(int(0.99 * len(ms)), len(ms) - 1)] if ms else 0.0,
+        "rps": len(latencies) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", default="1,8,32,128",
+                        help="Comma-separated numbers of concurrent users")
+    parser.add_argument("--requests", type=int, default=4, help="Messages per user")
+    parser.add_argument("--llm-ms", type=float, default=300)
+    parser.add_argument("--api-ms", type=float, default=80)
+    args = parser.parse_args()
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+    previous_pool = install_fake_google(FakeWorkspace(latency=args.api_ms / 1000))
+    pool = McpServerPool(health_interval=0)
+    params = StdioConnectionParams(
+        server_params=StdioServerParameters(command=sys.executable, args=[str(STUB_SERVER)],
+                                            env=dict(os.environ)),
+        timeout=60,
+    )
+    github = pool.register("github", params)
+    pool.submit(pool.server("github").ensure_connected()).result()
+    build = runner_factory(args.llm_ms / 1000, github)
+
+    print(f"{'clients':>8} {'ok':>6} {'rejected':>9} {'errors':>7} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    try:
+        for clients in (int(n) for n in args.clients.split(",")):
+            row = asyncio.run(run_level(build, clients, args.requests))
+            print(f"{row['clients']:>8} {row['ok']:>6} {row['rejected']:>9} {row['errors']:>7} "
+                  f"{row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['rps']:>8.2f}")
+    finally:
+        pool.close()
+        auth._pool = previous_pool
+
+
+if __name__ == "__main__":
+    main()
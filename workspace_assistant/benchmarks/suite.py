@@ -0,0 +1,292 @@
+"""
+Offline benchmark suite: end-to-end agent turns against recorded fixtures.
+
+Usage: python -m benchmarks.suite [--scenario list] [--iterations 20]
+                                  [--llm-ms 0] [--api-ms 0]
+                                  [--baseline benchmarks/baselines.json]
+                                  [--update-baseline] [--strict]
+
+Each scenario in scenarios.json is one user turn of the real agent (all its
+tools, callbacks, compaction and the tool executor) with the model replaced
+by ScriptedLlm replaying the recorded function calls, Google Calendar and
+Tasks served by FakeWorkspace from fixtures/workspace.json, and GitHub
+served by the stub MCP server from tests/fixtures. Nothing touches the
+network, so runs are repeatable.
+
+For every scenario the suite reports the p50/p95 latency of a turn, the
+peak and retained memory allocated during one turn (tracemalloc), the
+estimated prompt tokens and model calls (StatsPlugin), the API requests
+made, the tools called and how many of them failed. Results are compared
+with the baseline file, and the run exits with status 1 if a GATED metric
+(tokens, model calls, API requests, tools, tool errors) regressed beyond
+TOLERANCES. Those are deterministic for a given tree. Latency and memory
+vary from run to run on the same machine, so their regressions are only
+reported, unless --strict is given; record their baselines with
+--update-baseline on the machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from google.genai import types
+from mcp import StdioServerParameters
+
+from benchmarks.fakes import FakeWorkspace, ScriptedLlm, install_fake_google
+from runtime.stats import StatsPlugin
+from tools.mcp_pool import get_mcp_pool
+
+BENCH_DIR = Path(__file__).parent
+SCENARIOS = BENCH_DIR / "scenarios.json"
+BASELINE = BENCH_DIR / "baselines.json"
+STUB_SERVER = BENCH_DIR.parent / "tests" / "fixtures" / "stub_mcp_server.py"
+
+# metric: (relative, absolute) slack over the baseline before it counts as a
+# regression; None means the value must match exactly.
+TOLERANCES = {
+    "p50_ms": (0.5, 5.0),
+    "p95_ms": (0.5, 10.0),
+    "peak_kb": (0.25, 256.0),
+    "retained_kb": (0.25, 256.0),
+    "prompt_tokens": (0.1, 0.0),
+    "llm_calls": None,
+    "api_requests": None,
+    "tools": None,
+    "tool_errors": None,
+}
+
+# Metrics that fail the run: they do not depend on the machine or its load.
+GATED = ("prompt_tokens", "llm_calls", "api_requests", "tools", "tool_errors")
+# Wall-clock and memory metrics: reported, failing the run only with --strict.
+ADVISORY = ("p50_ms", "p95_ms", "peak_kb", "retained_kb")
+
+
+def configure_environment() -> None:
+    """Keep runs self-contained: in-memory sessions, throwaway event and task
+    stores synced on every turn, no caches answering for the tools, no client quotas.
+
+    Settings are read when each component is first used, so this must run
+    before the first turn.
+    """
+    state_dir = tempfile.mkdtemp(prefix="bench-suite-")
+    os.environ.setdefault("SESSION_BACKEND", "memory")
+    os.environ.setdefault("EVENT_STORE_PATH", str(Path(state_dir) / "events.sqlite3"))
+    os.environ.setdefault("EVENT_SYNC_INTERVAL", "0")
+    os.environ.setdefault("TASK_STORE_PATH", str(Path(state_dir) / "tasks.sqlite3"))
+    os.environ.setdefault("TASK_SYNC_INTERVAL", "0")
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+    os.environ.setdefault("MCP_CACHE_ENABLED", "false")
+    for api in ("CALENDAR", "TASKS", "GITHUB", "USER"):
+        os.environ.setdefault(f"{api}_RATE_LIMIT", "0")
+    os.environ.setdefault("GITHUB_PERSONAL_ACCESS_TOKEN", "offline")
+
+
+def load_scenarios(path: Path = SCENARIOS) -> dict:
+    """Read scenarios, filling {today} and {tomorrow} with dates in the fixture's zone."""
+    today = datetime.now(timezone.utc).date()
+    text = path.read_text()
+    text = text.replace("{today}", today.isoformat())
+    text = text.replace("{tomorrow}", (today + timedelta(days=1)).isoformat())
+    return json.loads(text)
+
+
+def register_stub_github() -> None:
+    """Point the shared pool's "github" server at the stub MCP server.
+
+    Must run before tools.mcp_tools is imported: the pool keeps the first
+    parameters registered under a name.
+    """
+    params = StdioConnectionParams(
+        server_params=StdioServerParameters(command=sys.executable, args=[str(STUB_SERVER)],
+                                            env=dict(os.environ)),
+        timeout=60,
+    )
+    get_mcp_pool().register("github", params)
+
+
+def build_runner(scenario: dict, llm_latency: float = 0.0) -> tuple[Runner, StatsPlugin]:
+    from agent import create_agent
+
+    agent = create_agent()
+    agent.model = ScriptedLlm(steps=scenario["steps"], latency=llm_latency)
+    stats = StatsPlugin()
+    runner = Runner(app_name="bench", agent=agent, session_service=InMemorySessionService(),
+                    plugins=[stats], auto_create_session=True)
+    return runner, stats
+
+
+def _failed(result: dict) -> bool:
+    return result.get("status") == "error" or "error" in result or bool(result.get("isError"))
+
+
+async def run_turn(runner: Runner, message: str) -> tuple[list[str], int]:
+    """Run one turn in a new session; return the tools called, in order, and how many failed."""
+    tools, errors = [], 0
+    content = types.Content(role="user", parts=[types.Part(text=message)])
+    async for event in runner.run_async(user_id="bench", session_id=uuid.uuid4().hex,
+                                        new_message=content):
+        tools.extend(call.name for call in event.get_function_calls())
+        errors += sum(_failed(response.response or {})
+                      for response in event.get_function_responses())
+    return tools, errors
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def run_scenario(scenario: dict, workspace: FakeWorkspace, iterations: int,
+                 llm_latency: float = 0.0) -> dict:
+    runner, stats = build_runner(scenario, llm_latency)
+
+    def turn() -> tuple[list[str], int]:
+        workspace.reset()
+        return asyncio.run(run_turn(runner, scenario["message"]))
+
+    turn()  # warm-up: imports, MCP connection, first event-store sync
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        turn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    workspace.requests.clear()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        tools, errors = turn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    last = stats.last()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "peak_kb": round((peak - before) / 1024, 1),
+        "retained_kb": round((current - before) / 1024, 1),
+        "prompt_tokens": last.prompt_tokens,
+        "llm_calls": last.llm_calls,
+        "api_requests": dict(sorted(workspace.requests.items())),
+        "tools": tools,
+        "tool_errors": errors,
+    }
+
+
+def compare(results: dict, baseline: dict, metrics: tuple[str, ...] = GATED) -> list[str]:
+    """Return a message for every one of metrics that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in metrics:
+            if metric not in expected:
+                continue
+            tolerance = TOLERANCES[metric]
+            value, base = result[metric], expected[metric]
+            if tolerance is None:
+                if value != base:
+                    regressions.append(f"{name}.{metric}: {value!r} != baseline {base!r}")
+                continue
+            relative, absolute = tolerance
+            limit = base * (1 + relative) + absolute
+            if value > limit:
+                regressions.append(
+                    f"{name}.{metric}: {value} > {limit:.1f} (baseline {base})"
+                )
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append",
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=0)
+    parser.add_argument("--api-ms", type=float, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record these results as the new baseline")
+    parser.add_argument("--strict", action="store_true",
+                        help="Also fail on latency and memory regressions")
+    args = parser.parse_args()
+    logging.getLogger("google_adk").setLevel(logging.ERROR)
+    configure_environment()
+
+    scenarios = load_scenarios()
+    names = args.scenario or list(scenarios)
+    workspace = FakeWorkspace(latency=args.api_ms / 1000)
+    previous_pool = install_fake_google(workspace)
+    register_stub_github()
+
+    results = {}
+    print(f"{'scenario':<16} {'p50 ms':>8} {'p95 ms':>8} {'peak KB':>9} {'kept KB':>8} "
+          f"{'tokens':>7} {'llm':>4} {'api':>4}")
+    try:
+        for name in names:
+            row = run_scenario(scenarios[name], workspace, args.iterations, args.llm_ms / 1000)
+            results[name] = row
+            print(f"{name:<16} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                  f"{row['peak_kb']:>9.1f} {row['retained_kb']:>8.1f} "
+                  f"{row['prompt_tokens']:>7} {row['llm_calls']:>4} "
+                  f"{sum(row['api_requests'].values()):>4}")
+    finally:
+        from tools import auth
+        auth._pool = previous_pool
+        get_mcp_pool().close()
+
+    if args.update_baseline:
+        recorded = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        recorded.setdefault("scenarios", {}).update(results)
+        recorded["environment"] = environment()
+        recorded["iterations"] = args.iterations
+        args.baseline.write_text(json.dumps(recorded, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+    baseline = json.loads(args.baseline.read_text())["scenarios"]
+    regressions = compare(results, baseline)
+    advisories = compare(results, baseline, ADVISORY)
+    if args.strict:
+        regressions, advisories = regressions + advisories, []
+    for message in advisories:
+        print(f"SLOWER (advisory) {message}")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
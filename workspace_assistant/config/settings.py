@@ -17,19 +17,84 @@ class Settings:
     """Application settings."""
 
     model_name: str = "gemini-3.0-flash-preview"
+    model_routing_enabled: bool = True
+    fast_model_name: Optional[str] = "gemini-2.5-flash-lite"
+    model_input_price: float = 0.30
+    model_output_price: float = 2.50
+    fast_model_input_price: float = 0.10
+    fast_model_output_price: float = 0.40
     google_credentials_path: Optional[Path] = None
     debug_mode: bool = False
     enable_retry: bool = True
     max_retries: int = 3
     retry_delay: float = 1.0
+    calendar_rate_limit: float = 10.0
+    tasks_rate_limit: float = 10.0
+    github_rate_limit: float = 1.3
+    user_rate_limit: float = 5.0
+    circuit_error_rate: float = 0.5
+    circuit_cooldown: float = 30.0
     calendar_max_results: int = 50
     gmail_max_results: int = 100
     sheets_max_rows: int = 1000
+    event_store_enabled: bool = True
+    event_store_path: Optional[Path] = None
+    event_sync_interval: float = 15.0
+    task_store_enabled: bool = True
+    task_store_path: Optional[Path] = None
+    task_sync_interval: float = 15.0
+    tool_max_workers: int = 8
+    tool_concurrency: int = 4
+    github_mcp_url: Optional[str] = None
+    mcp_health_interval: float = 30.0
+    mcp_connect_timeout: float = 30.0
+    mcp_cache_enabled: bool = True
+    mcp_cache_ttl: float = 60.0
+    mcp_cache_max_entries: int = 256
+    mcp_cache_max_bytes: int = 4 * 1024 * 1024
+    stats_path: Optional[Path] = None
+    compaction_enabled: bool = True
+    tool_result_page_size: int = 20
+    tool_result_text_budget: int = 500
+    session_backend: str = "sqlite"
+    session_db_path: Optional[Path] = None
+    session_history_events: int = 200
+    session_max_events: int = 2000
+    session_retention_days: float = 30.0
+    history_enabled: bool = True
+    history_keep_turns: int = 6
+    history_token_budget: int = 6000
+    history_summary_tokens: int = 800
+    answer_cache_enabled: bool = True
+    answer_cache_max_entries: int = 512
+    answer_cache_ttl: float = 3600.0
+    warmup_enabled: bool = True
+    warmup_timeout: float = 10.0
+    batch_concurrency: int = 4
+    batch_timeout: float = 120.0
+    tracing_enabled: bool = False
+    trace_path: Optional[Path] = None
+    trace_sample_rate: float = 1.0
+    trace_otlp_endpoint: Optional[str] = None
+    server_api_key: Optional[str] = None
+    server_processes: int = 1
+    server_runners: int = 2
+    server_concurrency: int = 8
+    server_queue_size: int = 64
+    server_user_concurrency: int = 2
+    server_queue_timeout: float = 30.0
+    server_turn_timeout: float = 120.0
 
     def __init__(self):
         load_dotenv()
 
         self.model_name = os.getenv("MODEL_NAME", "gemini-3.0-flash-preview")
+        self.model_routing_enabled = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+        self.fast_model_name = os.getenv("FAST_MODEL_NAME", "gemini-2.5-flash-lite") or None
+        self.model_input_price = float(os.getenv("MODEL_INPUT_PRICE", "0.30"))
+        self.model_output_price = float(os.getenv("MODEL_OUTPUT_PRICE", "2.50"))
+        self.fast_model_input_price = float(os.getenv("FAST_MODEL_INPUT_PRICE", "0.10"))
+        self.fast_model_output_price = float(os.getenv("FAST_MODEL_OUTPUT_PRICE", "0.40"))
         creds_path = os.getenv("GOOGLE_CREDENTIALS_PATH")
         if creds_path:
             self.google_credentials_path = Path(creds_path)
@@ -42,10 +107,88 @@ class Settings:
         self.enable_retry = os.getenv("ENABLE_RETRY", "true").lower() == "true"
         self.max_retries = int(os.getenv("MAX_RETRIES", "3"))
         self.retry_delay = float(os.getenv("RETRY_DELAY", "1.0"))
+        self.calendar_rate_limit = float(os.getenv("CALENDAR_RATE_LIMIT", "10"))
+        self.tasks_rate_limit = float(os.getenv("TASKS_RATE_LIMIT", "10"))
+        self.github_rate_limit = float(os.getenv("GITHUB_RATE_LIMIT", "1.3"))
+        self.user_rate_limit = float(os.getenv("USER_RATE_LIMIT", "5"))
+        self.circuit_error_rate = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+        self.circuit_cooldown = float(os.getenv("CIRCUIT_COOLDOWN", "30"))
         self.calendar_max_results = int(os.getenv("CALENDAR_MAX_RESULTS", "50"))
         self.gmail_max_results = int(os.getenv("GMAIL_MAX_RESULTS", "100"))
         self.sheets_max_rows = int(os.getenv("SHEETS_MAX_ROWS", "1000"))
 
+        self.event_store_enabled = os.getenv("EVENT_STORE_ENABLED", "true").lower() == "true"
+        store_path = os.getenv("EVENT_STORE_PATH")
+        if store_path:
+            self.event_store_path = Path(store_path)
+        else:
+            self.event_store_path = Path(__file__).parent / "cache" / "events.sqlite3"
+        self.event_sync_interval = float(os.getenv("EVENT_SYNC_INTERVAL", "15.0"))
+
+        self.task_store_enabled = os.getenv("TASK_STORE_ENABLED", "true").lower() == "true"
+        task_store_path = os.getenv("TASK_STORE_PATH")
+        if task_store_path:
+            self.task_store_path = Path(task_store_path)
+        else:
+            self.task_store_path = Path(__file__).parent / "cache" / "tasks.sqlite3"
+        self.task_sync_interval = float(os.getenv("TASK_SYNC_INTERVAL", "15.0"))
+        self.tool_max_workers = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+        self.tool_concurrency = int(os.getenv("TOOL_CONCURRENCY", "4"))
+        self.github_mcp_url = os.getenv("GITHUB_MCP_URL") or None
+        self.mcp_health_interval = float(os.getenv("MCP_HEALTH_INTERVAL", "30"))
+        self.mcp_connect_timeout = float(os.getenv("MCP_CONNECT_TIMEOUT", "30"))
+        self.mcp_cache_enabled = os.getenv("MCP_CACHE_ENABLED", "true").lower() == "true"
+        self.mcp_cache_ttl = float(os.getenv("MCP_CACHE_TTL", "60"))
+        self.mcp_cache_max_entries = int(os.getenv("MCP_CACHE_MAX_ENTRIES", "256"))
+        self.mcp_cache_max_bytes = int(os.getenv("MCP_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+        stats_path = os.getenv("STATS_PATH")
+        if stats_path:
+            self.stats_path = Path(stats_path)
+        else:
+            self.stats_path = Path(__file__).parent / "cache" / "stats.jsonl"
+        self.compaction_enabled = os.getenv("COMPACTION_ENABLED", "true").lower() == "true"
+        self.tool_result_page_size = int(os.getenv("TOOL_RESULT_PAGE_SIZE", "20"))
+        self.tool_result_text_budget = int(os.getenv("TOOL_RESULT_TEXT_BUDGET", "500"))
+        self.session_backend = os.getenv("SESSION_BACKEND", "sqlite").lower()
+        session_db_path = os.getenv("SESSION_DB_PATH")
+        if session_db_path:
+            self.session_db_path = Path(session_db_path)
+        else:
+            self.session_db_path = Path(__file__).parent / "cache" / "sessions.sqlite3"
+        self.session_history_events = int(os.getenv("SESSION_HISTORY_EVENTS", "200"))
+        self.session_max_events = int(os.getenv("SESSION_MAX_EVENTS", "2000"))
+        self.session_retention_days = float(os.getenv("SESSION_RETENTION_DAYS", "30"))
+        self.history_enabled = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+        self.history_keep_turns = int(os.getenv("HISTORY_KEEP_TURNS", "6"))
+        self.history_token_budget = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))
+        self.history_summary_tokens = int(os.getenv("HISTORY_SUMMARY_TOKENS", "800"))
+        self.answer_cache_enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self.answer_cache_max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+        self.answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self.warmup_enabled = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+        self.warmup_timeout = float(os.getenv("WARMUP_TIMEOUT", "10"))
+        self.batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+        self.batch_timeout = float(os.getenv("BATCH_TIMEOUT", "120"))
+        # Tracing follows DEBUG unless TRACING_ENABLED says otherwise.
+        self.tracing_enabled = os.getenv(
+            "TRACING_ENABLED", str(self.debug_mode)
+        ).lower() == "true"
+        trace_path = os.getenv("TRACE_PATH")
+        if trace_path:
+            self.trace_path = Path(trace_path)
+        else:
+            self.trace_path = Path(__file__).parent / "cache" / "traces.jsonl"
+        self.trace_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+        self.trace_otlp_endpoint = os.getenv("TRACE_OTLP_ENDPOINT") or None
+        self.server_api_key = os.getenv("SERVER_API_KEY") or None
+        self.server_processes = int(os.getenv("SERVER_PROCESSES", "1"))
+        self.server_runners = int(os.getenv("SERVER_RUNNERS", "2"))
+        self.server_concurrency = int(os.getenv("SERVER_CONCURRENCY", "8"))
+        self.server_queue_size = int(os.getenv("SERVER_QUEUE_SIZE", "64"))
+        self.server_user_concurrency = int(os.getenv("SERVER_USER_CONCURRENCY", "2"))
+        self.server_queue_timeout = float(os.getenv("SERVER_QUEUE_TIMEOUT", "30"))
+        self.server_turn_timeout = float(os.getenv("SERVER_TURN_TIMEOUT", "120"))
+
     def validate(self) -> bool:
         """Check if configuration is valid."""
         if not self.google_credentials_path.exists():
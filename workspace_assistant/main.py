@@ -5,82 +5,382 @@ Google Workspace Assistant - Entry Point
 Usage:
     python main.py --interactive
     python main.py "What meetings do I have today?"
+    python main.py --no-stream "What meetings do I have today?"
+    python main.py --tool-search --interactive
+    python main.py --stats "What meetings do I have today?"
+    python main.py --user alice --session work --interactive
+    python main.py --batch queries.jsonl --output results.jsonl --concurrency 8
+
+The ADK/genai stack is imported lazily so that --help and the interactive
+prompt appear before the agent has finished loading.
 """
 
 import argparse
 import asyncio
-from google.adk.runners import InMemoryRunner
-from google.genai import types as genai_types
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from rich.console import Console
 from rich.prompt import Prompt
-from rich.markdown import Markdown
-
-from agent import create_agent
 
 console = Console()
 
+APP_NAME = "workspace_assistant"
 USER_ID = "user"
 SESSION_ID = "session"
 
 
-def run_query(runner, query: str) -> str:
-    """Execute a query using the InMemoryRunner and return the response."""
+def create_runner(tool_search: bool = False, stats: bool = False):
+    """Create the agent and wrap it in a Runner.
+
+    Conversations are kept by the shared session service (see
+    runtime/sessions.py): persisted in SQLite by default, so a session can
+    be resumed after a restart.
+    With tool_search, GitHub tool schemas are loaded on demand through
+    search_github_tools instead of all being sent with every request.
+    With stats, per-turn token and timing numbers are recorded (see
+    runtime/stats.py) and appended to Settings.stats_path.
+    When tracing is enabled in Settings, turns, model and tool calls and the
+    Google API and MCP requests under them are traced (see runtime/tracing.py).
+    """
+    from google.adk.artifacts import InMemoryArtifactService
+    from google.adk.memory import InMemoryMemoryService
+    from google.adk.runners import Runner
+
+    from agent import create_agent, create_agent_with_tool_search
+    from config.settings import Settings
+    from runtime.sessions import get_session_service
+    from runtime.tracing import TracingPlugin, setup_tracing
+    from tools.mcp_pool import get_mcp_pool
+
+    agent = create_agent_with_tool_search() if tool_search else create_agent()
+    # Start the shared MCP servers connecting while the user types.
+    get_mcp_pool().warm_up()
+    plugins = []
+    if stats:
+        from runtime.stats import StatsPlugin
+
+        plugins.append(StatsPlugin(Settings().stats_path))
+    if setup_tracing() is not None:
+        plugins.append(TracingPlugin())
+    return Runner(
+        app_name=APP_NAME,
+        agent=agent,
+        session_service=get_session_service(),
+        artifact_service=InMemoryArtifactService(),
+        memory_service=InMemoryMemoryService(),
+        plugins=plugins,
+        # Sessions are named on the command line; create them on first use.
+        auto_create_session=True,
+    )
+
+
+def run_query(runner, query: str, user_id: str = USER_ID,
+              session_id: str = SESSION_ID) -> str:
+    """Execute a query using the runner and return the response.
+
+    Repeated read-only questions are answered from the answer cache (see
+    runtime/answer_cache.py) while the data behind them is unchanged.
+    """
     try:
+        from google.genai import types as genai_types
+
+        from runtime.answer_cache import get_answer_cache, record_cached_turn
+
+        cache = get_answer_cache()
+        key = cache.key(user_id, query) if cache else None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            asyncio.run(record_cached_turn(runner, user_id, session_id, query, cached))
+            return cached
+
         user_message = genai_types.Content(
             role="user",
             parts=[genai_types.Part(text=query)],
         )
         response_text = ""
+        tool_names = []
         for event in runner.run(
-            user_id=USER_ID,
-            session_id=SESSION_ID,
+            user_id=user_id,
+            session_id=session_id,
             new_message=user_message,
         ):
+            tool_names += [call.name for call in event.get_function_calls()]
             if event.content and event.content.parts:
                 for part in event.content.parts:
                     if part.text:
                         response_text += part.text
+        if cache and response_text:
+            cache.put(key, user_id, response_text, tool_names)
         return response_text or "(No response)"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-def interactive_mode(runner):
-    """Run in interactive mode."""
+async def stream_query(runner, query: str, user_id: str = USER_ID,
+                       session_id: str = SESSION_ID) -> str:
+    """Execute a query with run_async, rendering text and tool calls as they arrive.
+
+    Partial model text is shown live; each tool call prints a progress line
+    when it starts and when its result comes back. Returns the full text.
+    Cached answers are printed directly, as in run_query.
+    """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types as genai_types
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from rich.spinner import Spinner
+
+    from runtime.answer_cache import get_answer_cache, record_cached_turn
+
+    cache = get_answer_cache()
+    # Reading the data versions may sync the calendar; keep it off the loop.
+    key = await asyncio.to_thread(cache.key, user_id, query) if cache else None
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        await record_cached_turn(runner, user_id, session_id, query, cached)
+        console.print("[dim](cached answer)[/dim]")
+        print_markdown(cached)
+        return cached
+
+    user_message = genai_types.Content(
+        role="user",
+        parts=[genai_types.Part(text=query)],
+    )
+    committed, partial = "", ""
+    started = {}
+    tool_names = []
+
+    with Live(Spinner("dots", text="Thinking..."), console=console,
+              refresh_per_second=12) as live:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=user_message,
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+        ):
+            if not event.partial:
+                for call in event.get_function_calls():
+                    tool_names.append(call.name)
+                    started[call.id] = time.perf_counter()
+                    live.console.print(f"[dim]→ {call.name}[/dim]")
+                for result in event.get_function_responses():
+                    elapsed = time.perf_counter() - started.pop(result.id, time.perf_counter())
+                    live.console.print(f"[dim]✓ {result.name} ({elapsed:.1f}s)[/dim]")
+
+            parts = event.content.parts if event.content and event.content.parts else []
+            text = "".join(p.text for p in parts if p.text and not p.thought)
+            if not text:
+                continue
+            # The final, non-partial event repeats the streamed chunks in full.
+            if event.partial:
+                partial += text
+            else:
+                committed += text
+                partial = ""
+            live.update(Markdown(committed + partial))
+
+        if not committed + partial:
+            live.update(Markdown("(No response)"))
+    if cache and committed + partial:
+        cache.put(key, user_id, committed + partial, tool_names)
+    return committed + partial
+
+
+def print_turn_stats(runner, summary: bool = False):
+    """Print the last turn's stats (or the session summary) if --stats is on."""
+    plugin = runner.plugin_manager.get_plugin("turn_stats")
+    if plugin is None:
+        return
+    from runtime.stats import summary_table, turn_table
+
+    if summary:
+        console.print(summary_table(plugin.summary()))
+    elif plugin.last() is not None:
+        console.print(turn_table(plugin.last()))
+
+
+def print_warmup(runner, warmup):
+    """Print the warm-up step timings if --stats is on."""
+    if warmup is None or runner.plugin_manager.get_plugin("turn_stats") is None:
+        return
+    from runtime.warmup import warmup_table
+
+    console.print(warmup_table(warmup.report()))
+
+
+def print_routing(runner):
+    """Print per-tier model latency, tokens and cost if --stats is on and routing is used."""
+    if runner.plugin_manager.get_plugin("turn_stats") is None:
+        return
+    from runtime.routing import get_model_router, routing_table
+
+    router = get_model_router()
+    if router is not None:
+        console.print(routing_table(router.stats()))
+
+
+def print_markdown(text: str):
+    """Render a response as Markdown."""
+    from rich.markdown import Markdown
+
+    console.print(Markdown(text))
+
+
+def interactive_mode(runner_future, stream: bool = True, user_id: str = USER_ID,
+                     session_id: str = SESSION_ID, warmup=None):
+    """Run in interactive mode.
+
+    The runner is built (and the warm-up runs) in the background; the first
+    query waits for the runner only.
+    Ctrl-C while a streamed answer is running cancels that turn only.
+    """
     console.print("[bold green]Google Workspace Assistant[/bold green]")
     console.print("Type 'quit' to exit.\n")
 
-    while True:
-        query = Prompt.ask("[cyan]You[/cyan]")
-        if query.lower() in ('quit', 'exit', 'q'):
-            break
-        if not query.strip():
-            continue
+    with asyncio.Runner() as loop:
+        while True:
+            query = Prompt.ask("[cyan]You[/cyan]")
+            if query.lower() in ('quit', 'exit', 'q'):
+                if runner_future.done() and not runner_future.exception():
+                    print_warmup(runner_future.result(), warmup)
+                    print_routing(runner_future.result())
+                    print_turn_stats(runner_future.result(), summary=True)
+                break
+            if not query.strip():
+                continue
 
-        with console.status("Thinking..."):
-            response = run_query(runner, query)
+            try:
+                with console.status("Loading agent..."):
+                    runner = runner_future.result()
+            except Exception as e:
+                console.print(f"[red]Error: {str(e)}[/red]\n")
+                continue
 
-        console.print("\n[green]Assistant[/green]")
-        console.print(Markdown(response))
-        console.print()
+            console.print("\n[green]Assistant[/green]")
+            if not stream:
+                with console.status("Thinking..."):
+                    response = run_query(runner, query, user_id, session_id)
+                print_markdown(response)
+                print_turn_stats(runner)
+                console.print()
+                continue
+
+            try:
+                loop.run(stream_query(runner, query, user_id, session_id))
+            except KeyboardInterrupt:
+                console.print("[yellow](cancelled)[/yellow]")
+            except Exception as e:
+                console.print(f"[red]Error: {str(e)}[/red]")
+            print_turn_stats(runner)
+            console.print()
+
+
+def batch_mode(runner, input_path: str, output_path: str | None = None,
+               concurrency: int | None = None, timeout: float | None = None):
+    """Run a JSONL file of queries (see runtime/batch.py) and print throughput stats.
+
+    Results are appended to output_path as they finish; running the same
+    command again resumes where an interrupted run stopped.
+    """
+    from config.settings import Settings
+    from runtime.batch import BatchRunner, batch_table, default_output
+
+    settings = Settings()
+    output = output_path or default_output(input_path)
+    with console.status("Running batch...") as status:
+        done = 0
+
+        def progress(result):
+            nonlocal done
+            done += 1
+            status.update(f"Running batch... {done} done (line {result['line']}: "
+                          f"{result['status']})")
+
+        batch = BatchRunner(
+            runner,
+            concurrency=concurrency or settings.batch_concurrency,
+            timeout=timeout or settings.batch_timeout,
+            on_result=progress,
+        )
+        try:
+            summary = asyncio.run(batch.run(input_path, output))
+        except KeyboardInterrupt:
+            console.print("[yellow](interrupted; run again to resume)[/yellow]")
+            summary = batch.stats.summary()
+    console.print(f"Results: {output}")
+    console.print(batch_table(summary))
 
 
 def main():
     parser = argparse.ArgumentParser(description="Google Workspace Assistant")
     parser.add_argument("query", nargs="?", help="Query to send")
     parser.add_argument("--interactive", "-i", action="store_true")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Wait for the full answer instead of streaming it")
+    parser.add_argument("--tool-search", action="store_true",
+                        help="Load GitHub tool schemas on demand via search_github_tools")
+    parser.add_argument("--stats", action="store_true",
+                        help="Show token and timing stats per turn and log them as JSONL")
+    parser.add_argument("--user", default=USER_ID, help="User ID the conversation belongs to")
+    parser.add_argument("--session", default=SESSION_ID,
+                        help="Session ID to start or resume")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run the queries in a JSONL file (one {\"query\": ...} per line)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="Where --batch appends results (default: FILE.results.jsonl)")
+    parser.add_argument("--concurrency", type=int,
+                        help="Queries --batch runs at once (default: BATCH_CONCURRENCY)")
+    parser.add_argument("--timeout", type=float,
+                        help="Seconds each --batch query may run (default: BATCH_TIMEOUT)")
 
     args = parser.parse_args()
-    agent = create_agent()
-    runner = InMemoryRunner(agent=agent)
-
-    if args.interactive:
-        interactive_mode(runner)
-    elif args.query:
-        response = run_query(runner, args.query)
-        console.print(Markdown(response))
-    else:
+    make_runner = functools.partial(
+        create_runner, tool_search=args.tool_search, stats=args.stats
+    )
+
+    if not (args.interactive or args.query or args.batch):
         parser.print_help()
+        return
+
+    from runtime.warmup import start_warmup
+
+    # Refresh credentials, build clients, start MCP servers and fill the
+    # local stores while the agent loads and the user types.
+    warmup = start_warmup()
+    try:
+        if args.batch:
+            runner = make_runner()
+            batch_mode(runner, args.batch, args.output, args.concurrency, args.timeout)
+            print_warmup(runner, warmup)
+            print_routing(runner)
+            print_turn_stats(runner, summary=True)
+        elif args.interactive:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                interactive_mode(executor.submit(make_runner), stream=not args.no_stream,
+                                 user_id=args.user, session_id=args.session, warmup=warmup)
+        elif args.no_stream:
+            runner = make_runner()
+            response = run_query(runner, args.query, args.user, args.session)
+            print_markdown(response)
+            print_warmup(runner, warmup)
+            print_routing(runner)
+            print_turn_stats(runner)
+        else:
+            runner = make_runner()
+            try:
+                asyncio.run(stream_query(runner, args.query, args.user, args.session))
+            except KeyboardInterrupt:
+                console.print("[yellow](cancelled)[/yellow]")
+            except Exception as e:
+                console.print(f"[red]Error: {str(e)}[/red]")
+            print_warmup(runner, warmup)
+            print_routing(runner)
+            print_turn_stats(runner)
+    finally:
+        if warmup is not None:
+            warmup.cancel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Runtime support around the ADK runner (instrumentation and serving)."""
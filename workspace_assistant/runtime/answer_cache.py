@@ -0,0 +1,254 @@
+"""
+Answer Cache
+
+Many questions are near-identical reads ("what's on my calendar today",
+"show my tasks"), and each one costs a full model round trip plus tool
+calls. AnswerCache returns the previous answer instead, when the question
+and the data behind it are unchanged.
+
+The key is the user, the question's intent and a freshness version for
+every data source it mentions:
+
+- The intent is the set of content words left after normalization
+  (lowercasing, stemming, synonyms, filler words removed), plus today's date
+  so that "today" and "tomorrow" roll over.
+- Calendar questions use the event store's sync token, and Tasks questions
+  the 'updated' times of every task list in the task store. Questions about
+  GitHub, or about no known source, are not cached.
+
+Reading a version syncs the store, at most once per sync interval; that is
+the sync the turn's read tools would do anyway, so a miss does not add a
+round trip.
+
+Questions that ask for a change, that refer back to the conversation
+("move it", "the first one"), or whose answer moves with the clock ("right
+now", "next meeting", "overdue") bypass the cache. An answer is stored only
+if the turn ran read-only tools. A turn that changed anything drops the
+user's cached answers.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable
+
+from config.settings import Settings
+from tools.mcp_cache import is_read_tool
+from tools.tool_search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Words that ask for a change; such questions are never answered from cache.
+MUTATION_WORDS = {
+    "add", "create", "new", "make", "book", "reschedule", "move", "shift",
+    "postpone", "cancel", "delete", "remove", "complete", "finish", "done",
+    "mark", "update", "change", "edit", "rename", "set", "close", "reopen",
+    "assign", "comment", "invite", "accept", "decline",
+}
+
+# Words that point back into the conversation, so the answer depends on it.
+CONTEXT_WORDS = {
+    "it", "that", "this", "these", "those", "them", "they", "one", "first",
+    "second", "third", "last", "previous", "again", "else", "same", "instead",
+}
+
+# Words whose answer depends on the time of day, not just the date.
+TIME_WORDS = {
+    "now", "right", "currently", "current", "next", "soon", "upcoming", "later",
+    "hour", "minute", "overdue", "remaining", "left", "until", "ago", "yet", "still",
+}
+
+FILLER_WORDS = {
+    "a", "an", "the", "i", "me", "my", "mine", "you", "your", "we", "our",
+    "please", "can", "could", "would", "will", "do", "does", "did", "is", "are",
+    "am", "be", "what", "whats", "which", "show", "list", "tell", "give", "get",
+    "see", "check", "have", "got", "there", "any", "all", "on", "in", "for",
+    "of", "to", "at", "about", "up", "has", "hey", "hi", "thank", "thanks",
+}
+
+SYNONYMS = {
+    "meeting": "event", "appointment": "event", "call": "event",
+    "agenda": "calendar", "schedule": "calendar", "diary": "calendar",
+    "todo": "task", "todos": "task", "reminder": "task",
+    "pr": "pull", "repo": "repository", "bug": "issue", "ticket": "issue",
+}
+
+# Data source -> words that tie a question to it.
+SOURCE_WORDS = {
+    "calendar": {"calendar", "event", "busy", "free", "slot", "available",
+                 "availability", "conflict"},
+    "tasks": {"task", "due", "overdue"},
+    "github": {"github", "repository", "issue", "pull", "commit", "branch", "code"},
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Tools that only read, beyond the get_/list_/search_ naming convention.
+READ_ONLY_TOOLS = {"check_conflicts", "find_available_slots", "more_results"}
+
+
+def intent(query: str) -> tuple[str, ...] | None:
+    """Return the normalized intent terms, or None if the query must bypass the cache."""
+    raw = _WORD.findall(re.sub(r"['’]", "", query.lower()))
+    stems = {word: SYNONYMS.get(stem, stem) for word in raw for stem in tokenize(word)}
+    checked = set(raw) | set(stems.values())
+    if MUTATION_WORDS & checked or CONTEXT_WORDS & checked or TIME_WORDS & checked:
+        return None
+    terms = tuple(sorted({stems[word] for word in raw if word not in FILLER_WORDS} - FILLER_WORDS))
+    return terms or None
+
+
+def sources(terms: tuple[str, ...]) -> list[str]:
+    return sorted(name for name, words in SOURCE_WORDS.items() if words.intersection(terms))
+
+
+def calendar_version() -> str | None:
+    from tools.event_store import get_event_store
+
+    store = get_event_store()
+    if store is None:
+        return None
+    store.sync()
+    return store.sync_token()
+
+
+def tasks_version() -> str | None:
+    from tools.task_store import get_task_store
+
+    store = get_task_store()
+    if store is None:
+        return None
+    store.sync()
+    return store.version()
+
+
+# Data source -> function returning its current version (None: not cacheable).
+VERSION_PROVIDERS: dict[str, Callable[[], str | None]] = {
+    "calendar": calendar_version,
+    "tasks": tasks_version,
+}
+
+
+def is_read_only(tool_names: list[str]) -> bool:
+    return all(is_read_tool(name) or name in READ_ONLY_TOOLS for name in tool_names)
+
+
+class AnswerCache:
+    """LRU cache of final answers keyed by user, intent and data versions."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0,
+                 version_providers: dict[str, Callable[[], str | None]] | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_providers = VERSION_PROVIDERS if version_providers is None else version_providers
+        self._entries: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._bypasses = 0
+
+    def key(self, user_id: str, query: str) -> str | None:
+        """Return the cache key for a question, or None if it must not be cached."""
+        terms = intent(query)
+        names = sources(terms) if terms else []
+        if not names or any(name not in self.version_providers for name in names):
+            with self._lock:
+                self._bypasses += 1
+            return None
+        versions = []
+        for name in names:
+            try:
+                version = self.version_providers[name]()
+            except Exception:
+                logger.warning("Could not read the %s version; not caching", name, exc_info=True)
+                version = None
+            if version is None:
+                with self._lock:
+                    self._bypasses += 1
+                return None
+            versions.append(f"{name}={version}")
+        return "|".join([user_id, date.today().isoformat(), " ".join(terms), *versions])
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: str | None, user_id: str, answer: str, tool_names: list[str]) -> None:
+        """Record a finished turn: store its answer under key (None: uncacheable),
+        unless the turn changed something, in which case drop the user's answers."""
+        if not is_read_only(tool_names):
+            self.invalidate(user_id)
+            return
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user_id, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> int:
+        with self._lock:
+            stale = [key for key, (_, owner, _) in self._entries.items() if owner == user_id]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypasses": self._bypasses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache: AnswerCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache | None:
+    """Return the shared AnswerCache, or None when disabled in Settings."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = Settings()
+            if not settings.answer_cache_enabled:
+                return None
+            _cache = AnswerCache(settings.answer_cache_max_entries, settings.answer_cache_ttl)
+        return _cache
+
+
+async def record_cached_turn(runner, user_id: str, session_id: str, query: str,
+                             answer: str) -> None:
+    """Append a question answered from cache to the session, so follow-ups have context."""
+    from google.adk.events.event import Event
+    from google.adk.sessions.base_session_service import GetSessionConfig
+    from google.genai import types
+
+    service = runner.session_service
+    session = await service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id,
+        config=GetSessionConfig(num_recent_events=0),
+    ) or await service.create_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    invocation_id = "cached-" + Event.new_id()
+    for author, role, text in (("user", "user", query), (runner.agent.name, "model", answer)):
+        await service.append_event(session, Event(
+            invocation_id=invocation_id,
+            author=author,
+            content=types.Content(role=role, parts=[types.Part(text=text)]),
+        ))
@@ -0,0 +1,309 @@
+"""
+Batch Mode
+
+Runs a file of queries without a prompt, e.g. nightly digests for many users:
+
+    python main.py --batch queries.jsonl [--output results.jsonl] [--concurrency 8]
+
+Each input line is a JSON object; only 'query' is required:
+
+    {"id": "alice-digest", "query": "Summarize tomorrow's meetings", "user": "alice"}
+
+'id' defaults to the line number. 'user' selects whose Google credentials
+the tools use, as in server mode (config/credentials/users/<id>/); without
+it the query runs as the local CLI user. Every query gets a session of its
+own that is deleted afterwards, unless the line names a 'session' to
+continue.
+
+Results are appended to the output file as each query finishes, one JSON
+object per line: the input line number, id, user, status (ok, error,
+timeout or invalid), answer or error, tool names and seconds. Running the
+same command again resumes: lines with an 'ok' result are skipped and the
+rest run again, and a line's later result supersedes its earlier ones.
+
+The input is read lazily, at most `concurrency` lines ahead of the workers,
+and latency percentiles are kept over the last LATENCY_WINDOW queries, so
+memory stays flat however long the file is. Lines already done are kept as
+a watermark plus the lines that finished out of order or failed; blank
+input lines have no result and the watermark steps over them.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+# Imported here rather than per query, so the first queries' timeouts do not
+# pay for loading the server module.
+from runtime.server import run_turn
+from tools.auth import current_user, is_valid_user_id
+
+# Latencies kept for the percentiles in the summary.
+LATENCY_WINDOW = 10_000
+
+DEFAULT_USER = "user"
+
+
+@dataclass
+class _Item:
+    line: int
+    id: str
+    query: str
+    user: str | None = None
+    session: str | None = None
+
+
+class Completed:
+    """Input lines that already have an 'ok' result.
+
+    Results are written roughly in input order, so every line up to
+    `watermark` is done and only lines that finished out of order (in
+    `ahead`) or failed (in `failed`) are kept individually. `blank` yields
+    the input's blank line numbers in order; they never get a result, so
+    the watermark moves past them as if they had.
+    """
+
+    def __init__(self, blank: Iterator[int] | None = None):
+        self.watermark = 0
+        self.ahead: set[int] = set()
+        self.failed: set[int] = set()
+        self._blank = blank if blank is not None else iter(())
+        self._next_blank = next(self._blank, None)
+        self._advance()
+
+    def _advance(self) -> None:
+        while True:
+            if self.watermark + 1 in self.ahead:
+                self.ahead.remove(self.watermark + 1)
+            elif self.watermark + 1 == self._next_blank:
+                self._next_blank = next(self._blank, None)
+            else:
+                return
+            self.watermark += 1
+
+    def add(self, line: int, ok: bool) -> None:
+        if ok:
+            self.failed.discard(line)
+        else:
+            self.failed.add(line)
+        if line <= self.watermark:
+            return
+        self.ahead.add(line)
+        self._advance()
+
+    def __contains__(self, line: int) -> bool:
+        seen = line <= self.watermark or line in self.ahead
+        return seen and line not in self.failed
+
+    def __len__(self) -> int:
+        return self.watermark + len(self.ahead) - len(self.failed)
+
+
+def blank_lines(path: Path) -> Iterator[int]:
+    """Numbers of the blank lines of a file, read lazily."""
+    with open(path, encoding="utf-8") as f:
+        for line, raw in enumerate(f, start=1):
+            if not raw.strip():
+                yield line
+
+
+def load_completed(output: Path, input_path: Path | None = None) -> Completed:
+    """Read the results written so far, dropping a last line cut off by a crash.
+
+    With input_path, the input's blank lines count as done.
+    """
+    completed = Completed(blank_lines(input_path) if input_path is not None else None)
+    if not output.exists():
+        return completed
+    good = 0
+    with open(output, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # cut off mid-write
+            good += len(raw)
+            try:
+                result = json.loads(raw)
+                completed.add(int(result["line"]), result["status"] == "ok")
+            except (ValueError, KeyError, TypeError):
+                continue
+    if good < output.stat().st_size:
+        with open(output, "rb+") as f:
+            f.truncate(good)
+    return completed
+
+
+class BatchStats:
+    """Counts, throughput and latency percentiles of one batch run."""
+
+    def __init__(self):
+        self.counts: Counter[str] = Counter()
+        self.cached = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.monotonic()
+        self.finished: float | None = None
+
+    def record(self, result: dict) -> None:
+        self.counts[result["status"]] += 1
+        self.cached += bool(result.get("cached"))
+        if result["status"] == "ok":
+            self.latencies.append(result["seconds"])
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(q: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(int(q * len(latencies)), len(latencies) - 1)], 3)
+
+        run = sum(v for k, v in self.counts.items() if k != "skipped")
+        return {
+            "queries": run,
+            **{status: self.counts[status]
+               for status in ("ok", "error", "timeout", "invalid", "skipped")},
+            "cached": self.cached,
+            "seconds": round(elapsed, 3),
+            "per_second": round(run / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_s": percentile(0.5),
+            "p95_s": percentile(0.95),
+        }
+
+
+def parse_line(line: int, raw: str) -> _Item:
+    """Parse one input line; raises ValueError with a reason if it is not usable."""
+    try:
+        record = json.loads(raw)
+    except ValueError:
+        raise ValueError("not valid JSON") from None
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    query = record.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("'query' is required")
+    user = record.get("user")
+    if user is not None and not is_valid_user_id(str(user)):
+        raise ValueError(f"invalid user ID: {user!r}")
+    session = record.get("session")
+    return _Item(line, str(record.get("id", line)), query,
+                 str(user) if user is not None else None,
+                 str(session) if session else None)
+
+
+class BatchRunner:
+    """Runs queries from a JSONL file with bounded concurrency, appending JSONL results."""
+
+    def __init__(self, runner, concurrency: int = 4, timeout: float = 120.0,
+                 on_result: Callable[[dict], None] | None = None):
+        self.runner = runner
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.on_result = on_result
+        self.stats = BatchStats()
+
+    async def run(self, input_path: Path | str, output_path: Path | str) -> dict:
+        """Run every line of input_path not yet done in output_path; returns the summary."""
+        input_path, output_path = Path(input_path), Path(output_path)
+        completed = load_completed(output_path, input_path)
+        self.stats = BatchStats()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as output:
+            workers = [asyncio.create_task(self._work(queue, output), name=f"batch-worker-{i}")
+                       for i in range(self.concurrency)]
+            try:
+                await self._read(input_path, completed, queue, output)
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        self.stats.finished = time.monotonic()
+        return self.stats.summary()
+
+    async def _read(self, path: Path, completed: Completed, queue: asyncio.Queue,
+                    output) -> None:
+        with open(path, encoding="utf-8") as f:
+            for line, raw in enumerate(f, start=1):
+                if not raw.strip():
+                    continue
+                if line in completed:
+                    self.stats.counts["skipped"] += 1
+                    continue
+                try:
+                    item = parse_line(line, raw)
+                except ValueError as e:
+                    self._write(output, {"line": line, "id": str(line), "status": "invalid",
+                                         "error": str(e), "seconds": 0.0})
+                    continue
+                # Blocks while `concurrency` queries are waiting: the file is
+                # never read further ahead than that.
+                await queue.put(item)
+
+    async def _work(self, queue: asyncio.Queue, output) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                self._write(output, await self._run_one(item))
+            finally:
+                queue.task_done()
+
+    async def _run_one(self, item: _Item) -> dict:
+        user_id = item.user or DEFAULT_USER
+        session_id = item.session or f"batch-{uuid.uuid4().hex}"
+        result: dict[str, Any] = {"line": item.line, "id": item.id, "user": item.user}
+        token = current_user.set(item.user)
+        start = time.monotonic()
+        try:
+            turn = await asyncio.wait_for(
+                run_turn(self.runner, user_id, session_id, item.query), self.timeout
+            )
+        except asyncio.TimeoutError:
+            result.update(status="timeout", error=f"no answer within {self.timeout:g}s")
+        except Exception as e:
+            result.update(status="error", error=str(e) or type(e).__name__)
+        else:
+            result.update(status="ok", **turn)
+        finally:
+            current_user.reset(token)
+        result["seconds"] = round(time.monotonic() - start, 3)
+        if item.session is None:
+            await self._delete_session(user_id, session_id)
+        return result
+
+    async def _delete_session(self, user_id: str, session_id: str) -> None:
+        try:
+            await self.runner.session_service.delete_session(
+                app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+            )
+        except Exception:
+            pass  # never created (e.g. the turn failed early) or already gone
+
+    def _write(self, output, result: dict) -> None:
+        # Flushed per line, so a crash loses at most the queries in flight.
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        self.stats.record(result)
+        if self.on_result is not None:
+            self.on_result(result)
+
+
+def default_output(input_path: Path | str) -> Path:
+    """queries.jsonl -> queries.results.jsonl"""
+    return Path(input_path).with_suffix(".results.jsonl")
+
+
+def batch_table(summary: dict):
+    """Rich table of a batch run's summary."""
+    from rich.table import Table
+
+    table = Table(title="Batch", show_header=False, title_justify="left")
+    table.add_column(style="dim")
+    table.add_column(justify="right")
+    for label, value in summary.items():
+        table.add_row(label.replace("_", " "), "-" if value is None else str(value))
+    return table
@@ -0,0 +1,214 @@
+"""
+Conversation History Window
+
+Without management every model call resends the whole conversation, so
+prompt size and latency grow with the length of a session. HistoryWindow
+rewrites the request contents before each model call:
+
+- The last keep_turns turns (a turn starts with a user message) are sent
+  verbatim, including the tool results of the turn in progress.
+- In older turns, tool results are replaced with short stubs; the calls
+  themselves are kept so the model still sees what was looked up.
+- When the history is over token_budget, the oldest turns are folded into a
+  rolling summary, down to FOLD_TARGET of the budget so that folding happens
+  every few turns rather than on every call. The summary is kept in session
+  state, capped at summary_tokens, and added to the system instruction.
+
+Summary lines are extractive (the user's request, the tools used and the
+start of the answer), so folding costs no extra model call. Folded turns
+are remembered by the invocation ID of their user message, so a question
+asked twice is folded (and summarized) twice.
+"""
+
+import threading
+
+from google.genai import types
+
+from config.settings import Settings
+from runtime.stats import estimate_tokens
+
+SUMMARY_KEY = "history_summary"
+FOLDED_KEY = "history_folded"
+
+# After folding, the history is brought down to this fraction of the budget.
+FOLD_TARGET = 0.6
+
+# IDs of folded turns kept in state; older ones have long left the session's
+# history window.
+MAX_FOLDED = 500
+
+# Characters kept from the request and the answer in a summary line.
+SUMMARY_REQUEST_CHARS = 160
+SUMMARY_ANSWER_CHARS = 240
+
+
+def split_turns(contents: list[types.Content]) -> list[list[types.Content]]:
+    """Group contents into turns, each starting at a user message (not a tool result)."""
+    turns: list[list[types.Content]] = []
+    for content in contents:
+        parts = content.parts or []
+        starts_turn = content.role == "user" and not any(p.function_response for p in parts)
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def turn_ids(events: list, count: int) -> list[str | None]:
+    """Invocation IDs of the session's last count turns, oldest first.
+
+    A turn is identified by its user message event; the request contents are
+    built from the same events, so the two line up from the end. Turns
+    without a matching event get None.
+    """
+    ids = [
+        event.invocation_id for event in events
+        if event.author == "user" and event.content and event.content.parts
+        and not event.get_function_responses()
+    ][-count:] if count else []
+    return [None] * (count - len(ids)) + ids
+
+
+def _text(content: types.Content) -> str:
+    return " ".join(p.text for p in content.parts or [] if p.text and not p.thought).strip()
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def summarize_turn(turn: list[types.Content]) -> str:
+    """One summary line: what was asked, which tools ran, how it was answered."""
+    request = _text(turn[0])
+    tools = [p.function_call.name for c in turn for p in c.parts or [] if p.function_call]
+    answers = [_text(c) for c in turn[1:] if c.role == "model" and _text(c)]
+    line = f"- User: {_clip(request, SUMMARY_REQUEST_CHARS)}"
+    if tools:
+        line += f" | tools: {', '.join(dict.fromkeys(tools))}"
+    if answers:
+        line += f" | answer: {_clip(answers[-1], SUMMARY_ANSWER_CHARS)}"
+    return line
+
+
+def _stub(response: types.FunctionResponse) -> types.FunctionResponse:
+    result = response.response or {}
+    stub = {"note": "Result omitted from history; call the tool again if needed."}
+    if isinstance(result, dict) and "status" in result:
+        stub = {"status": result["status"], **stub}
+    return types.FunctionResponse(id=response.id, name=response.name, response=stub)
+
+
+def stub_tool_results(turn: list[types.Content]) -> list[types.Content]:
+    """Return the turn with every tool result replaced by a stub (input untouched)."""
+    stubbed = []
+    for content in turn:
+        parts = content.parts or []
+        if not any(p.function_response for p in parts):
+            stubbed.append(content)
+            continue
+        stubbed.append(types.Content(role=content.role, parts=[
+            types.Part(function_response=_stub(p.function_response)) if p.function_response else p
+            for p in parts
+        ]))
+    return stubbed
+
+
+def _tokens(turns: list[list[types.Content]]) -> int:
+    return sum(estimate_tokens(content) for turn in turns for content in turn)
+
+
+class HistoryWindow:
+    """Bounds the history sent with each model request."""
+
+    def __init__(self, keep_turns: int = 6, token_budget: int = 6000,
+                 summary_tokens: int = 800):
+        self.keep_turns = max(keep_turns, 1)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+
+    def apply(self, contents: list[types.Content], state: dict,
+              ids: list[str | None] | None = None) -> tuple[list[types.Content], dict]:
+        """Return the contents to send and the state updates to record.
+
+        state holds the rolling summary and folded-turn IDs from earlier
+        calls; only changed keys are returned. ids has one ID per turn of
+        contents (see turn_ids); a turn without one is keyed by its position,
+        which is stable while the history only grows.
+        """
+        turns = split_turns(contents)
+        ids = ids or [None] * len(turns)
+        keys = [key or f"#{i}" for i, key in enumerate(ids)]
+        older, recent = turns[:-self.keep_turns], turns[-self.keep_turns:]
+        folded = list(state.get(FOLDED_KEY, []))
+        summary = list(state.get(SUMMARY_KEY, []))
+        already_folded = set(folded)
+
+        # Older turns as (key, turn, stubbed turn); turns folded by an earlier
+        # call stay folded.
+        kept = [
+            (key, turn, stub_tool_results(turn))
+            for key, turn in zip(keys, older)
+            if key not in already_folded
+        ]
+
+        target = int(self.token_budget * FOLD_TARGET)
+        if _tokens([stub for _, _, stub in kept] + recent) > self.token_budget:
+            while kept and _tokens([stub for _, _, stub in kept] + recent) > target:
+                key, turn, _ = kept.pop(0)
+                folded.append(key)
+                summary.append(summarize_turn(turn))
+
+        updates = {}
+        if len(folded) != len(state.get(FOLDED_KEY, [])):
+            while summary and estimate_tokens("\n".join(summary)) > self.summary_tokens:
+                summary.pop(0)
+            updates = {SUMMARY_KEY: summary, FOLDED_KEY: folded[-MAX_FOLDED:]}
+
+        window = [content for _, _, stub in kept for content in stub]
+        window += [content for turn in recent for content in turn]
+        return window, updates
+
+
+def summary_instruction(summary: list[str]) -> str:
+    return "Summary of the earlier conversation (oldest first):\n" + "\n".join(summary)
+
+
+_window: HistoryWindow | None = None
+_window_lock = threading.Lock()
+
+
+def get_history_window() -> HistoryWindow | None:
+    """Return the shared HistoryWindow, or None when disabled in Settings."""
+    global _window
+    with _window_lock:
+        if _window is None:
+            settings = Settings()
+            if not settings.history_enabled:
+                return None
+            _window = HistoryWindow(
+                keep_turns=settings.history_keep_turns,
+                token_budget=settings.history_token_budget,
+                summary_tokens=settings.history_summary_tokens,
+            )
+        return _window
+
+
+def window_history(callback_context, llm_request) -> None:
+    """before_model_callback that trims and summarizes the request history."""
+    window = get_history_window()
+    if window is None:
+        return None
+    state = callback_context.state
+    contents, updates = window.apply(
+        llm_request.contents,
+        {key: state.get(key, []) for key in (SUMMARY_KEY, FOLDED_KEY)},
+        turn_ids(callback_context.session.events, len(split_turns(llm_request.contents))),
+    )
+    for key, value in updates.items():
+        state[key] = value
+    llm_request.contents = contents
+    summary = state.get(SUMMARY_KEY)
+    if summary:
+        llm_request.append_instructions([summary_instruction(summary)])
+    return None
@@ -0,0 +1,362 @@
+"""
+Model Routing
+
+Most turns are simple lookups ("what's on my calendar today?") that a
+small, fast model dispatches to the right tool as well as a large one.
+ModelRouter sends each turn to one of two tiers configured in Settings:
+
+- fast (Settings.fast_model_name): single lookups and single actions
+- capable (Settings.model_name): planning, i.e. requests that span several
+  services or steps, conflicts and free slots, rescheduling, summaries and
+  long messages
+
+classify_query() decides with heuristics on the user's message; a short
+follow-up such as "yes, go ahead" stays on the tier of the session's
+previous turn. The tier holds for the whole turn. RoutingLlm is the
+agent's model and forwards each request to the tier's model. When the fast
+tier fails (it raises, answers with an error or nothing, calls a tool that
+does not exist or leaves out required arguments) the same request is sent
+to the capable tier, which then keeps the rest of the turn. The fast
+tier's answer is held back until it has been checked, so only
+capable-tier answers stream.
+
+Per tier the router counts turns, model calls, failures, latency, tokens
+and cost (Settings prices in USD per million tokens). Tokens come from the
+model's usage metadata, or are estimated at ~4 characters per token.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from opentelemetry import trace
+from pydantic import PrivateAttr
+
+from config.settings import Settings
+from runtime.stats import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+CAPABLE = "capable"
+
+# Session state: the previous turn's tier (kept) and this turn's (temp:).
+LAST_TIER_KEY = "model_tier"
+TURN_TIER_KEY = "temp:model_tier"
+
+# Messages longer than this are treated as planning.
+MAX_FAST_WORDS = 40
+# Messages this short without a service word are follow-ups.
+FOLLOW_UP_WORDS = 6
+
+# Latency samples kept per tier for percentiles.
+LATENCY_SAMPLES = 1000
+
+_SERVICES = {
+    "calendar": re.compile(r"\b(calendar|meetings?|events?|appointments?|agenda|busy|free)\b"),
+    "tasks": re.compile(r"\b(tasks?|to-?dos?|overdue|due)\b"),
+    "github": re.compile(r"\b(github|repos?|repository|issues?|pull requests?|prs?|commits?)\b"),
+}
+_PLANNING = re.compile(
+    r"\b(plan|planning|prioriti[sz]e|organi[sz]e|reschedul\w*|move|conflicts?|free slots?|"
+    r"find (a )?time|availability|compare|summari[sz]e|digest|overview|draft|suggest|"
+    r"recommend|optimi[sz]e|best|why|then|after that|if|unless|every|each)\b"
+)
+
+
+def classify_query(text: str) -> tuple[str, str]:
+    """Pick a tier for a user message; returns (tier, reason)."""
+    lowered = text.lower()
+    words = len(lowered.split())
+    services = [name for name, pattern in _SERVICES.items() if pattern.search(lowered)]
+    if words > MAX_FAST_WORDS:
+        return CAPABLE, "long request"
+    if len(services) > 1:
+        return CAPABLE, "spans " + " and ".join(services)
+    planning = _PLANNING.search(lowered)
+    if planning:
+        return CAPABLE, f"planning ({planning.group(0)})"
+    if lowered.count("?") > 1:
+        return CAPABLE, "several questions"
+    return FAST, "single lookup or action"
+
+
+def _required_args(tool: Any) -> list[str]:
+    declaration = tool._get_declaration() if hasattr(tool, "_get_declaration") else None
+    if declaration is None:
+        return []
+    if declaration.parameters is not None:
+        return list(declaration.parameters.required or [])
+    schema = declaration.parameters_json_schema
+    return list(schema.get("required", [])) if isinstance(schema, dict) else []
+
+
+def check_response(llm_request: LlmRequest, responses: list[LlmResponse]) -> str | None:
+    """Why a tier's answer is unusable (None if it is fine)."""
+    final = [r for r in responses if not r.partial]
+    for response in final:
+        if response.error_code:
+            return f"model error {response.error_code}"
+    has_text = False
+    for response in final:
+        for part in (response.content.parts if response.content else None) or []:
+            has_text = has_text or bool(part.text and not part.thought)
+            call = part.function_call
+            if call is None:
+                continue
+            tool = llm_request.tools_dict.get(call.name)
+            if tool is None:
+                return f"unknown tool {call.name!r}"
+            missing = [name for name in _required_args(tool) if name not in (call.args or {})]
+            if missing:
+                return f"{call.name} called without {', '.join(missing)}"
+            has_text = True
+    return None if has_text else "empty response"
+
+
+@dataclass
+class TierStats:
+    """Counters for one tier."""
+
+    model: str
+    turns: int = 0
+    calls: int = 0
+    failures: int = 0
+    escalations: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+
+class ModelRouter:
+    """Chooses a tier per turn and keeps latency, token and cost numbers per tier.
+
+    fast and capable are model names (resolved through ADK's model
+    registry) or BaseLlm instances.
+    """
+
+    def __init__(self, fast: str | BaseLlm, capable: str | BaseLlm,
+                 prices: dict[str, tuple[float, float]] | None = None):
+        self._models = {FAST: fast, CAPABLE: capable}
+        self._llms: dict[str, BaseLlm] = {}
+        self.prices = prices or {}
+        self._lock = threading.Lock()
+        self._stats = {tier: TierStats(self.model_name(tier)) for tier in self._models}
+
+    @classmethod
+    def from_settings(cls, settings: Settings | None = None) -> "ModelRouter":
+        settings = settings or Settings()
+        return cls(
+            settings.fast_model_name,
+            settings.model_name,
+            prices={
+                FAST: (settings.fast_model_input_price, settings.fast_model_output_price),
+                CAPABLE: (settings.model_input_price, settings.model_output_price),
+            },
+        )
+
+    def model_name(self, tier: str) -> str:
+        model = self._models[tier]
+        return model if isinstance(model, str) else model.model
+
+    def tier_of(self, model_name: str | None) -> str:
+        """The tier a request's model name belongs to (capable if unknown)."""
+        return FAST if model_name == self.model_name(FAST) else CAPABLE
+
+    def llm(self, tier: str) -> BaseLlm:
+        with self._lock:
+            if tier not in self._llms:
+                model = self._models[tier]
+                self._llms[tier] = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+            return self._llms[tier]
+
+    def model(self) -> "RoutingLlm":
+        """The model to give the agent."""
+        return RoutingLlm(model=self.model_name(CAPABLE), router=self)
+
+    # -- agent callbacks -----------------------------------------------------
+
+    async def before_model(self, callback_context, llm_request: LlmRequest):
+        """Agent before_model_callback: send the request to this turn's tier."""
+        state = callback_context.state
+        tier = state.get(TURN_TIER_KEY)
+        if tier is None:
+            tier, reason = self._choose(callback_context)
+            state[TURN_TIER_KEY] = tier
+            state[LAST_TIER_KEY] = tier
+            with self._lock:
+                self._stats[tier].turns += 1
+            logger.debug("Turn %s routed to %s tier: %s",
+                         callback_context.invocation_id, tier, reason)
+        llm_request.model = self.model_name(tier)
+        return None
+
+    async def after_model(self, callback_context, llm_response: LlmResponse):
+        """Agent after_model_callback: keep an escalated turn on the capable tier."""
+        if (llm_response.custom_metadata or {}).get("escalated"):
+            callback_context.state[TURN_TIER_KEY] = CAPABLE
+            callback_context.state[LAST_TIER_KEY] = CAPABLE
+        return None
+
+    def _choose(self, callback_context) -> tuple[str, str]:
+        content = callback_context.user_content
+        text = " ".join(p.text for p in (content.parts if content else None) or [] if p.text)
+        tier, reason = classify_query(text)
+        previous = callback_context.state.get(LAST_TIER_KEY)
+        lowered = text.lower()
+        is_follow_up = (len(lowered.split()) <= FOLLOW_UP_WORDS
+                        and not any(p.search(lowered) for p in _SERVICES.values()))
+        if previous in self._models and is_follow_up:
+            return previous, "follow-up"
+        return tier, reason
+
+    # -- accounting ----------------------------------------------------------
+
+    def record(self, tier: str, seconds: float, llm_request: LlmRequest,
+               responses: list[LlmResponse], failed: bool = False,
+               escalated: bool = False) -> None:
+        usage = next((r.usage_metadata for r in reversed(responses) if r.usage_metadata), None)
+        if usage is not None and usage.prompt_token_count is not None:
+            prompt = usage.prompt_token_count
+            output = usage.candidates_token_count or 0
+        else:
+            prompt = sum(estimate_tokens(c) for c in llm_request.contents)
+            output = sum(estimate_tokens(r.content) for r in responses if not r.partial)
+        with self._lock:
+            stats = self._stats[tier]
+            stats.calls += 1
+            stats.failures += failed
+            stats.escalations += escalated
+            stats.prompt_tokens += prompt
+            stats.output_tokens += output
+            stats.seconds += seconds
+            stats.latencies.append(seconds)
+
+    def stats(self) -> dict:
+        """Per tier: model, turns, calls, failures, escalations, latency, tokens and cost."""
+        result = {}
+        with self._lock:
+            for tier, stats in self._stats.items():
+                latencies = sorted(stats.latencies)
+                input_price, output_price = self.prices.get(tier, (0.0, 0.0))
+                cost = (stats.prompt_tokens * input_price
+                        + stats.output_tokens * output_price) / 1_000_000
+                result[tier] = {
+                    "model": stats.model,
+                    "turns": stats.turns,
+                    "calls": stats.calls,
+                    "failures": stats.failures,
+                    "escalations": stats.escalations,
+                    "mean_s": round(stats.seconds / stats.calls, 3) if stats.calls else None,
+                    "p95_s": round(latencies[min(int(0.95 * len(latencies)),
+                                                 len(latencies) - 1)], 3) if latencies else None,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cost_usd": round(cost, 6),
+                }
+        return result
+
+
+class RoutingLlm(BaseLlm):
+    """Forwards requests to the model of the tier the router chose, escalating failures."""
+
+    _router: ModelRouter = PrivateAttr()
+
+    def __init__(self, *, model: str, router: ModelRouter):
+        super().__init__(model=model)
+        self._router = router
+
+    @property
+    def capabilities(self):
+        return self._router.llm(CAPABLE).capabilities
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        router = self._router
+        span = trace.get_current_span()
+        escalated = False
+        if router.tier_of(llm_request.model) == FAST:
+            responses, problem = [], None
+            start = time.perf_counter()
+            try:
+                async for response in router.llm(FAST).generate_content_async(llm_request, stream):
+                    responses.append(response)
+            except Exception as e:
+                problem = f"{type(e).__name__}: {e}"
+            problem = problem or check_response(llm_request, responses)
+            router.record(FAST, time.perf_counter() - start, llm_request, responses,
+                          failed=problem is not None, escalated=problem is not None)
+            if problem is None:
+                if span.is_recording():
+                    span.set_attribute("llm.tier", FAST)
+                for response in responses:
+                    yield _tagged(response, FAST)
+                return
+            logger.info("Fast tier failed (%s); escalating to the capable tier", problem)
+            if span.is_recording():
+                span.set_attribute("llm.escalated", problem)
+            escalated = True
+
+        llm_request.model = router.model_name(CAPABLE)
+        if span.is_recording():
+            span.set_attribute("llm.tier", CAPABLE)
+        responses = []
+        start = time.perf_counter()
+        try:
+            async for response in router.llm(CAPABLE).generate_content_async(llm_request, stream):
+                responses.append(response)
+                yield _tagged(response, CAPABLE, escalated)
+        except Exception:
+            router.record(CAPABLE, time.perf_counter() - start, llm_request, responses,
+                          failed=True)
+            raise
+        router.record(CAPABLE, time.perf_counter() - start, llm_request, responses)
+
+
+def _tagged(response: LlmResponse, tier: str, escalated: bool = False) -> LlmResponse:
+    metadata = {**(response.custom_metadata or {}), "model_tier": tier}
+    if escalated:
+        metadata["escalated"] = True
+    response.custom_metadata = metadata
+    return response
+
+
+_router: ModelRouter | None = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter | None:
+    """Return the process-wide ModelRouter, or None when routing is off in Settings."""
+    global _router
+    settings = Settings()
+    if not settings.model_routing_enabled or settings.fast_model_name in (None, settings.model_name):
+        return None
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter.from_settings(settings)
+        return _router
+
+
+def routing_table(stats: dict):
+    """Rich table of ModelRouter.stats()."""
+    from rich.table import Table
+
+    table = Table(title="Model tiers", title_justify="left")
+    columns = ["model", "turns", "calls", "failures", "escalations", "mean_s", "p95_s",
+               "prompt_tokens", "output_tokens", "cost_usd"]
+    table.add_column("tier", style="dim")
+    for column in columns:
+        table.add_column(column.replace("_", " "), justify="left" if column == "model" else "right")
+    for tier, row in stats.items():
+        table.add_row(tier, *("-" if row[c] is None else str(row[c]) for c in columns))
+    return table
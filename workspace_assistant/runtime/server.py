@@ -0,0 +1,370 @@
+"""
+Multi-User HTTP Server
+
+An ASGI app (Starlette) that serves the assistant to many users at once:
+
+    POST /v1/chat          {"message": ..., "session_id": ...} -> {"answer": ...}
+    PUT  /v1/credentials   the user's Google token.json contents
+    GET  /healthz          queue, worker, runner, API quota and model tier statistics
+
+Callers identify the user with an X-User-Id header; when SERVER_API_KEY is
+set, requests must also carry it as a bearer token, so the server is meant
+to sit behind a front end that authenticates users. Without a key the server
+only listens on a loopback address and does not accept credentials, since
+any caller could otherwise overwrite another user's Google token. Each user's Google
+credentials and Calendar mirror are kept apart (see tools/auth.py); GitHub
+goes through the server's shared MCP connection.
+
+Turns are queued and run by a fixed number of worker tasks over a small
+pool of runners that share the session service. Admission control rejects
+work instead of letting latency grow without bound: 503 when the queue is
+full or a turn waited too long for a worker, 429 when a user already has
+SERVER_USER_CONCURRENCY turns in flight, and 409 when the same session is
+still answering the previous message.
+
+Usage: python -m runtime.server [--host 127.0.0.1] [--port 8000] [--workers N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hmac
+import ipaddress
+import itertools
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from config.settings import Settings
+from tools.auth import current_user, get_service_pool, is_valid_user_id, save_user_token
+from tools.quota import get_quota_scheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION = "default"
+MAX_MESSAGE_CHARS = 8000
+
+# Latencies kept for the /healthz percentiles.
+LATENCY_WINDOW = 1000
+
+
+class Rejected(Exception):
+    """A request turned away by admission control."""
+
+    def __init__(self, status: int, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Job:
+    user_id: str
+    session_id: str
+    message: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+async def run_turn(runner, user_id: str, session_id: str, message: str) -> dict:
+    """Answer one message, through the answer cache when it applies."""
+    from google.genai import types
+
+    from runtime.answer_cache import get_answer_cache, record_cached_turn
+
+    cache = get_answer_cache()
+    key = await asyncio.to_thread(cache.key, user_id, message) if cache else None
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        await record_cached_turn(runner, user_id, session_id, message, cached)
+        return {"answer": cached, "cached": True, "tools": []}
+
+    answer, tool_names = "", []
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+    ):
+        tool_names += [call.name for call in event.get_function_calls()]
+        if event.content and event.content.parts and not event.partial:
+            answer += "".join(p.text for p in event.content.parts if p.text and not p.thought)
+    if cache and answer:
+        cache.put(key, user_id, answer, tool_names)
+    return {"answer": answer or "(No response)", "cached": False, "tools": tool_names}
+
+
+class AgentServer:
+    """Bounded queue of turns served by worker tasks over a pool of runners."""
+
+    def __init__(self, runner_factory: Callable[[], Any], runners: int = 2,
+                 concurrency: int = 8, queue_size: int = 64, user_concurrency: int = 2,
+                 queue_timeout: float = 30.0, turn_timeout: float = 120.0):
+        self.runner_factory = runner_factory
+        self.runner_count = max(runners, 1)
+        self.concurrency = max(concurrency, 1)
+        self.queue_size = queue_size
+        self.user_concurrency = user_concurrency
+        self.queue_timeout = queue_timeout
+        self.turn_timeout = turn_timeout
+        self._runners: list = []
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._user_load: dict[str, int] = {}
+        self._busy_sessions: set[tuple[str, str]] = set()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {"accepted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    @classmethod
+    def from_settings(cls, runner_factory: Callable[[], Any] | None = None) -> "AgentServer":
+        if runner_factory is None:
+            from main import create_runner
+
+            runner_factory = create_runner
+        settings = Settings()
+        return cls(
+            runner_factory,
+            runners=settings.server_runners,
+            concurrency=settings.server_concurrency,
+            queue_size=settings.server_queue_size,
+            user_concurrency=settings.server_user_concurrency,
+            queue_timeout=settings.server_queue_timeout,
+            turn_timeout=settings.server_turn_timeout,
+        )
+
+    async def start(self) -> None:
+        # Building a runner loads the agent and its tools; keep it off the loop.
+        self._runners = list(await asyncio.gather(
+            *(asyncio.to_thread(self.runner_factory) for _ in range(self.runner_count))
+        ))
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        runners = itertools.cycle(self._runners)
+        self._workers = [
+            asyncio.create_task(self._work(next(runners)), name=f"turn-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_exception(Rejected(503, "Server is shutting down"))
+
+    def _reject(self, status: int, message: str, retry_after: float | None = None) -> Rejected:
+        self._counts["rejected"] += 1
+        return Rejected(status, message, retry_after)
+
+    async def submit(self, user_id: str, session_id: str, message: str) -> dict:
+        """Queue a turn and wait for its result; raises Rejected on overload."""
+        if self._queue is None:
+            raise Rejected(503, "Server is not running")
+        session = (user_id, session_id)
+        if session in self._busy_sessions:
+            raise self._reject(409, "This session is still answering the previous message")
+        if self._user_load.get(user_id, 0) >= self.user_concurrency:
+            raise self._reject(429, "Too many requests in flight for this user", retry_after=1)
+        if self._queue.full():
+            raise self._reject(503, "Server is busy", retry_after=self._retry_after())
+
+        job = _Job(user_id, session_id, message, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(job)
+        self._counts["accepted"] += 1
+        self._busy_sessions.add(session)
+        self._user_load[user_id] = self._user_load.get(user_id, 0) + 1
+        try:
+            return await job.future
+        finally:
+            self._busy_sessions.discard(session)
+            self._user_load[user_id] -= 1
+            if not self._user_load[user_id]:
+                del self._user_load[user_id]
+
+    def _retry_after(self) -> float:
+        """Rough time until a queue slot frees up, from recent turn latencies."""
+        if not self._latencies:
+            return 1.0
+        mean = statistics.fmean(self._latencies)
+        return round(max(1.0, mean * self.queue_size / self.concurrency), 1)
+
+    async def _work(self, runner) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.future.done():
+                continue
+            if time.monotonic() - job.enqueued_at > self.queue_timeout:
+                self._counts["rejected"] += 1
+                job.future.set_exception(Rejected(503, "Timed out waiting for a worker", 1))
+                continue
+            token = current_user.set(job.user_id)
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    run_turn(runner, job.user_id, job.session_id, job.message),
+                    self.turn_timeout,
+                )
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                self._counts["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self._counts["completed"] += 1
+                self._latencies.append(time.monotonic() - job.enqueued_at)
+                if not job.future.done():
+                    job.future.set_result(result | {"turn_s": round(time.monotonic() - start, 3)})
+            finally:
+                current_user.reset(token)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(q: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(int(q * len(latencies)), len(latencies) - 1)], 3)
+
+        return {
+            **self._counts,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "workers": len(self._workers),
+            "runners": len(self._runners),
+            "users_in_flight": len(self._user_load),
+            "p50_s": percentile(0.5),
+            "p99_s": percentile(0.99),
+        }
+
+
+def _error(status: int, message: str, retry_after: float | None = None) -> JSONResponse:
+    headers = {"Retry-After": str(int(retry_after + 0.999))} if retry_after else None
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+def create_app(server: AgentServer | None = None, api_key: str | None = None) -> Starlette:
+    """Build the ASGI app; with no arguments, configure everything from Settings."""
+    if server is None:
+        server = AgentServer.from_settings()
+        api_key = Settings().server_api_key
+
+    def authenticate(request: Request) -> str | JSONResponse:
+        if api_key:
+            supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(supplied.encode(), api_key.encode()):
+                return _error(401, "Invalid or missing API key")
+        user_id = request.headers.get("x-user-id", "")
+        if not is_valid_user_id(user_id):
+            return _error(401, "Missing or invalid X-User-Id header")
+        return user_id
+
+    async def chat(request: Request) -> Response:
+        user_id = authenticate(request)
+        if isinstance(user_id, JSONResponse):
+            return user_id
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "Body must be JSON")
+        message = body.get("message") if isinstance(body, dict) else None
+        session_id = str(body.get("session_id") or DEFAULT_SESSION) if message else ""
+        if not isinstance(message, str) or not message.strip():
+            return _error(400, "'message' is required")
+        if len(message) > MAX_MESSAGE_CHARS or len(session_id) > 128:
+            return _error(413, "Message or session ID too long")
+        try:
+            result = await server.submit(user_id, session_id, message)
+        except Rejected as e:
+            return _error(e.status, str(e), e.retry_after)
+        except asyncio.TimeoutError:
+            return _error(504, "The turn took too long")
+        except PermissionError as e:
+            return _error(403, str(e))
+        except Exception:
+            logger.exception("Turn failed for user %s", user_id)
+            return _error(500, "The assistant failed to answer")
+        return JSONResponse({"session_id": session_id, **result})
+
+    async def credentials(request: Request) -> Response:
+        if not api_key:
+            return _error(403, "Storing credentials requires SERVER_API_KEY")
+        user_id = authenticate(request)
+        if isinstance(user_id, JSONResponse):
+            return user_id
+        try:
+            await asyncio.to_thread(save_user_token, user_id, await request.json())
+        except (ValueError, TypeError, AttributeError) as e:
+            return _error(400, f"Not an authorized-user token: {e}")
+        get_service_pool().forget_user(user_id)
+        return Response(status_code=204)
+
+    async def healthz(request: Request) -> Response:
+        from runtime.routing import get_model_router
+
+        router = get_model_router()
+        return JSONResponse({
+            **server.stats(),
+            "quota": get_quota_scheduler().snapshot(),
+            "models": router.stats() if router else None,
+        })
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await server.start()
+        try:
+            yield
+        finally:
+            await server.stop()
+
+    app = Starlette(
+        routes=[
+            Route("/v1/chat", chat, methods=["POST"]),
+            Route("/v1/credentials", credentials, methods=["PUT"]),
+            Route("/healthz", healthz, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.server = server
+    return app
+
+
+def is_loopback(host: str) -> bool:
+    """True for hosts only reachable from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    import uvicorn
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Workspace Assistant HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.server_processes,
+                        help="Server processes (each with its own queue and runners)")
+    args = parser.parse_args()
+    if not settings.server_api_key and not is_loopback(args.host):
+        # X-User-Id alone would let any caller act as any user.
+        parser.error(f"--host {args.host} is reachable from other machines; set SERVER_API_KEY")
+    uvicorn.run("runtime.server:create_app", factory=True, host=args.host,
+                port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Persistent Sessions
+
+SqliteSessionService is an ADK session service backed by a single SQLite
+database in WAL mode, so conversations survive restarts and one process can
+serve many user/session IDs without keeping their history in memory.
+
+- Events are stored as zlib-compressed JSON, typically 3-5x smaller than the
+  raw event.
+- get_session() loads only the most recent history_events events (cut back
+  to the start of a user turn); older events stay on disk and can be paged
+  in with older_events().
+- Each session keeps at most max_events events, and sessions idle for longer
+  than retention_days are deleted: at start-up and then at most once per
+  PURGE_INTERVAL, when a session is read or created.
+
+App-, user- and session-scoped state ('app:' / 'user:' prefixes) is stored
+separately and merged on read, as in ADK's own session services.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events.event import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from config.settings import Settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_update ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+SESSION_KEY = "app_name = ? AND user_id = ? AND session_id = ?"
+APP_KEY = ("app_name",)
+USER_KEY = ("app_name", "user_id")
+
+# Seconds between purges of expired sessions in a long-running process.
+PURGE_INTERVAL = 3600.0
+
+
+def encode_event(event: Event) -> bytes:
+    return zlib.compress(event.model_dump_json(exclude_none=True).encode())
+
+
+def decode_event(data: bytes) -> Event:
+    return Event.model_validate_json(zlib.decompress(data))
+
+
+def _split_delta(delta: dict[str, Any]) -> tuple[dict, dict, dict]:
+    """Split a state delta into app, user and session parts (prefixes removed)."""
+    app, user, session = {}, {}, {}
+    for key, value in delta.items():
+        if key.startswith(State.APP_PREFIX):
+            app[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _turn_starts(events: list[Event]) -> list[int]:
+    """Indexes of the user messages (not tool results) that start a turn."""
+    return [i for i, event in enumerate(events)
+            if event.author == "user" and not event.get_function_responses()]
+
+
+def _start_of_turn(events: list[Event]) -> list[Event]:
+    """Drop leading events until the first user message, so a cut-off window
+    never starts with an orphaned tool call or tool result ([] without one)."""
+    starts = _turn_starts(events)
+    return events[starts[0]:] if starts else []
+
+
+class SqliteSessionService(BaseSessionService):
+    """ADK session service storing sessions and compressed events in SQLite."""
+
+    def __init__(self, path: Path | str, history_events: int = 200,
+                 max_events: int = 2000, retention_days: float = 30.0):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        # WAL lets readers proceed while a turn is being written; NORMAL
+        # sync is durable across application crashes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.history_events = history_events
+        self.max_events = max_events
+        self.retention_days = retention_days
+        self._next_purge = 0.0
+        self._purge_if_due()
+
+    # -- state ---------------------------------------------------------------
+
+    def _load_state(self, table: str, key_columns: tuple[str, ...], key: tuple) -> dict:
+        where = " AND ".join(f"{column} = ?" for column in key_columns)
+        row = self._conn.execute(f"SELECT state FROM {table} WHERE {where}", key).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _merge_into(self, table: str, key_columns: tuple[str, ...], key: tuple,
+                    delta: dict) -> None:
+        state = self._load_state(table, key_columns, key) | delta
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(key_columns)}, state) "
+            f"VALUES ({', '.join('?' * len(key_columns))}, ?)",
+            (*key, json.dumps(state, default=str)),
+        )
+
+    def _merged_state(self, app_name: str, user_id: str, session_state: dict) -> dict:
+        state = dict(session_state)
+        app = self._load_state("app_states", APP_KEY, (app_name,))
+        user = self._load_state("user_states", USER_KEY, (app_name, user_id))
+        state.update({State.APP_PREFIX + key: value for key, value in app.items()})
+        state.update({State.USER_PREFIX + key: value for key, value in user.items()})
+        return state
+
+    # -- sessions ------------------------------------------------------------
+
+    def _create(self, app_name: str, user_id: str, state: dict | None,
+                session_id: str | None) -> Session:
+        self._purge_if_due()
+        session_id = (session_id or "").strip() or uuid.uuid4().hex
+        app, user, session = _split_delta(state or {})
+        now = time.time()
+        with self._lock, self._conn:
+            try:
+                self._conn.execute(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(session, default=str), now, now),
+                )
+            except sqlite3.IntegrityError:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            if app:
+                self._merge_into("app_states", APP_KEY, (app_name,), app)
+            if user:
+                self._merge_into("user_states", USER_KEY, (app_name, user_id), user)
+            merged = self._merged_state(app_name, user_id, session)
+        return Session(app_name=app_name, user_id=user_id, id=session_id,
+                       state=merged, events=[], last_update_time=now)
+
+    def _get(self, app_name: str, user_id: str, session_id: str,
+             config: GetSessionConfig | None) -> Session | None:
+        self._purge_if_due()
+        limit = self.history_events
+        after = None
+        if config is not None:
+            if config.num_recent_events is not None:
+                limit = config.num_recent_events
+            after = config.after_timestamp
+
+        query = f"SELECT seq, data FROM events WHERE {SESSION_KEY}"
+        params: list[Any] = [app_name, user_id, session_id]
+        if after:
+            query += " AND timestamp >= ?"
+            params.append(after)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT state, updated_at FROM sessions WHERE {SESSION_KEY}",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(query, params).fetchall() if limit else []
+            state = self._merged_state(app_name, user_id, json.loads(row[0]))
+
+        events = [decode_event(data) for _, data in reversed(rows)]
+        if len(rows) == limit and (config is None or config.num_recent_events is None):
+            if _turn_starts(events):
+                events = _start_of_turn(events)
+            else:
+                # One turn longer than the window: page back to its user message.
+                events = self._back_to_turn_start(
+                    (app_name, user_id, session_id), events, rows[-1][0], limit
+                )
+        return Session(app_name=app_name, user_id=user_id, id=session_id,
+                       state=state, events=events, last_update_time=row[1])
+
+    def _back_to_turn_start(self, key: tuple, events: list[Event], oldest_seq: int,
+                            page: int) -> list[Event]:
+        """Prepend older events, a page at a time, up to the latest turn start
+        before the window ([] if the session has none within max_events)."""
+        while len(events) < self.max_events:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT seq, data FROM events WHERE {SESSION_KEY} AND seq < ? "
+                    "ORDER BY seq DESC LIMIT ?",
+                    (*key, oldest_seq, page),
+                ).fetchall()
+            if not rows:
+                break
+            older = [decode_event(data) for _, data in reversed(rows)]
+            starts = _turn_starts(older)
+            if starts:
+                return older[starts[-1]:] + events
+            events = older + events
+            oldest_seq = rows[-1][0]
+        return []
+
+    def older_events(self, app_name: str, user_id: str, session_id: str,
+                     before: float, limit: int = 100) -> list[Event]:
+        """Return up to limit events older than the timestamp before, oldest first.
+
+        Used to page in history that get_session() left on disk.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM events WHERE {SESSION_KEY} AND timestamp < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (app_name, user_id, session_id, before, limit),
+            ).fetchall()
+        return [decode_event(data) for (data,) in reversed(rows)]
+
+    def _list(self, app_name: str, user_id: str | None) -> ListSessionsResponse:
+        query = "SELECT user_id, session_id, state, updated_at FROM sessions WHERE app_name = ?"
+        params: tuple = (app_name,)
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params += (user_id,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY updated_at", params).fetchall()
+            sessions = [
+                Session(app_name=app_name, user_id=user, id=session_id,
+                        state=self._merged_state(app_name, user, json.loads(state)),
+                        events=[], last_update_time=updated_at)
+                for user, session_id, state, updated_at in rows
+            ]
+        return ListSessionsResponse(sessions=sessions)
+
+    def _delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        params = (app_name, user_id, session_id)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM events WHERE {SESSION_KEY}", params)
+            self._conn.execute(f"DELETE FROM sessions WHERE {SESSION_KEY}", params)
+
+    def _append(self, session: Session, event: Event) -> None:
+        key = (session.app_name, session.user_id, session.id)
+        app, user, session_delta = _split_delta(
+            event.actions.state_delta if event.actions else {}
+        )
+        with self._lock, self._conn:
+            if self._conn.execute(f"SELECT 1 FROM sessions WHERE {SESSION_KEY}", key).fetchone() is None:
+                raise ValueError(f"Session {session.id} not found")
+            if app:
+                self._merge_into("app_states", APP_KEY, key[:1], app)
+            if user:
+                self._merge_into("user_states", USER_KEY, key[:2], user)
+            if session_delta:
+                self._merge_into_session(key, session_delta)
+            self._conn.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, event.timestamp, encode_event(event)),
+            )
+            self._conn.execute(
+                f"UPDATE sessions SET updated_at = ? WHERE {SESSION_KEY}", (event.timestamp, *key)
+            )
+            # Trim the session to its newest max_events events.
+            self._conn.execute(
+                f"DELETE FROM events WHERE {SESSION_KEY} AND seq <= ("
+                f"SELECT seq FROM events WHERE {SESSION_KEY} ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (*key, *key, self.max_events),
+            )
+        session.last_update_time = event.timestamp
+
+    def _merge_into_session(self, key: tuple, delta: dict) -> None:
+        row = self._conn.execute(f"SELECT state FROM sessions WHERE {SESSION_KEY}", key).fetchone()
+        state = json.loads(row[0]) | delta
+        self._conn.execute(
+            f"UPDATE sessions SET state = ? WHERE {SESSION_KEY}",
+            (json.dumps(state, default=str), *key),
+        )
+
+    def _purge_if_due(self) -> None:
+        now = time.monotonic()
+        if now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete sessions idle for longer than retention_days; returns how many."""
+        if not self.retention_days:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock, self._conn:
+            expired = self._conn.execute(
+                "SELECT app_name, user_id, session_id FROM sessions WHERE updated_at < ?",
+                (cutoff,),
+            ).fetchall()
+            for key in expired:
+                self._conn.execute(f"DELETE FROM events WHERE {SESSION_KEY}", key)
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+        return len(expired)
+
+    def event_count(self, app_name: str, user_id: str, session_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM events WHERE {SESSION_KEY}", (app_name, user_id, session_id)
+            ).fetchone()[0]
+
+    # -- BaseSessionService --------------------------------------------------
+    # SQLite calls are short but blocking, so they run off the event loop.
+
+    async def create_session(self, *, app_name: str, user_id: str,
+                             state: dict[str, Any] | None = None,
+                             session_id: str | None = None) -> Session:
+        return await asyncio.to_thread(self._create, app_name, user_id, state, session_id)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: GetSessionConfig | None = None) -> Session | None:
+        return await asyncio.to_thread(self._get, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str,
+                            user_id: str | None = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list, app_name, user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, app_name, user_id, session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict[str, Any]:
+        with self._lock:
+            return self._load_state("user_states", USER_KEY, (app_name, user_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+        await asyncio.to_thread(self._append, session, event)
+        return self._commit_event_to_session(session, event)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_service: BaseSessionService | None = None
+_service_lock = threading.Lock()
+
+
+def get_session_service() -> BaseSessionService:
+    """Return the shared session service selected by Settings.session_backend."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            settings = Settings()
+            if settings.session_backend == "memory":
+                _service = InMemorySessionService()
+            else:
+                _service = SqliteSessionService(
+                    settings.session_db_path,
+                    history_events=settings.session_history_events,
+                    max_events=settings.session_max_events,
+                    retention_days=settings.session_retention_days,
+                )
+        return _service
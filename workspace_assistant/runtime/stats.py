@@ -0,0 +1,273 @@
+"""
+Turn Statistics
+
+StatsPlugin is an ADK plugin that measures every user turn (one runner
+invocation): prompt and output tokens, the tokens spent on tool schemas per
+toolset, the tokens of tool results as returned and as fed back to the model
+(after compaction), wall time, model time and the time spent in each tool.
+Turns are appended to a JSONL file and can be rendered as tables, so context
+growth (e.g. with and without tool search) and latency regressions are
+visible.
+
+Prompt and output tokens come from the model's usage metadata when it reports
+them. Schema and tool-result sizes are estimated at ~4 characters per token.
+"""
+
+import json
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+CHARS_PER_TOKEN = 4
+
+# Turns kept in memory for the summary; the JSONL file keeps all of them.
+MAX_TURNS = 1000
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a string or JSON-serializable value."""
+    if value is None:
+        return 0
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json", exclude_none=True)
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def toolset_name(tool: Any) -> str:
+    """Group a tool under the toolset or module that provides it."""
+    while True:
+        server = getattr(tool, "_server", None)
+        if server is not None:
+            return f"mcp:{server.name}"
+        inner = getattr(tool, "_tool", None)
+        if inner is None:
+            break
+        tool = inner
+    func = getattr(tool, "func", None)
+    if func is not None:
+        return func.__module__.rsplit(".", 1)[-1]
+    return type(tool).__name__
+
+
+@dataclass
+class TurnStats:
+    """Measurements for one user turn."""
+
+    invocation_id: str
+    session_id: str
+    started_at: str
+    wall_s: float = 0.0
+    llm_calls: int = 0
+    llm_s: float = 0.0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    estimated: bool = False
+    schema_tokens: dict[str, int] = field(default_factory=dict)
+    tool_raw_tokens: int = 0
+    tool_result_tokens: int = 0
+    tool_calls: int = 0
+    tool_s: dict[str, float] = field(default_factory=dict)
+
+
+class StatsPlugin(BasePlugin):
+    """Records TurnStats for every invocation of the runner it is attached to."""
+
+    def __init__(self, path: Path | None = None, name: str = "turn_stats"):
+        super().__init__(name=name)
+        self.path = path
+        self.turns: deque[TurnStats] = deque(maxlen=MAX_TURNS)
+        self._active: dict[str, tuple[TurnStats, float]] = {}
+        self._model_calls: dict[str, dict] = {}
+        self._tool_starts: dict[str, float] = {}
+
+    # -- run -----------------------------------------------------------------
+
+    async def before_run_callback(self, *, invocation_context):
+        turn = TurnStats(
+            invocation_id=invocation_context.invocation_id,
+            session_id=invocation_context.session.id,
+            started_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        self._active[turn.invocation_id] = (turn, time.perf_counter())
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        entry = self._active.pop(invocation_context.invocation_id, None)
+        self._model_calls.pop(invocation_context.invocation_id, None)
+        if entry is None:
+            return
+        turn, start = entry
+        turn.wall_s = round(time.perf_counter() - start, 3)
+        turn.llm_s = round(turn.llm_s, 3)
+        turn.tool_s = {name: round(s, 3) for name, s in turn.tool_s.items()}
+        self.turns.append(turn)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(asdict(turn)) + "\n")
+
+    def _turn(self, context) -> TurnStats | None:
+        entry = self._active.get(context.invocation_id)
+        return entry[0] if entry else None
+
+    # -- model ---------------------------------------------------------------
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        turn = self._turn(callback_context)
+        if turn is None:
+            return None
+        turn.llm_calls += 1
+
+        schema_total = 0
+        for tool in llm_request.config.tools or []:
+            for declaration in getattr(tool, "function_declarations", None) or []:
+                group = toolset_name(llm_request.tools_dict.get(declaration.name))
+                tokens = estimate_tokens(declaration)
+                turn.schema_tokens[group] = turn.schema_tokens.get(group, 0) + tokens
+                schema_total += tokens
+
+        self._model_calls[turn.invocation_id] = {
+            "start": time.perf_counter(),
+            "usage": None,
+            "estimate": schema_total
+            + estimate_tokens(llm_request.config.system_instruction)
+            + sum(estimate_tokens(content) for content in llm_request.contents),
+        }
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        turn = self._turn(callback_context)
+        call = self._model_calls.get(callback_context.invocation_id)
+        if turn is None or call is None:
+            return None
+        if llm_response.usage_metadata is not None:
+            call["usage"] = llm_response.usage_metadata
+        if llm_response.partial:
+            return None
+
+        self._model_calls.pop(callback_context.invocation_id)
+        turn.llm_s += time.perf_counter() - call["start"]
+        usage = call["usage"]
+        if usage is not None and usage.prompt_token_count:
+            turn.prompt_tokens += usage.prompt_token_count
+            turn.output_tokens += usage.candidates_token_count or 0
+        else:
+            turn.estimated = True
+            turn.prompt_tokens += call["estimate"]
+            turn.output_tokens += estimate_tokens(llm_response.content)
+        return None
+
+    async def on_event_callback(self, *, invocation_context, event):
+        turn = self._turn(invocation_context)
+        if turn is not None:
+            for response in event.get_function_responses():
+                turn.tool_result_tokens += estimate_tokens(response.response)
+        return None
+
+    # -- tools ---------------------------------------------------------------
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._tool_starts[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    def _finish_tool(self, tool, tool_context, result) -> None:
+        start = self._tool_starts.pop(tool_context.function_call_id, None)
+        turn = self._turn(tool_context)
+        if turn is None or start is None:
+            return
+        turn.tool_calls += 1
+        turn.tool_s[tool.name] = turn.tool_s.get(tool.name, 0.0) + time.perf_counter() - start
+        # Plugins see the result before the agent's after_tool_callback compacts it.
+        turn.tool_raw_tokens += estimate_tokens(result)
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._finish_tool(tool, tool_context, result)
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._finish_tool(tool, tool_context, {"error": str(error)})
+        return None
+
+    # -- reporting -----------------------------------------------------------
+
+    def last(self) -> TurnStats | None:
+        return self.turns[-1] if self.turns else None
+
+    def summary(self) -> dict:
+        """Totals and per-turn means over the recorded turns."""
+        turns = list(self.turns)
+        if not turns:
+            return {"turns": 0}
+        n = len(turns)
+        schema: dict[str, int] = {}
+        tools: dict[str, float] = {}
+        for turn in turns:
+            for group, tokens in turn.schema_tokens.items():
+                schema[group] = schema.get(group, 0) + tokens
+            for name, seconds in turn.tool_s.items():
+                tools[name] = tools.get(name, 0.0) + seconds
+        return {
+            "turns": n,
+            "prompt_tokens": sum(t.prompt_tokens for t in turns),
+            "output_tokens": sum(t.output_tokens for t in turns),
+            "schema_tokens": schema,
+            "tool_raw_tokens": sum(t.tool_raw_tokens for t in turns),
+            "tool_result_tokens": sum(t.tool_result_tokens for t in turns),
+            "tool_calls": sum(t.tool_calls for t in turns),
+            "mean_wall_s": round(sum(t.wall_s for t in turns) / n, 3),
+            "max_wall_s": max(t.wall_s for t in turns),
+            "mean_llm_s": round(sum(t.llm_s for t in turns) / n, 3),
+            "tool_s": {name: round(s, 3) for name, s in tools.items()},
+        }
+
+
+def _table(title: str, rows: list[tuple[str, Any]]):
+    from rich.table import Table
+
+    table = Table(title=title, show_header=False, title_justify="left")
+    table.add_column(style="dim")
+    table.add_column(justify="right")
+    for label, value in rows:
+        table.add_row(label, str(value))
+    return table
+
+
+def turn_table(turn: TurnStats):
+    """Rich table for one turn."""
+    approx = " (est.)" if turn.estimated else ""
+    rows = [
+        ("wall time", f"{turn.wall_s:.2f}s"),
+        ("model time", f"{turn.llm_s:.2f}s over {turn.llm_calls} call(s)"),
+        ("prompt tokens" + approx, turn.prompt_tokens),
+        ("output tokens" + approx, turn.output_tokens),
+        ("tool result tokens (raw)", turn.tool_raw_tokens),
+        ("tool result tokens (sent)", turn.tool_result_tokens),
+    ]
+    rows += [(f"schema tokens: {g}", t) for g, t in sorted(turn.schema_tokens.items())]
+    rows += [(f"tool time: {n}", f"{s:.2f}s") for n, s in sorted(turn.tool_s.items())]
+    return _table("Turn stats", rows)
+
+
+def summary_table(summary: dict):
+    """Rich table for StatsPlugin.summary()."""
+    if not summary.get("turns"):
+        return _table("Session stats", [("turns", 0)])
+    rows = [
+        ("turns", summary["turns"]),
+        ("prompt tokens", summary["prompt_tokens"]),
+        ("output tokens", summary["output_tokens"]),
+        ("tool result tokens (raw)", summary["tool_raw_tokens"]),
+        ("tool result tokens (sent)", summary["tool_result_tokens"]),
+        ("tool calls", summary["tool_calls"]),
+        ("mean / max wall time", f"{summary['mean_wall_s']:.2f}s / {summary['max_wall_s']:.2f}s"),
+        ("mean model time", f"{summary['mean_llm_s']:.2f}s"),
+    ]
+    rows += [(f"schema tokens: {g}", t) for g, t in sorted(summary["schema_tokens"].items())]
+    rows += [(f"tool time: {n}", f"{s:.2f}s") for n, s in sorted(summary["tool_s"].items())]
+    return _table("Session stats", rows)
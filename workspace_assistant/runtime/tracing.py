@@ -0,0 +1,149 @@
+"""
+Tracing
+
+Shows where a slow turn spent its time. ADK opens spans for each turn
+('invocation'), model call ('call_llm') and tool call ('execute_tool
+<name>') on the global OpenTelemetry tracer provider, and tools/tracing.py
+adds spans under them for Google API requests, MCP requests and credential
+refreshes. setup_tracing() installs that provider:
+
+- finished spans are appended to Settings.trace_path as JSONL and, when
+  Settings.trace_otlp_endpoint is set, exported over OTLP/HTTP
+- only Settings.trace_sample_rate of turns are recorded; the spans of a
+  turn follow its root span's decision
+- message contents are left out (ADK_CAPTURE_MESSAGE_CONTENT_IN_SPANS
+  defaults to false); TracingPlugin records payload sizes instead
+
+Tracing is on with Settings.tracing_enabled, which follows DEBUG unless
+TRACING_ENABLED is set. When it is off nothing is installed and every span
+is OpenTelemetry's no-op span.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+from google.adk.plugins.base_plugin import BasePlugin
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from config.settings import Settings
+from tools.tracing import SERVICE_NAME, set_payload
+
+logger = logging.getLogger(__name__)
+
+_provider: TracerProvider | None = None
+_lock = threading.Lock()
+
+
+def span_record(span: ReadableSpan) -> dict:
+    """A finished span as a flat JSON-serializable dict."""
+    context = span.get_span_context()
+    return {
+        "name": span.name,
+        "trace_id": format(context.trace_id, "032x"),
+        "span_id": format(context.span_id, "016x"),
+        "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "start": datetime.fromtimestamp(span.start_time / 1e9, timezone.utc).isoformat(),
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name.lower(),
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(span_record(s), default=str) + "\n" for s in spans)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(lines)
+        except OSError:
+            logger.warning("Could not write spans to %s", self.path, exc_info=True)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def setup_tracing(settings: Settings | None = None) -> TracerProvider | None:
+    """Install the tracer provider once per process; None when tracing is off."""
+    global _provider
+    settings = settings or Settings()
+    if not settings.tracing_enabled:
+        return None
+    with _lock:
+        if _provider is not None:
+            return _provider
+        # Traces are for timing; keep calendar and task contents out of them.
+        os.environ.setdefault("ADK_CAPTURE_MESSAGE_CONTENT_IN_SPANS", "false")
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": SERVICE_NAME}),
+            sampler=ParentBased(TraceIdRatioBased(settings.trace_sample_rate)),
+        )
+        provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(settings.trace_path)))
+        if settings.trace_otlp_endpoint:
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+            except ImportError:
+                logger.warning("TRACE_OTLP_ENDPOINT is set but "
+                               "opentelemetry-exporter-otlp-proto-http is not installed")
+            else:
+                provider.add_span_processor(
+                    BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.trace_otlp_endpoint))
+                )
+        # Spans still buffered are exported when the process exits.
+        trace.set_tracer_provider(provider)
+        _provider = provider
+        return provider
+
+
+class TracingPlugin(BasePlugin):
+    """Adds payload sizes and identifiers to ADK's turn, model and tool spans."""
+
+    def __init__(self, name: str = "tracing"):
+        super().__init__(name=name)
+
+    async def before_run_callback(self, *, invocation_context):
+        current = trace.get_current_span()
+        if current.is_recording():
+            current.set_attributes({
+                "session.id": invocation_context.session.id,
+                "user.id": invocation_context.user_id,
+            })
+            set_payload(current, "turn.message_bytes", invocation_context.user_content)
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        current = trace.get_current_span()
+        if current.is_recording():
+            set_payload(current, "llm.request_bytes", llm_request.contents)
+            set_payload(current, "llm.system_bytes", llm_request.config.system_instruction)
+            current.set_attribute("llm.tools", len(llm_request.tools_dict))
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        set_payload(trace.get_current_span(), "llm.response_bytes", llm_response.content)
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        set_payload(trace.get_current_span(), "tool.args_bytes", tool_args)
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        set_payload(trace.get_current_span(), "tool.result_bytes", result)
+        return None
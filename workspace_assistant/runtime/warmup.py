@@ -0,0 +1,280 @@
+"""
+Background Warm-up
+
+The first question of a session used to pay for everything at once: the
+OAuth token refresh, building the Google clients, spawning the MCP server
+and filling the local event and task stores. WarmUp does that work while
+the user is still typing, running these steps concurrently on background
+threads:
+
+- credentials: load the stored token and refresh it if it expires soon
+- services: build the Calendar and Tasks clients on every tool thread
+- mcp: start every registered MCP server and list its tools
+- events: sync the local event store (today's events and the rest)
+- tasks: sync the local task store (open tasks and the rest)
+
+A step starts once the steps it needs have succeeded, and is skipped when
+one of them did not. Steps that need Google credentials are skipped when
+there is no stored token that can be refreshed without the browser flow.
+Each step has a time limit: a step still running when it expires is
+reported as 'timeout' and left to finish on its daemon thread. cancel()
+stops steps that have not started and cancels MCP connections in flight.
+The time each step took is kept for reporting.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class SkipStep(Exception):
+    """Raised by a step that has nothing to do (e.g. its store is disabled)."""
+
+
+@dataclass
+class Step:
+    """One unit of warm-up work; run(warmup) returns an optional detail string."""
+
+    name: str
+    run: Callable[["WarmUp"], str | None]
+    after: tuple[str, ...] = ()
+    timeout: float | None = None
+
+
+@dataclass
+class StepResult:
+    name: str
+    # pending, running, ok, skipped, error, timeout or cancelled
+    status: str = "pending"
+    seconds: float = 0.0
+    detail: str = ""
+
+
+class WarmUp:
+    """Runs warm-up steps concurrently in the background, each with a time limit."""
+
+    def __init__(self, steps: list[Step], timeout: float = 10.0):
+        self.steps = steps
+        self.timeout = timeout
+        self.results = {step.name: StepResult(step.name) for step in steps}
+        self._done = {step.name: threading.Event() for step in steps}
+        self._cancelled = threading.Event()
+        self._cancel_callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> "WarmUp":
+        """Start every step on its own daemon thread and return immediately."""
+        for step in self.steps:
+            # Each thread runs in a copy of this context (e.g. the current user).
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(self._run, step),
+                             name=f"warmup-{step.name}", daemon=True).start()
+        return self
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Call callback when the warm-up is cancelled (at once if it already was)."""
+        with self._lock:
+            if not self.cancelled:
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        """Stop steps that have not started and cancel in-flight work that supports it."""
+        with self._lock:
+            self._cancelled.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.debug("Warm-up cancel callback failed", exc_info=True)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for every step to finish; False if timeout expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for done in self._done.values():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not done.wait(remaining):
+                return False
+        return True
+
+    def report(self) -> list[StepResult]:
+        """Step results in declaration order."""
+        with self._lock:
+            return [StepResult(**vars(self.results[step.name])) for step in self.steps]
+
+    def summary(self) -> str:
+        """One line, e.g. 'credentials ok 120 ms, mcp timeout 10000 ms'."""
+        return ", ".join(
+            f"{r.name} {r.status} {r.seconds * 1000:.0f} ms" for r in self.report()
+        )
+
+    def _finish(self, name: str, status: str, seconds: float = 0.0, detail: str = "") -> None:
+        with self._lock:
+            result = self.results[name]
+            if result.status not in ("pending", "running"):
+                return
+            result.status, result.seconds, result.detail = status, seconds, detail
+        self._done[name].set()
+        log = logger.info if status in ("ok", "skipped") else logger.warning
+        log("Warm-up step %s: %s in %.0f ms %s", name, status, seconds * 1000, detail)
+
+    def _run(self, step: Step) -> None:
+        for name in step.after:
+            self._done[name].wait()
+            if self.results[name].status != "ok":
+                self._finish(step.name, "skipped", detail=f"{name} did not succeed")
+                return
+        if self.cancelled:
+            self._finish(step.name, "cancelled")
+            return
+
+        with self._lock:
+            self.results[step.name].status = "running"
+        future: Future = Future()
+        context = contextvars.copy_context()
+
+        def work():
+            try:
+                future.set_result(step.run(self))
+            except BaseException as e:
+                future.set_exception(e)
+
+        start = time.perf_counter()
+        threading.Thread(target=context.run, args=(work,),
+                         name=f"warmup-{step.name}-work", daemon=True).start()
+        try:
+            detail = future.result(timeout=step.timeout or self.timeout)
+        except FutureTimeout:
+            self._finish(step.name, "timeout", time.perf_counter() - start)
+        except SkipStep as e:
+            self._finish(step.name, "skipped", time.perf_counter() - start, str(e))
+        except Exception as e:
+            status = "cancelled" if self.cancelled else "error"
+            self._finish(step.name, status, time.perf_counter() - start, str(e))
+        else:
+            status = "cancelled" if self.cancelled else "ok"
+            self._finish(step.name, status, time.perf_counter() - start, detail or "")
+
+
+# -- default steps -----------------------------------------------------------
+
+def _credentials(warmup: WarmUp) -> str:
+    from tools.auth import SCOPES, get_service_pool, has_usable_token
+
+    if not has_usable_token():
+        raise SkipStep("no stored token")
+    pool = get_service_pool()
+    for scopes in SCOPES.values():
+        if warmup.cancelled:
+            break
+        pool.get_credentials(scopes)
+    return ", ".join(SCOPES)
+
+
+def _on_tool_threads(warmup: WarmUp, *funcs: Callable) -> list:
+    """Run funcs on the tool executor's threads, where the first turn's tools will run."""
+    from tools.executor import get_tool_executor
+
+    futures = [get_tool_executor().submit(func) for func in funcs]
+    warmup.on_cancel(lambda: [future.cancel() for future in futures])
+    return [future.result() for future in futures]
+
+
+def _services(warmup: WarmUp) -> str:
+    from tools.auth import get_calendar_service, get_tasks_service
+    from tools.executor import get_tool_executor
+
+    # Clients are cached per thread, and any tool thread may run the first
+    # turn's tools, so build them on all of them.
+    def build():
+        get_calendar_service()
+        get_tasks_service()
+
+    executor = get_tool_executor()
+    futures = executor.on_every_thread(build)
+    warmup.on_cancel(lambda: [future.cancel() for future in futures])
+    for future in futures:
+        future.result()
+    return f"calendar, tasks on {executor.max_workers} threads"
+
+
+def _events(warmup: WarmUp) -> str:
+    from tools.event_store import get_event_store
+
+    store = get_event_store()
+    if store is None:
+        raise SkipStep("event store disabled")
+    _on_tool_threads(warmup, store.sync)
+    return "primary"
+
+
+def _tasks(warmup: WarmUp) -> str:
+    from tools.task_store import get_task_store
+
+    store = get_task_store()
+    if store is None:
+        raise SkipStep("task store disabled")
+    _on_tool_threads(warmup, store.sync)
+    return "all lists"
+
+
+def _mcp(warmup: WarmUp) -> str:
+    # Importing the MCP tools registers their servers with the pool.
+    import tools.mcp_tools  # noqa: F401
+    from tools.mcp_pool import get_mcp_pool
+
+    pool = get_mcp_pool()
+    names = pool.names()
+    if not names:
+        raise SkipStep("no MCP servers")
+    futures = {name: pool.submit(pool.server(name).list_tools()) for name in names}
+    warmup.on_cancel(lambda: [future.cancel() for future in futures.values()])
+    return ", ".join(f"{name}: {len(future.result())} tools" for name, future in futures.items())
+
+
+def default_steps() -> list[Step]:
+    return [
+        Step("credentials", _credentials),
+        Step("services", _services, after=("credentials",)),
+        Step("mcp", _mcp),
+        Step("events", _events, after=("services",)),
+        Step("tasks", _tasks, after=("services",)),
+    ]
+
+
+def start_warmup(steps: list[Step] | None = None) -> WarmUp | None:
+    """Start warming up in the background, or return None when disabled in Settings."""
+    settings = Settings()
+    if not settings.warmup_enabled:
+        return None
+    return WarmUp(steps or default_steps(), settings.warmup_timeout).start()
+
+
+def warmup_table(results: list[StepResult]):
+    """Rich table of warm-up step timings."""
+    from rich.table import Table
+
+    table = Table(title="Warm-up", title_justify="left")
+    table.add_column("step", style="dim")
+    table.add_column("status")
+    table.add_column("time", justify="right")
+    table.add_column("detail", style="dim")
+    for result in results:
+        table.add_row(result.name, result.status, f"{result.seconds * 1000:.0f} ms",
+                      result.detail)
+    return table
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Stub GitHub MCP server speaking MCP JSON-RPC over stdio.
+
+Serves a fixed subset of the GitHub MCP server's tools with canned,
+deterministic data, so MCP code paths can be exercised without Node.js,
+network access or a GitHub token. It implements the protocol by hand
+(newline-delimited JSON-RPC), so it does not depend on the mcp package.
+
+Environment:
+    STUB_MCP_LATENCY_MS  Delay added to every tools/call (default 0).
+    STUB_MCP_EXIT_AFTER  Exit after this many tools/call requests, to
+                         simulate a crash (default: never).
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def _schema(properties: dict, required: list[str]) -> dict:
+    return {"type": "object", "properties": properties, "required": required}
+
+
+_STR = {"type": "string"}
+_INT = {"type": "integer"}
+
+TOOLS = [
+    {"name": "search_repositories",
+     "description": "Search for GitHub repositories",
+     "inputSchema": _schema({"query": _STR, "page": _INT, "perPage": _INT}, ["query"])},
+    {"name": "get_file_contents",
+     "description": "Get the contents of a file or directory from a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "path": _STR, "branch": _STR},
+                            ["owner", "repo", "path"])},
+    {"name": "list_issues",
+     "description": "List issues in a GitHub repository with filtering options",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "state": _STR, "labels": {
+         "type": "array", "items": _STR}}, ["owner", "repo"])},
+    {"name": "get_issue",
+     "description": "Get details of a specific issue in a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "issue_number": _INT},
+                            ["owner", "repo", "issue_number"])},
+    {"name": "create_issue",
+     "description": "Create a new issue in a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "title": _STR, "body": _STR},
+                            ["owner", "repo", "title"])},
+    {"name": "update_issue",
+     "description": "Update an existing issue in a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "issue_number": _INT,
+                             "title": _STR, "body": _STR, "state": _STR},
+                            ["owner", "repo", "issue_number"])},
+    {"name": "add_issue_comment",
+     "description": "Add a comment to an existing issue",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "issue_number": _INT, "body": _STR},
+                            ["owner", "repo", "issue_number", "body"])},
+    {"name": "list_pull_requests",
+     "description": "List and filter repository pull requests",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "state": _STR}, ["owner", "repo"])},
+    {"name": "create_pull_request",
+     "description": "Create a new pull request in a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "title": _STR, "head": _STR,
+                             "base": _STR, "body": _STR},
+                            ["owner", "repo", "title", "head", "base"])},
+    {"name": "list_commits",
+     "description": "Get list of commits of a branch in a GitHub repository",
+     "inputSchema": _schema({"owner": _STR, "repo": _STR, "sha": _STR}, ["owner", "repo"])},
+]
+
+
+def _issue(owner: str, repo: str, number: int, state: str = "open") -> dict:
+    return {
+        "number": number,
+        "title": f"Issue {number} in {owner}/{repo}",
+        "state": state,
+        "body": "Steps to reproduce:\n" + "lorem ipsum " * 40,
+        "html_url": f"https://github.com/{owner}/{repo}/issues/{number}",
+        "user": {"login": "octocat", "id": 1, "avatar_url": "https://example.invalid/a.png"},
+        "labels": [{"name": "bug", "color": "d73a4a"}],
+        "reactions": {"+1": number % 3, "-1": 0, "total_count": number % 3},
+        "created_at": "2025-03-01T12:00:00Z",
+        "updated_at": "2025-03-02T12:00:00Z",
+    }
+
+
+_next_issue = [100]
+
+
+def call_tool(name: str, args: dict) -> dict | list:
+    owner, repo = args.get("owner", "octocat"), args.get("repo", "Hello-World")
+    if name == "search_repositories":
+        return {"total_count": 3, "items": [
+            {"full_name": f"octocat/repo-{i}", "description": f"Repository {i}",
+             "html_url": f"https://github.com/octocat/repo-{i}", "stargazers_count": i * 10,
+             "owner": {"login": "octocat", "id": 1}, "private": False}
+            for i in range(3)
+        ]}
+    if name == "get_file_contents":
+        return {"name": args["path"].rsplit("/", 1)[-1], "path": args["path"],
+                "content": "# Hello World\n" + "Some text.\n" * 50, "encoding": "utf-8"}
+    if name == "list_issues":
+        return [_issue(owner, repo, n, args.get("state", "open")) for n in range(1, 6)]
+    if name == "get_issue":
+        return _issue(owner, repo, int(args["issue_number"]))
+    if name == "create_issue":
+        _next_issue[0] += 1
+        issue = _issue(owner, repo, _next_issue[0])
+        issue["title"] = args["title"]
+        return issue
+    if name in ("update_issue", "add_issue_comment"):
+        return _issue(owner, repo, int(args["issue_number"]), args.get("state", "open"))
+    if name == "list_pull_requests":
+        return [{"number": n, "title": f"PR {n}", "state": "open",
+                 "head": {"ref": f"feature-{n}"}, "base": {"ref": "main"}} for n in range(1, 4)]
+    if name == "create_pull_request":
+        return {"number": 42, "title": args["title"], "state": "open"}
+    if name == "list_commits":
+        return [{"sha": f"{n:040x}", "commit": {"message": f"Commit {n}"}} for n in range(5)]
+    raise KeyError(name)
+
+
+def handle(message: dict, state: dict) -> dict | None:
+    method = message.get("method")
+    if "id" not in message:
+        return None  # notification
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": message["params"].get("protocolVersion", "2025-06-18"),
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": "stub-github", "version": "0.1.0"},
+        }
+    elif method == "ping":
+        result = {}
+    elif method == "tools/list":
+        result = {"tools": TOOLS}
+    elif method == "tools/call":
+        state["calls"] += 1
+        exit_after = os.getenv("STUB_MCP_EXIT_AFTER")
+        if exit_after and state["calls"] > int(exit_after):
+            sys.exit(1)
+        time.sleep(float(os.getenv("STUB_MCP_LATENCY_MS", "0")) / 1000)
+        params = message["params"]
+        try:
+            payload = call_tool(params["name"], params.get("arguments") or {})
+            result = {"content": [{"type": "text", "text": json.dumps(payload)}], "isError": False}
+        except KeyError as e:
+            result = {"content": [{"type": "text", "text": f"Unknown tool or argument: {e}"}],
+                      "isError": True}
+    else:
+        return {"jsonrpc": "2.0", "id": message["id"],
+                "error": {"code": -32601, "message": f"Method not found: {method}"}}
+
+    return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+
+def main():
+    state = {"calls": 0}
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = handle(json.loads(line), state)
+        if response is not None:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Tests for the answer cache in runtime/answer_cache.py.
+
+Usage: python -m pytest tests/test_answer_cache.py
+"""
+
+import asyncio
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import InMemoryRunner
+
+from runtime.answer_cache import AnswerCache, intent, record_cached_turn
+
+
+def test_near_identical_questions_share_an_intent():
+    assert intent("What's on my calendar today?") == intent("calendar today please")
+    assert intent("Show my meetings today") == intent("what meetings do I have today")
+    assert intent("Show my tasks") == intent("What tasks do I have?")
+    assert intent("Show my tasks") != intent("Any tasks due tomorrow?")
+    # Changes and follow-ups bypass the cache.
+    assert intent("Complete the report task") is None
+    assert intent("Move it to 3pm") is None
+    assert intent("What about the first one?") is None
+    # So do questions whose answer changes with the time of day.
+    assert intent("Am I free right now?") is None
+    assert intent("What is my next meeting?") is None
+    assert intent("Which tasks are overdue?") is None
+
+
+def test_answers_are_keyed_on_data_versions():
+    versions = {"calendar": "t1", "tasks": "2025-03-14T09:00:00Z"}
+    cache = AnswerCache(version_providers={name: lambda name=name: versions[name]
+                                           for name in versions})
+
+    key = cache.key("alice", "What's on my calendar today?")
+    cache.put(key, "alice", "Two meetings.", ["list_upcoming_events"])
+
+    assert cache.get(cache.key("alice", "calendar today")) == "Two meetings."
+    assert cache.get(cache.key("bob", "calendar today")) is None
+    assert cache.key("alice", "open issues in octocat/hello") is None
+
+    versions["calendar"] = "t2"
+    assert cache.get(cache.key("alice", "calendar today")) is None
+
+
+def test_mutating_turns_are_not_stored_and_drop_the_users_answers():
+    cache = AnswerCache(max_entries=2, version_providers={"tasks": lambda: "v1"})
+    show = cache.key("alice", "show my tasks")
+    due = cache.key("alice", "tasks due today")
+    cache.put(show, "alice", "Three tasks.", ["list_tasks"])
+    cache.put(due, "alice", "One task.", ["list_tasks", "complete_tasks"])
+
+    assert cache.get(due) is None
+    assert cache.get(show) is None
+    assert cache.stats()["entries"] == 0
+
+    for i in range(3):
+        cache.put(cache.key("alice", f"tasks week {i}"), "alice", "ok", [])
+    assert cache.stats()["entries"] == 2
+
+
+def test_cached_turns_are_recorded_in_the_session():
+    runner = InMemoryRunner(agent=LlmAgent(name="assistant", model="gemini-2.0-flash"))
+
+    async def scenario():
+        await record_cached_turn(runner, "alice", "s1", "show my tasks", "Three tasks.")
+        return await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="alice", session_id="s1"
+        )
+
+    session = asyncio.run(scenario())
+
+    assert [(e.author, e.content.parts[0].text) for e in session.events] == [
+        ("user", "show my tasks"), ("assistant", "Three tasks."),
+    ]
@@ -0,0 +1,160 @@
+"""
+Tests for the cached Google API service pool in tools/auth.py.
+
+Usage: python -m pytest tests/test_auth.py
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools import auth
+
+
+class FakeCredentials:
+    def __init__(self, expiry=None):
+        self.expiry = expiry
+        self.refresh_token = "refresh"
+        self.refresh_count = 0
+
+    def refresh(self, request):
+        self.refresh_count += 1
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    def to_json(self):
+        return "{}"
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    built = []
+
+    def build_from_document(document, http=None):
+        built.append((document, threading.get_ident()))
+        return object()
+
+    monkeypatch.setattr(auth, "build_from_document", build_from_document)
+    monkeypatch.setattr(auth, "get_discovery_document", lambda api, version: {})
+    monkeypatch.setattr(auth, "_save_token", lambda creds: None)
+    return built
+
+
+def test_service_built_once_per_thread(fake_build):
+    loads = []
+
+    def loader(scopes):
+        loads.append(scopes)
+        return FakeCredentials(datetime.utcnow() + timedelta(hours=1))
+
+    pool = auth.ServicePool(credentials_loader=loader)
+    first = pool.get("calendar", "v3", auth.SCOPES["calendar"])
+    second = pool.get("calendar", "v3", auth.SCOPES["calendar"])
+
+    assert first is second
+    assert len(fake_build) == 1
+    assert len(loads) == 1
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+
+
+def test_threads_get_own_service_over_shared_credentials(fake_build):
+    creds = FakeCredentials(datetime.utcnow() + timedelta(hours=1))
+    pool = auth.ServicePool(credentials_loader=lambda scopes: creds)
+    services = []
+
+    def worker():
+        services.append(pool.get("tasks", "v1", auth.SCOPES["tasks"]))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(s) for s in services}) == 4
+    assert pool.stats()["credentials"] == 1
+
+
+def test_credentials_refreshed_before_expiry(fake_build):
+    creds = FakeCredentials(datetime.utcnow() + timedelta(minutes=1))
+    pool = auth.ServicePool(credentials_loader=lambda scopes: creds)
+
+    pool.get_credentials(auth.SCOPES["calendar"])
+    assert creds.refresh_count == 0
+
+    pool.get_credentials(auth.SCOPES["calendar"])
+    assert creds.refresh_count == 1
+    assert pool.stats()["refreshes"] == 1
+
+
+def test_one_users_refresh_does_not_block_another_user(fake_build):
+    refreshing, release = threading.Event(), threading.Event()
+
+    class SlowCredentials(FakeCredentials):
+        def refresh(self, request):
+            refreshing.set()
+            release.wait(5)
+            super().refresh(request)
+
+    users = {"alice": SlowCredentials(datetime.utcnow() + timedelta(minutes=1)),
+             "bob": FakeCredentials(datetime.utcnow() + timedelta(hours=1))}
+    pool = auth.ServicePool(credentials_loader=lambda scopes: users[auth.current_user.get()])
+
+    def as_user(user_id):
+        token = auth.current_user.set(user_id)
+        try:
+            return pool.get_credentials(auth.SCOPES["calendar"])
+        finally:
+            auth.current_user.reset(token)
+
+    as_user("alice")
+    alice = threading.Thread(target=as_user, args=("alice",))
+    alice.start()
+    assert refreshing.wait(5)
+    # Bob's call completes while Alice's refresh is still in flight.
+    bob = []
+    thread = threading.Thread(target=lambda: bob.append(as_user("bob")))
+    thread.start()
+    thread.join(2)
+    finished_first = bool(bob)
+    release.set()
+    alice.join()
+    thread.join()
+    assert finished_first and bob == [users["bob"]]
+    assert users["alice"].refresh_count == 1
+
+
+def test_least_recently_used_and_idle_users_are_evicted(fake_build, monkeypatch):
+    monkeypatch.setattr(auth, "MAX_SERVICES_PER_THREAD", 2)
+    loads = []
+
+    def loader(scopes):
+        loads.append(auth.current_user.get())
+        return FakeCredentials(datetime.utcnow() + timedelta(hours=1))
+
+    pool = auth.ServicePool(credentials_loader=loader, max_users=2, idle_seconds=0.2)
+
+    def as_user(user_id):
+        token = auth.current_user.set(user_id)
+        try:
+            return pool.get("calendar", "v3", auth.SCOPES["calendar"])
+        finally:
+            auth.current_user.reset(token)
+
+    for user_id in ["alice", "bob", "alice", "carol"]:
+        as_user(user_id)
+    # Bob was least recently used when Carol arrived.
+    assert pool.stats()["users"] == 2 and pool.stats()["evictions"] == 1
+    assert set(pool._user_locks) == {"alice", "carol"}
+    assert len(pool._local.services) == 2
+
+    as_user("bob")
+    assert loads == ["alice", "bob", "carol", "bob"]
+
+    time.sleep(0.3)
+    as_user("carol")
+    # Alice and Bob idled out; Carol's own credentials are still cached.
+    assert pool.stats()["users"] == 1 and pool.stats()["credentials"] == 1
+    assert len(loads) == 4
@@ -0,0 +1,123 @@
+"""
+Tests for the JSONL batch mode in runtime/batch.py.
+
+Usage: python -m pytest tests/test_batch.py
+"""
+
+import asyncio
+import json
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from runtime.batch import BatchRunner, Completed, load_completed
+from tools import auth
+
+
+def whoami() -> dict:
+    """Return the user the tool is running for."""
+    return {"status": "success", "user": auth.current_user.get()}
+
+
+class ScriptedLlm(BaseLlm):
+    """Calls whoami, then answers with its result; queries mentioning 'slow' stall first."""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1]
+        results = [p.function_response for p in last.parts if p.function_response]
+        if results:
+            part = types.Part(text=f"You are {results[0].response['user']}.")
+        else:
+            if "slow" in last.parts[0].text:
+                await asyncio.sleep(1.0)
+            part = types.Part(function_call=types.FunctionCall(name="whoami", args={}))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def make_runner():
+    agent = LlmAgent(name="assistant", model=ScriptedLlm(), tools=[whoami])
+    runner = InMemoryRunner(agent=agent)
+    runner.auto_create_session = True
+    return runner
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_runs_concurrently_per_user_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text("\n".join([
+        json.dumps({"id": "a", "query": "who am I?", "user": "alice"}),
+        json.dumps({"query": "who am I?", "user": "bob"}),
+        "",
+        "{not json",
+        json.dumps({"id": "slow", "query": "slow: who am I?"}),
+        json.dumps({"query": "who am I?", "user": "../etc"}),
+        json.dumps({"id": "kept", "query": "who am I?", "user": "carol", "session": "digest"}),
+    ]) + "\n")
+    output = tmp_path / "out" / "results.jsonl"
+    runner = make_runner()
+
+    summary = asyncio.run(BatchRunner(runner, concurrency=3, timeout=0.3).run(queries, output))
+
+    results = {r["line"]: r for r in read_results(output)}
+    assert {line: r["status"] for line, r in results.items()} == {
+        1: "ok", 2: "ok", 4: "invalid", 5: "timeout", 6: "invalid", 7: "ok",
+    }
+    assert results[1]["id"] == "a" and results[1]["answer"] == "You are alice."
+    assert results[2]["id"] == "2" and results[2]["answer"] == "You are bob."
+    assert results[1]["tools"] == ["whoami"]
+    assert "invalid user ID" in results[6]["error"]
+    assert summary["queries"] == 6 and summary["ok"] == 3 and summary["timeout"] == 1
+    assert summary["p50_s"] is not None and summary["per_second"] > 0
+
+    # Sessions made for single queries are dropped; a named one is kept.
+    sessions = runner.session_service
+    for user in ("alice", "bob", "user"):
+        listed = asyncio.run(sessions.list_sessions(app_name=runner.app_name, user_id=user))
+        assert listed.sessions == []
+    kept = asyncio.run(sessions.list_sessions(app_name=runner.app_name, user_id="carol"))
+    assert [s.id for s in kept.sessions] == ["digest"]
+
+    # A second run retries only what did not succeed.
+    summary = asyncio.run(BatchRunner(runner, concurrency=3, timeout=5).run(queries, output))
+    assert summary["skipped"] == 3 and summary["ok"] == 1 and summary["invalid"] == 2
+    assert [r["status"] for r in read_results(output) if r["line"] == 5] == ["timeout", "ok"]
+    assert 5 in load_completed(output)
+
+
+def test_completed_lines_survive_a_crash_with_bounded_bookkeeping(tmp_path):
+    completed = Completed()
+    for line, ok in [(1, True), (3, True), (2, False), (4, True), (2, True), (6, False)]:
+        completed.add(line, ok)
+    assert completed.watermark == 4 and completed.ahead == {6}
+    assert [line in completed for line in range(1, 8)] == [
+        True, True, True, True, False, False, False,
+    ]
+    assert len(completed) == 4
+
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"line": 1, "status": "ok"}) + "\n"
+        + json.dumps({"line": 2, "status": "ok"}) + "\n"
+        + '{"line": 3, "sta'
+    )
+    completed = load_completed(output)
+    assert completed.watermark == 2 and 3 not in completed
+    # The half-written line is dropped, so appended results start on a new line.
+    assert output.read_text().endswith('"ok"}\n')
+
+    # Blank input lines get no result; the watermark steps over them.
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text("\n".join(["{}", "", *["{}"] * 8, "", ""]) + "\n")
+    output.write_text("".join(json.dumps({"line": line, "status": "ok"}) + "\n"
+                              for line in [1, *range(3, 11)]))
+    completed = load_completed(output, queries)
+    assert completed.watermark == 12 and completed.ahead == set()
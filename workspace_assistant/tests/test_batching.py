@@ -0,0 +1,136 @@
+"""
+Tests for batched Google API execution in tools/batching.py.
+
+Usage: python -m pytest tests/test_batching.py
+"""
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from tools import batching
+from tools.batching import execute_batch, summarize_results
+from tools.quota import CircuitOpen, QuotaScheduler
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeRequest:
+    """Request that fails with the given statuses before succeeding."""
+
+    def __init__(self, name, failures=()):
+        self.name = name
+        self.failures = list(failures)
+        self.sent = 0
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batch_sizes.append(len(self.requests))
+        if self.service.drops:
+            raise self.service.drops.pop(0)
+        for request_id, request in self.requests:
+            request.sent += 1
+            if request.failures:
+                self.callback(request_id, None, http_error(request.failures.pop(0)))
+            else:
+                self.callback(request_id, {"name": request.name}, None)
+
+
+class FakeService:
+    def __init__(self, drops=()):
+        self.batch_sizes = []
+        self.drops = list(drops)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+
+def test_requests_grouped_into_batches_of_fifty():
+    service = FakeService()
+    requests = [FakeRequest(str(i)) for i in range(120)]
+
+    results = execute_batch(service, requests)
+
+    assert service.batch_sizes == [50, 50, 20]
+    assert [r["response"]["name"] for r in results] == [str(i) for i in range(120)]
+
+
+def test_only_retryable_failures_are_resent():
+    service = FakeService()
+    ok = FakeRequest("ok")
+    throttled = FakeRequest("throttled", failures=[429])
+    missing = FakeRequest("missing", failures=[404])
+
+    results = execute_batch(service, [ok, throttled, missing], retry_delay=0)
+
+    assert [r["status"] for r in results] == ["success", "success", "error"]
+    assert results[2]["code"] == 404
+    assert (ok.sent, throttled.sent, missing.sent) == (1, 2, 1)
+    assert service.batch_sizes == [3, 1]
+
+
+def test_network_errors_fail_the_batch_items_and_are_retried(monkeypatch):
+    # A scheduler of its own, so these failures do not trip the shared breaker.
+    monkeypatch.setattr(batching, "get_quota_scheduler", QuotaScheduler)
+    service = FakeService(drops=[ConnectionError("reset"), TimeoutError("timed out")])
+    requests = [FakeRequest(str(i)) for i in range(3)]
+
+    results = execute_batch(service, requests, max_retries=1, retry_delay=0)
+
+    assert [r["status"] for r in results] == ["error"] * 3
+    assert results[0]["message"] == "timed out" and results[0]["code"] is None
+
+    service = FakeService(drops=[ConnectionError("reset")])
+    results = execute_batch(service, requests, retry_delay=0)
+    assert [r["response"]["name"] for r in results] == ["0", "1", "2"]
+
+
+def test_an_opening_circuit_keeps_the_results_already_committed(monkeypatch):
+    class TripsOnSecondBatch:
+        max_retries = 0
+
+        def __init__(self):
+            self.acquired = 0
+            self.scheduler = QuotaScheduler()
+
+        def acquire(self, api, priority, cost):
+            self.acquired += 1
+            if self.acquired == 2:
+                raise CircuitOpen(api, 30)
+
+        def __getattr__(self, name):
+            return getattr(self.scheduler, name)
+
+    monkeypatch.setattr(batching, "get_quota_scheduler", TripsOnSecondBatch)
+    service = FakeService()
+    requests = [FakeRequest(str(i)) for i in range(120)]
+
+    results = execute_batch(service, requests)
+
+    assert service.batch_sizes == [50]
+    assert all(r["status"] == "success" for r in results[:50])
+    assert all("not calling it" in r["message"] for r in results[50:])
+    assert summarize_results([str(i) for i in range(120)], results)["status"] == "partial"
+
+
+def test_summarize_results_reports_partial_success():
+    results = [
+        {"status": "success", "response": {}},
+        {"status": "error", "code": 404, "message": "Not Found"},
+    ]
+    summary = summarize_results(["a", "b"], results)
+    assert summary == {
+        "status": "partial",
+        "succeeded": ["a"],
+        "failed": [{"id": "b", "message": "Not Found"}],
+    }
@@ -0,0 +1,59 @@
+"""
+Tests for the offline benchmark fakes and the suite's baseline comparison.
+
+Usage: python -m pytest tests/test_bench_suite.py
+"""
+
+from benchmarks.fakes import FakeWorkspace, install_fake_google, parse_fields, select_fields
+from benchmarks.suite import ADVISORY, compare
+from tools import auth, tasks_tools
+from tools.task_store import TaskStore
+from tools.tasks_tools import complete_tasks, list_tasks
+
+
+def test_fake_workspace_serves_the_real_tools(monkeypatch):
+    assert select_fields(parse_fields("items(id,due),nextPageToken"), {
+        "items": [{"id": "a", "title": "x", "due": "d"}], "kind": "tasks#tasks",
+    }) == {"items": [{"id": "a", "due": "d"}]}
+
+    workspace = FakeWorkspace()
+    previous = install_fake_google(workspace)
+    store = TaskStore(":memory:", sync_interval=0)
+    monkeypatch.setattr(tasks_tools, "get_task_store", lambda: store)
+    try:
+        listed = list_tasks(query="expense", max_results=50)
+        assert listed["status"] == "success" and len(listed["tasks"]) == 26
+        assert all("Expense report" in task["title"] for task in listed["tasks"])
+
+        workspace.requests.clear()
+        result = complete_tasks(["task0010", "task0020", "missing"])
+        assert result["status"] == "partial"
+        assert result["succeeded"] == ["task0010", "task0020"]
+        assert workspace.requests == {"batch": 1, "tasks": 3}
+        assert workspace.tasks["task0010"]["status"] == "completed"
+
+        workspace.reset()
+        assert workspace.tasks["task0010"]["status"] == "needsAction"
+    finally:
+        auth._pool = previous
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"list": {"p50_ms": 20.0, "peak_kb": 500.0, "prompt_tokens": 1000,
+                         "api_requests": {"tasks": 1}, "tools": ["list_tasks"]}}
+    within = {"list": {"p50_ms": 34.0, "peak_kb": 600.0, "prompt_tokens": 1050,
+                       "api_requests": {"tasks": 1}, "tools": ["list_tasks"]}}
+    assert compare(within, baseline) == []
+
+    worse = {"list": {"p50_ms": 40.0, "peak_kb": 500.0, "prompt_tokens": 1200,
+                      "api_requests": {"tasks": 2}, "tools": ["list_tasks"]}}
+    regressions = compare(worse, baseline)
+    assert [message.split(":")[0] for message in regressions] == [
+        "list.prompt_tokens", "list.api_requests",
+    ]
+    # Wall-clock numbers are compared separately, as advice.
+    assert [message.split(":")[0] for message in compare(worse, baseline, ADVISORY)] == [
+        "list.p50_ms",
+    ]
+    # Scenarios without a baseline yet are not compared.
+    assert compare({"new": worse["list"]}, baseline) == []
@@ -0,0 +1,79 @@
+"""
+Tests for the freebusy queries in tools/calendar_tools.py.
+
+Usage: python -m pytest tests/test_calendar_tools.py
+"""
+
+import contextvars
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from tools import calendar_tools
+from tools.auth import current_user
+
+START = datetime(2025, 3, 14, 9, tzinfo=timezone.utc)
+END = START + timedelta(hours=8)
+
+
+class FakeFreebusy:
+    """freebusy() resource answering each chunk; one chunk comes back as errors."""
+
+    def __init__(self, failing_chunk: int):
+        self.failing_chunk = failing_chunk
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def query(self, body: dict):
+        ids = [item["id"] for item in body["items"]]
+        index = int(ids[0].split("@")[0][3:]) // calendar_tools.FREEBUSY_MAX_CALENDARS
+
+        def execute():
+            with self._lock:
+                self.calls.append((ids, threading.current_thread().name, current_user.get()))
+            if index == self.failing_chunk:
+                return {"calendars": {i: {"errors": [{"reason": "notFound"}], "busy": []}
+                                      for i in ids}}
+            busy = {"start": (START + timedelta(hours=index)).isoformat(),
+                    "end": (START + timedelta(hours=index + 1)).isoformat()}
+            return {"calendars": {i: {"busy": [busy]} for i in ids}}
+
+        return SimpleNamespace(execute=execute)
+
+
+def test_freebusy_chunks_run_on_the_pool_as_the_calling_user(monkeypatch):
+    freebusy = FakeFreebusy(failing_chunk=1)
+    monkeypatch.setattr(calendar_tools, "get_calendar_service",
+                        lambda: SimpleNamespace(freebusy=lambda: freebusy))
+    monkeypatch.setattr(calendar_tools, "get_quota_scheduler",
+                        lambda: SimpleNamespace(execute=lambda request: request.execute()))
+    calendar_ids = [f"cal{i}@example.com" for i in range(120)]
+
+    def query():
+        current_user.set("alice")
+        return calendar_tools._query_freebusy(calendar_ids, START, END)
+
+    busy, unavailable = contextvars.copy_context().run(query)
+
+    assert sorted(len(ids) for ids, _, _ in freebusy.calls) == [20, 50, 50]
+    assert all(thread.startswith("freebusy") for _, thread, _ in freebusy.calls)
+    assert {user for _, _, user in freebusy.calls} == {"alice"}
+    assert unavailable == {f"cal{i}@example.com": "notFound" for i in range(50, 100)}
+    assert set(busy) == {f"cal{i}@example.com" for i in [*range(50), *range(100, 120)]}
+    third_hour = (START + timedelta(hours=2)).timestamp()
+    assert busy["cal110@example.com"] == [(third_hour, third_hour + 3600)]
+    assert current_user.get() is None
+
+
+def test_single_freebusy_chunk_is_queried_inline(monkeypatch):
+    freebusy = FakeFreebusy(failing_chunk=-1)
+    monkeypatch.setattr(calendar_tools, "get_calendar_service",
+                        lambda: SimpleNamespace(freebusy=lambda: freebusy))
+    monkeypatch.setattr(calendar_tools, "get_quota_scheduler",
+                        lambda: SimpleNamespace(execute=lambda request: request.execute()))
+
+    busy, unavailable = calendar_tools._query_freebusy(["cal0@example.com"], START, END)
+
+    assert freebusy.calls == [(["cal0@example.com"], threading.current_thread().name, None)]
+    assert busy == {"cal0@example.com": [(START.timestamp(), START.timestamp() + 3600)]}
+    assert unavailable == {}
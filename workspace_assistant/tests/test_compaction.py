@@ -0,0 +1,97 @@
+"""
+Tests for tool result compaction in tools/compaction.py.
+
+Usage: python -m pytest tests/test_compaction.py
+"""
+
+import contextvars
+import json
+from types import SimpleNamespace
+
+from tools import compaction
+from tools.auth import current_user
+from tools.compaction import Compactor, Projection, project, truncate
+
+
+def raw_event(i: int) -> dict:
+    return {
+        "kind": "calendar#event",
+        "etag": f'"{i}"',
+        "id": f"evt{i}",
+        "htmlLink": f"https://calendar.google.com/event?eid={i}",
+        "summary": f"Meeting {i}",
+        "description": "agenda " * 200,
+        "start": {"dateTime": "2025-03-14T10:00:00Z", "timeZone": "UTC"},
+        "end": {"dateTime": "2025-03-14T11:00:00Z", "timeZone": "UTC"},
+        "attendees": [{"email": "a@example.com", "responseStatus": "accepted",
+                       "displayName": "A", "organizer": True}],
+        "reminders": {"useDefault": True},
+    }
+
+
+def test_project_keeps_whitelisted_paths_through_lists():
+    value = {"events": [raw_event(1)], "status": "success"}
+    kept = project(value, ("status", "events.id", "events.start.dateTime",
+                           "events.attendees.email"))
+    assert kept == {"status": "success", "events": [{
+        "id": "evt1", "start": {"dateTime": "2025-03-14T10:00:00Z"},
+        "attendees": [{"email": "a@example.com"}],
+    }]}
+    assert truncate("x" * 10, 4) == "xxxx… [6 more chars]"
+
+
+def test_calendar_result_is_projected_paged_and_resumable():
+    compactor = Compactor(page_size=5, text_budget=50)
+    raw = {"status": "success", "events": [raw_event(i) for i in range(12)]}
+
+    result = compactor.compact("list_upcoming_events", raw)
+    assert len(result["events"]) == 5 and result["total"] == 12
+    assert "etag" not in result["events"][0]
+    assert len(result["events"][0]["description"]) < 80
+    assert len(raw["events"]) == 12  # input untouched
+
+    second = compactor.page(result["next_cursor"])
+    third = compactor.page(second["next_cursor"])
+    assert [e["id"] for e in third["items"]] == ["evt10", "evt11"]
+    assert "next_cursor" not in third
+    assert compactor.page(result["next_cursor"])["status"] == "error"
+
+    stats = compactor.stats()["list_upcoming_events"]
+    assert stats["calls"] == 1 and stats["tokens_saved"] > 0
+
+
+def test_mcp_text_payload_is_compacted():
+    compactor = Compactor(projections={"list_issues": Projection(("number", "title"), items="")},
+                          page_size=2)
+    issues = [{"number": n, "title": f"t{n}", "reactions": {"+1": 3}} for n in range(3)]
+    raw = {"content": [{"type": "text", "text": json.dumps(issues)}],
+           "structuredContent": {"result": issues}, "isError": False}
+
+    result = compactor.compact("list_issues", raw)
+    payload = json.loads(result["content"][0]["text"])
+    assert payload["items"] == [{"number": 0, "title": "t0"}, {"number": 1, "title": "t1"}]
+    assert payload["total"] == 3 and "structuredContent" not in result
+    assert result["isError"] is False
+
+
+def test_cursor_belongs_to_the_user_and_session_it_was_issued_to(monkeypatch):
+    monkeypatch.setattr(compaction, "_compactor", Compactor(page_size=5))
+    tool = SimpleNamespace(name="list_upcoming_events")
+    raw = {"status": "success", "events": [raw_event(i) for i in range(12)]}
+
+    def as_user(user: str, session: str, call):
+        def run():
+            current_user.set(user)
+            return call(SimpleNamespace(session=SimpleNamespace(id=session)))
+        return contextvars.copy_context().run(run)
+
+    result = as_user("alice", "s1", lambda ctx: compaction.compact_tool_result(tool, {}, ctx, raw))
+    cursor = result["next_cursor"]
+
+    def more(ctx):
+        return compaction.more_results(cursor, ctx)
+
+    assert as_user("bob", "s1", more)["status"] == "error"
+    assert as_user("alice", "s2", more)["status"] == "error"
+    page = as_user("alice", "s1", more)
+    assert [e["id"] for e in page["items"]] == [f"evt{i}" for i in range(5, 10)]
@@ -0,0 +1,101 @@
+"""
+Tests for the on-disk discovery document cache in tools/discovery.py.
+
+Usage: python -m pytest tests/test_discovery.py
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from tools import discovery
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_fresh_entry_is_served_from_disk(cache_dir, monkeypatch):
+    fetches = []
+    monkeypatch.setattr(
+        discovery, "_fetch_document",
+        lambda api, version: fetches.append(api) or {"revision": "1"},
+    )
+
+    first = discovery.load_document("calendar", "v3")
+    second = discovery.load_document("calendar", "v3")
+
+    assert first == second == {"revision": "1"}
+    assert fetches == ["calendar"]
+    entry = json.loads((cache_dir / "calendar.v3.json").read_text())
+    assert entry["format"] == discovery.CACHE_FORMAT_VERSION
+    assert entry["revision"] == "1"
+
+
+def test_expired_entry_falls_back_when_offline(cache_dir, monkeypatch):
+    discovery._write_cache("tasks", "v1", {"revision": "old"})
+    path = cache_dir / "tasks.v1.json"
+    entry = json.loads(path.read_text())
+    entry["fetched_at"] = time.time() - discovery.DISCOVERY_TTL_SECONDS - 1
+    path.write_text(json.dumps(entry))
+
+    def offline(api, version):
+        raise OSError("network unreachable")
+
+    monkeypatch.setattr(discovery, "_fetch_document", offline)
+    assert discovery.load_document("tasks", "v1") == {"revision": "old"}
+
+
+def test_format_mismatch_is_ignored(cache_dir, monkeypatch):
+    (cache_dir / "tasks.v1.json").write_text(json.dumps({"format": -1, "document": {}}))
+    monkeypatch.setattr(discovery, "_fetch_document", lambda api, version: {"revision": "2"})
+    assert discovery.load_document("tasks", "v1") == {"revision": "2"}
+
+
+def test_miss_starts_from_the_bundled_document_and_refreshes(cache_dir, monkeypatch):
+    monkeypatch.setattr(discovery, "_documents", {})
+    release = threading.Event()
+
+    def slow_fetch(api, version):
+        release.wait(5)
+        return {"revision": "fetched"}
+
+    monkeypatch.setattr(discovery, "_fetch_document", slow_fetch)
+
+    document = discovery.get_discovery_document("calendar", "v3")
+    assert document["name"] == "calendar" and document["revision"] != "fetched"
+
+    release.set()
+    for _ in range(100):
+        if discovery.get_discovery_document("calendar", "v3") == {"revision": "fetched"}:
+            break
+        time.sleep(0.01)
+    assert discovery.get_discovery_document("calendar", "v3") == {"revision": "fetched"}
+    assert discovery._read_cache("calendar", "v3")["revision"] == "fetched"
+
+
+def test_blocking_fetch_does_not_hold_the_lock(cache_dir, monkeypatch):
+    monkeypatch.setattr(discovery, "_documents", {("tasks", "v1"): {"revision": "t"}})
+    fetching, release = threading.Event(), threading.Event()
+
+    def slow_fetch(api, version):
+        fetching.set()
+        release.wait(5)
+        return {"revision": "x"}
+
+    monkeypatch.setattr(discovery, "_fetch_document", slow_fetch)
+    thread = threading.Thread(target=discovery.get_discovery_document, args=("unbundled", "v1"))
+    thread.start()
+    try:
+        assert fetching.wait(5)
+        started = time.monotonic()
+        assert discovery.get_discovery_document("tasks", "v1") == {"revision": "t"}
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        thread.join()
+    assert discovery.get_discovery_document("unbundled", "v1") == {"revision": "x"}
@@ -0,0 +1,157 @@
+"""
+Tests for the incremental-sync Calendar event store in tools/event_store.py.
+
+Usage: python -m pytest tests/test_event_store.py
+"""
+
+import contextvars
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from tools import event_store
+from tools.auth import current_user
+from tools.event_store import EventStore
+
+
+def event(event_id, start, end, status="confirmed"):
+    return {
+        "id": event_id,
+        "status": status,
+        "start": {"dateTime": start},
+        "end": {"dateTime": end},
+    }
+
+
+class FakeService:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.calls.append(params)
+        self._next = self.responses.pop(0)
+        return self
+
+    def execute(self):
+        if isinstance(self._next, Exception):
+            raise self._next
+        if callable(self._next):
+            return self._next()
+        return self._next
+
+
+def window():
+    return (datetime(2025, 3, 14, tzinfo=timezone.utc),
+            datetime(2025, 3, 15, tzinfo=timezone.utc))
+
+
+def test_incremental_sync_applies_delta():
+    service = FakeService([
+        {"items": [event("a", "2025-03-14T09:00:00Z", "2025-03-14T10:00:00Z"),
+                   event("b", "2025-03-14T11:00:00Z", "2025-03-14T12:00:00Z")],
+         "nextSyncToken": "t1", "timeZone": "UTC"},
+        {"items": [{"id": "a", "status": "cancelled"},
+                   event("c", "2025-03-14T13:00:00Z", "2025-03-14T14:00:00Z")],
+         "nextSyncToken": "t2", "timeZone": "UTC"},
+    ])
+    store = EventStore(":memory:", sync_interval=0, service_factory=lambda: service)
+
+    store.sync()
+    store.sync()
+
+    assert "syncToken" not in service.calls[0]
+    assert service.calls[1]["syncToken"] == "t1"
+    assert [e["id"] for e in store.events_between("primary", *window())] == ["b", "c"]
+
+
+def test_expired_sync_token_triggers_full_resync():
+    gone = HttpError(httplib2.Response({"status": 410}), b"{}")
+    service = FakeService([
+        {"items": [event("a", "2025-03-14T09:00:00Z", "2025-03-14T10:00:00Z")],
+         "nextSyncToken": "t1", "timeZone": "UTC"},
+        gone,
+        {"items": [event("b", "2025-03-14T11:00:00Z", "2025-03-14T12:00:00Z")],
+         "nextSyncToken": "t2", "timeZone": "UTC"},
+    ])
+    store = EventStore(":memory:", sync_interval=0, service_factory=lambda: service)
+
+    store.sync()
+    store.sync()
+
+    assert "syncToken" not in service.calls[2]
+    assert [e["id"] for e in store.events_between("primary", *window())] == ["b"]
+
+
+def test_sync_is_throttled_by_interval():
+    service = FakeService([{"items": [], "nextSyncToken": "t1", "timeZone": "UTC"}])
+    store = EventStore(":memory:", sync_interval=60, service_factory=lambda: service)
+
+    store.sync()
+    store.sync()
+
+    assert len(service.calls) == 1
+
+
+def test_reads_are_served_while_a_resync_downloads():
+    gone = HttpError(httplib2.Response({"status": 410}), b"{}")
+    downloading, release = threading.Event(), threading.Event()
+
+    def slow_page():
+        downloading.set()
+        release.wait(5)
+        return {"items": [event("b", "2025-03-14T11:00:00Z", "2025-03-14T12:00:00Z")],
+                "nextSyncToken": "t2", "timeZone": "UTC"}
+
+    service = FakeService([
+        {"items": [event("a", "2025-03-14T09:00:00Z", "2025-03-14T10:00:00Z")],
+         "nextSyncToken": "t1", "timeZone": "UTC"},
+        gone,
+        slow_page,
+    ])
+    store = EventStore(":memory:", sync_interval=60, service_factory=lambda: service)
+    store.sync()
+
+    thread = threading.Thread(target=store.sync, kwargs={"force": True})
+    thread.start()
+    try:
+        assert downloading.wait(5)
+        store.mark_stale()
+        # The old mirror stays readable until the new listing is written.
+        assert [e["id"] for e in store.events_between("primary", *window())] == ["a"]
+    finally:
+        release.set()
+        thread.join()
+
+    assert [e["id"] for e in store.events_between("primary", *window())] == ["b"]
+    assert store.sync_token() == "t2"
+    assert store._due("primary")  # marked stale mid-sync, so still due
+
+
+def test_least_recently_used_store_is_closed(tmp_path, monkeypatch):
+    monkeypatch.setenv("EVENT_STORE_PATH", str(tmp_path / "events.sqlite3"))
+    monkeypatch.setattr(event_store, "MAX_OPEN_STORES", 2)
+    monkeypatch.setattr(event_store, "_stores", event_store.OrderedDict())
+
+    def store_for(user):
+        def get():
+            current_user.set(user)
+            return event_store.get_event_store()
+        return contextvars.copy_context().run(get)
+
+    alice, bob = store_for("alice"), store_for("bob")
+    assert store_for("alice") is alice
+    store_for("carol")
+
+    assert list(event_store._stores) == ["alice", "carol"]
+    assert store_for("alice").sync_token() is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        bob.sync_token()
+    assert (tmp_path / "users" / "bob" / "events.sqlite3").exists()
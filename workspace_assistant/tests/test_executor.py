@@ -0,0 +1,93 @@
+"""
+Tests for concurrent tool execution in tools/executor.py.
+
+Usage: python -m pytest tests/test_executor.py
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+
+from google.adk.tools import FunctionTool
+
+from tools.executor import ToolExecutor
+
+
+def list_things(delay: float, label: str = "x") -> dict:
+    """List things after a delay.
+
+    Args:
+        delay: Seconds to block.
+        label: Label echoed back.
+    """
+    time.sleep(delay)
+    return {"status": "success", "label": label}
+
+
+def test_wrapped_tool_keeps_declaration():
+    executor = ToolExecutor()
+    wrapped = executor.wrap(list_things)
+
+    assert inspect.iscoroutinefunction(wrapped)
+    original = FunctionTool(list_things)._get_declaration()
+    assert FunctionTool(wrapped)._get_declaration() == original
+
+
+def test_calls_run_concurrently_and_keep_order():
+    executor = ToolExecutor(max_workers=4)
+    calls = [(list_things, {"delay": 0.2, "label": str(i)}) for i in range(4)]
+
+    start = time.perf_counter()
+    results = asyncio.run(executor.run_all(calls))
+    elapsed = time.perf_counter() - start
+
+    assert [r["label"] for r in results] == ["0", "1", "2", "3"]
+    assert elapsed < 0.6
+
+
+def test_per_tool_limit_is_enforced():
+    executor = ToolExecutor(max_workers=8, limits={"count_active": 2})
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def count_active() -> dict:
+        """Track how many calls overlap."""
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return {"status": "success"}
+
+    asyncio.run(executor.run_all([(count_active, {})] * 6))
+    assert peak == 2
+
+
+def test_calls_waiting_for_a_limit_do_not_hold_pool_threads():
+    executor = ToolExecutor(max_workers=2, limits={"bulk_write": 1})
+
+    def bulk_write() -> dict:
+        """Block like a bulk write."""
+        time.sleep(0.2)
+        return {"status": "success"}
+
+    async def scenario():
+        start = time.perf_counter()
+        writes = asyncio.gather(*(executor.wrap(bulk_write)() for _ in range(4)))
+        await asyncio.sleep(0.01)
+        await executor.wrap(list_things)(delay=0)
+        read_done = time.perf_counter() - start
+        await writes
+        return read_done
+
+    # Three writes wait on the loop, so the read gets the second worker.
+    assert asyncio.run(scenario()) < 0.15
+
+
+def test_on_every_thread_reaches_each_worker_once():
+    executor = ToolExecutor(max_workers=4)
+    threads = [future.result() for future in executor.on_every_thread(threading.get_ident)]
+    assert len(set(threads)) == 4
@@ -0,0 +1,96 @@
+"""
+Tests for conversation history windowing in runtime/history.py.
+
+Usage: python -m pytest tests/test_history.py
+"""
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from runtime.history import FOLDED_KEY, SUMMARY_KEY, HistoryWindow, turn_ids
+
+
+def turn(i: int, result_size: int = 50) -> list[types.Content]:
+    return [
+        types.Content(role="user", parts=[types.Part(text=f"question {i}")]),
+        types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            id=f"c{i}", name="list_tasks", args={})
+        )]),
+        types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            id=f"c{i}", name="list_tasks", response={"status": "success", "tasks": "x" * result_size}
+        ))]),
+        types.Content(role="model", parts=[types.Part(text=f"answer {i}")]),
+    ]
+
+
+def conversation(turns: int, result_size: int = 50) -> list[types.Content]:
+    return [content for i in range(turns) for content in turn(i, result_size)]
+
+
+def results(contents):
+    return [p.function_response.response for c in contents for p in c.parts if p.function_response]
+
+
+def test_old_tool_results_are_stubbed_and_recent_turns_kept():
+    window = HistoryWindow(keep_turns=2, token_budget=100_000)
+    contents = conversation(4)
+
+    sent, updates = window.apply(contents, {})
+
+    assert updates == {}
+    assert len(sent) == len(contents)
+    assert [r.get("tasks") is None for r in results(sent)] == [True, True, False, False]
+    assert results(sent)[0]["status"] == "success"
+    # The session's own contents are never modified.
+    assert all("tasks" in r for r in results(contents))
+
+
+def test_old_turns_fold_into_a_rolling_summary():
+    window = HistoryWindow(keep_turns=2, token_budget=600, summary_tokens=1000)
+    state = {}
+    sizes = []
+    folds = 0
+    for turns in range(3, 30):
+        sent, updates = window.apply(conversation(turns, result_size=400), state)
+        state.update(updates)
+        folds += bool(updates)
+        sizes.append(sum(len(c.model_dump_json()) for c in sent))
+
+    # The prompt saw-tooths between the fold target and the budget instead of growing.
+    assert max(sizes[15:]) <= max(sizes[:15])
+    assert len(state[FOLDED_KEY]) >= 20
+    assert state[SUMMARY_KEY][0] == "- User: question 0 | tools: list_tasks | answer: answer 0"
+    # Folding is batched: most calls leave the summary alone.
+    assert folds < 27 / 2
+
+
+def test_summary_is_capped():
+    window = HistoryWindow(keep_turns=1, token_budget=200, summary_tokens=40)
+
+    _, updates = window.apply(conversation(20, result_size=400), {})
+
+    assert len(updates[FOLDED_KEY]) == 19
+    assert 0 < len(updates[SUMMARY_KEY]) < 19
+    assert updates[SUMMARY_KEY][-1].startswith("- User: question 18")
+
+
+def test_repeated_turns_are_folded_by_invocation_not_content():
+    window = HistoryWindow(keep_turns=1, token_budget=300, summary_tokens=1000)
+    contents = [content for _ in range(4) for content in turn(0, result_size=400)]
+    events = [
+        Event(invocation_id=f"inv{i}", author=author, content=content)
+        for i in range(4)
+        for author, content in zip(["user", "assistant", "user", "assistant"], turn(0, 400))
+    ]
+    ids = turn_ids(events, 4)
+    assert ids == ["inv0", "inv1", "inv2", "inv3"]
+
+    state = {}
+    for end in (2, 3, 4):
+        sent, updates = window.apply(contents[:4 * end], state, ids[:end])
+        state.update(updates)
+        # Earlier turns are either folded into the summary or still sent.
+        assert len(state.get(SUMMARY_KEY, [])) + len(sent) // 4 == end
+
+    assert state[FOLDED_KEY] == ["inv0", "inv1"]
+    assert turn_ids(events[4:], 4) == [None, "inv1", "inv2", "inv3"]
@@ -0,0 +1,91 @@
+"""
+Tests for streamed turns and the interactive loop in main.py.
+
+Usage: python -m pytest tests/test_main.py
+"""
+
+import asyncio
+import io
+import signal
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+from rich.console import Console
+
+import main
+from runtime import answer_cache
+
+
+def model_event(*parts: types.Part, partial: bool = False) -> Event:
+    return Event(author="assistant", partial=partial,
+                 content=types.Content(role="model", parts=list(parts)))
+
+
+TURN = [
+    model_event(types.Part(function_call=types.FunctionCall(
+        id="c1", name="list_upcoming_events", args={}))),
+    Event(author="assistant", content=types.Content(role="user", parts=[
+        types.Part(function_response=types.FunctionResponse(
+            id="c1", name="list_upcoming_events", response={"status": "success"}))])),
+    model_event(types.Part(text="You have "), partial=True),
+    model_event(types.Part(text="two meetings."), partial=True),
+    model_event(types.Part(text="You have two meetings.")),
+]
+
+
+class FakeRunner:
+    """Runner whose run_async replays scripted events, or fails or hangs on cue."""
+
+    plugin_manager = SimpleNamespace(get_plugin=lambda name: None)
+
+    def __init__(self):
+        self.queries = []
+
+    async def run_async(self, *, user_id, session_id, new_message, run_config):
+        query = new_message.parts[0].text
+        self.queries.append(query)
+        if query == "fail":
+            raise RuntimeError("model unavailable")
+        if query == "hang":
+            # What Ctrl-C does: asyncio.Runner turns SIGINT into cancelling the turn.
+            signal.raise_signal(signal.SIGINT)
+            await asyncio.sleep(10)
+        for event in TURN:
+            yield event
+
+
+@pytest.fixture
+def output(monkeypatch):
+    buffer = io.StringIO()
+    monkeypatch.setattr(main, "console", Console(file=buffer, width=100))
+    monkeypatch.setattr(answer_cache, "get_answer_cache", lambda: None)
+    return buffer
+
+
+def test_stream_query_prints_progress_and_returns_the_final_text(output):
+    text = asyncio.run(main.stream_query(FakeRunner(), "meetings?"))
+
+    assert text == "You have two meetings."
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "→ list_upcoming_events"
+    assert lines[1].startswith("✓ list_upcoming_events (")
+    assert "You have two meetings." in output.getvalue()
+
+
+def test_interactive_turn_errors_and_ctrl_c_do_not_end_the_loop(output, monkeypatch):
+    queries = iter(["fail", "hang", "meetings?", "quit"])
+    monkeypatch.setattr(main.Prompt, "ask", lambda *args, **kwargs: next(queries))
+    runner = FakeRunner()
+    runner_future = Future()
+    runner_future.set_result(runner)
+
+    main.interactive_mode(runner_future)
+
+    assert runner.queries == ["fail", "hang", "meetings?"]
+    printed = output.getvalue()
+    assert "Error: model unavailable" in printed and "Traceback" not in printed
+    assert "(cancelled)" in printed
+    assert printed.rindex("You have two meetings.") > printed.index("(cancelled)")
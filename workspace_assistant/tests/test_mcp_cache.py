@@ -0,0 +1,78 @@
+"""
+Tests for the read-only MCP response cache in tools/mcp_cache.py.
+
+Usage: python -m pytest tests/test_mcp_cache.py
+"""
+
+import asyncio
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+from tools.mcp_cache import CachingMcpToolset, ResponseCache, cache_key
+
+
+class CountingTool(BaseTool):
+    def __init__(self, name: str):
+        super().__init__(name=name, description=name)
+        self.calls = 0
+
+    async def run_async(self, *, args, tool_context):
+        self.calls += 1
+        return {"content": [{"type": "text", "text": f"{self.name} #{self.calls}"}]}
+
+
+class FakeToolset(BaseToolset):
+    def __init__(self, *names):
+        super().__init__()
+        self.tools = {name: CountingTool(name) for name in names}
+
+    async def get_tools(self, readonly_context=None):
+        return list(self.tools.values())
+
+
+def run(toolset, name, **args):
+    async def go():
+        tools = {tool.name: tool for tool in await toolset.get_tools()}
+        return await tools[name].run_async(args=args, tool_context=None)
+    return asyncio.run(go())
+
+
+def test_key_ignores_argument_order_case_and_none():
+    a = cache_key("list_issues", {"owner": "Octocat", "repo": "Hello", "state": None})
+    b = cache_key("list_issues", {"repo": "hello ", "owner": "octocat"})
+    assert a == b
+    assert a != cache_key("list_issues", {"owner": "octocat", "repo": "other"})
+
+
+def test_reads_are_cached_and_writes_invalidate_their_repo():
+    fake = FakeToolset("list_issues", "create_issue")
+    cache = ResponseCache(ttl=60)
+    toolset = CachingMcpToolset(fake, cache)
+
+    run(toolset, "list_issues", owner="o", repo="a")
+    run(toolset, "list_issues", owner="o", repo="a")
+    run(toolset, "list_issues", owner="o", repo="b")
+    assert fake.tools["list_issues"].calls == 2
+
+    run(toolset, "create_issue", owner="o", repo="a", title="t")
+    run(toolset, "list_issues", owner="o", repo="a")
+    run(toolset, "list_issues", owner="o", repo="b")
+    assert fake.tools["list_issues"].calls == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["hit_rate"] == 0.4
+
+
+def test_cache_is_bounded_and_expires():
+    cache = ResponseCache(ttl=60, max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", {"i": i})
+    assert cache.get("k0") == (False, None)
+    assert cache.get("k2") == (True, {"i": 2})
+    assert cache.stats()["evictions"] == 1
+
+    expired = ResponseCache(ttl=0)
+    expired.put("k", {"i": 0})
+    assert expired.get("k") == (False, None)
@@ -0,0 +1,97 @@
+"""
+Tests for the shared MCP server pool in tools/mcp_pool.py.
+
+Runs against tests/fixtures/stub_mcp_server.py, so no Node.js or GitHub
+token is needed.
+
+Usage: python -m pytest tests/test_mcp_pool.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from mcp import StdioServerParameters
+
+from tools.mcp_pool import McpServerPool
+
+STUB_SERVER = Path(__file__).parent / "fixtures" / "stub_mcp_server.py"
+
+
+def stub_params(**env) -> StdioConnectionParams:
+    return StdioConnectionParams(
+        server_params=StdioServerParameters(
+            command=sys.executable, args=[str(STUB_SERVER)], env={**os.environ, **env}
+        ),
+        timeout=10,
+    )
+
+
+def get_tool(toolset, name):
+    tools = asyncio.run(toolset.get_tools())
+    return next(tool for tool in tools if tool.name == name)
+
+
+def call(tool, **args):
+    result = asyncio.run(tool.run_async(args=args, tool_context=None))
+    return json.loads(result["content"][0]["text"])
+
+
+def test_toolsets_share_one_connection_across_loops():
+    pool = McpServerPool(health_interval=0)
+    try:
+        first = pool.register("github", stub_params())
+        second = pool.register("github", stub_params())
+        pool.warm_up()["github"].result(10)
+
+        issues = call(get_tool(first, "list_issues"), owner="o", repo="r")
+        issue = call(get_tool(second, "get_issue"), owner="o", repo="r", issue_number=7)
+
+        assert len(issues) == 5 and issue["number"] == 7
+        stats = pool.metrics.snapshot()
+        assert stats["servers"]["github"]["connects"] == 1
+        assert stats["tools"]["list_issues"]["calls"] == 1
+    finally:
+        pool.close()
+
+
+def test_tool_filter_limits_declarations():
+    pool = McpServerPool(health_interval=0)
+    try:
+        pool.register("github", stub_params())
+        toolset = pool.toolset("github", tool_filter=["get_issue", "list_issues"])
+        names = {tool.name for tool in asyncio.run(toolset.get_tools())}
+        assert names == {"get_issue", "list_issues"}
+    finally:
+        pool.close()
+
+
+def test_server_recovers_after_crash_and_restart():
+    pool = McpServerPool(health_interval=0)
+    try:
+        toolset = pool.register("github", stub_params(STUB_MCP_EXIT_AFTER="1"))
+        tool = get_tool(toolset, "list_commits")
+        assert len(call(tool, owner="o", repo="r")) == 5
+
+        # The stub exits on its second call.
+        result = None
+        try:
+            result = asyncio.run(tool.run_async(args={"owner": "o", "repo": "r"},
+                                                tool_context=None))
+        except Exception:
+            pass
+        assert result is None or "error" in result
+
+        server = pool.server("github")
+        assert pool.submit(server.check_health()).result(20)
+        assert len(call(tool, owner="o", repo="r")) == 5
+
+        pool.submit(server.restart()).result(20)
+        assert len(call(tool, owner="o", repo="r")) == 5
+        stats = pool.metrics.snapshot()["servers"]["github"]
+        assert stats["restarts"] == 1 and stats["connects"] == 2
+    finally:
+        pool.close()
@@ -0,0 +1,67 @@
+"""
+Tests for the prefetching page iterators in tools/pagination.py.
+
+Usage: python -m pytest tests/test_pagination.py
+"""
+
+import threading
+import time
+
+from tools.pagination import iter_items, iter_pages, partial_fields
+
+
+class FakeRequest:
+    def __init__(self, pages, token, log, delay):
+        self.pages, self.token, self.log, self.delay = pages, token, log, delay
+
+    def execute(self):
+        self.log.append(self.token)
+        time.sleep(self.delay)
+        index = int(self.token or 0)
+        page = {"items": self.pages[index]}
+        if index + 1 < len(self.pages):
+            page["nextPageToken"] = str(index + 1)
+        return page
+
+
+def fake_list(pages, delay=0.0):
+    log = []
+    return (lambda token: FakeRequest(pages, token, log, delay)), log
+
+
+def test_items_follow_page_tokens_and_stop_early():
+    request, log = fake_list([[1, 2], [3, 4], [5, 6], [7, 8]])
+
+    assert list(iter_items(request)) == [1, 2, 3, 4, 5, 6, 7, 8]
+
+    log.clear()
+    assert list(iter_items(request, where=lambda n: n % 2 == 1, limit=2, prefetch=False)) == [1, 3]
+    assert log == [None, "1"]
+
+
+def test_next_page_is_fetched_while_the_current_one_is_processed():
+    request, _ = fake_list([[i] for i in range(4)], delay=0.05)
+
+    start = time.perf_counter()
+    for _ in iter_pages(request):
+        time.sleep(0.05)
+    overlapped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in iter_pages(request, prefetch=False):
+        time.sleep(0.05)
+    sequential = time.perf_counter() - start
+
+    assert overlapped < sequential * 0.8
+
+
+def test_requests_are_built_on_the_fetching_thread_and_fields_are_partial():
+    threads = []
+
+    def request(token):
+        threads.append(threading.current_thread().name)
+        return FakeRequest([[1], [2]], token, [], 0.0)
+
+    assert list(iter_items(request)) == [1, 2]
+    assert all(name.startswith("page") for name in threads)
+    assert partial_fields("id,title") == "nextPageToken,items(id,title)"
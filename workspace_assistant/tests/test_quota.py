@@ -0,0 +1,139 @@
+"""
+Tests for the client-side quota scheduler in tools/quota.py.
+
+Usage: python -m pytest tests/test_quota.py
+"""
+
+import asyncio
+import time
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from tools.auth import current_user
+from tools.quota import BULK, CircuitOpen, QuotaScheduler, RateLimited, mcp_rate_limit
+
+TASKS_URI = "https://tasks.googleapis.com/tasks/v1/lists/%40default/tasks"
+
+
+def http_error(status: int, content: bytes = b"{}", retry_after: str | None = None) -> HttpError:
+    headers = {"status": status}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    return HttpError(httplib2.Response(headers), content)
+
+
+class FakeRequest:
+    """Request that raises the given errors before returning a response."""
+
+    uri = TASKS_URI
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = 0
+
+    def execute(self):
+        self.sent += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"items": []}
+
+
+def test_bulk_calls_leave_headroom_and_users_get_their_own_buckets():
+    scheduler = QuotaScheduler(rates={"tasks": 20}, user_rate=10)  # buckets of 200 and 100
+
+    assert scheduler.acquire("tasks", BULK, cost=68) == 0
+    # 30 tokens are left in this user's bucket: reads may use them, bulk may not.
+    assert scheduler.acquire("tasks", cost=2) == 0
+    assert scheduler.acquire("tasks", BULK, cost=1) >= 0.09
+
+    token = current_user.set("bob")
+    try:
+        assert scheduler.acquire("tasks", BULK, cost=10) == 0
+    finally:
+        current_user.reset(token)
+    # Untracked APIs are never delayed.
+    assert scheduler.acquire("people", BULK, cost=1000) == 0
+
+    tasks = scheduler.snapshot()["tasks"]
+    assert tasks["users"] == 2 and tasks["min_user_headroom"] < 0.4
+    assert 0.55 < tasks["headroom"] < 0.7
+
+
+def test_retries_honor_retry_after_with_jitter():
+    scheduler = QuotaScheduler(rates={"tasks": 10}, max_retries=3, retry_delay=0.05)
+    assert all(7 <= scheduler.backoff(0, retry_after=7) <= 7.05 for _ in range(50))
+    assert all(0 <= scheduler.backoff(3) <= 0.4 for _ in range(50))
+
+    request = FakeRequest([
+        http_error(429, retry_after="0.2"),
+        http_error(403, b'{"error": {"errors": [{"reason": "userRateLimitExceeded"}]}}'),
+    ])
+    start = time.monotonic()
+    assert scheduler.execute(request) == {"items": []}
+
+    assert request.sent == 3 and time.monotonic() - start >= 0.2
+    tasks = scheduler.snapshot()["tasks"]
+    assert tasks["throttled"] == 2 and tasks["retries"] == 2
+    # Throttling slowed the whole API down.
+    assert tasks["rate_per_s"] < 10
+    # A Retry-After pauses the API for every caller, not just the throttled one.
+    scheduler.record("tasks", http_error(429, retry_after="0.2"))
+    assert scheduler.acquire("tasks") >= 0.15
+
+    scheduler = QuotaScheduler(max_retries=3, retry_delay=0.01)
+    missing = FakeRequest([http_error(404)])
+    with pytest.raises(HttpError):
+        scheduler.execute(missing)
+    assert missing.sent == 1
+
+    failing = FakeRequest([http_error(503)] * 5)
+    with pytest.raises(HttpError):
+        scheduler.execute(failing)
+    assert failing.sent == 4
+
+
+def test_circuit_opens_on_error_spike_and_closes_after_a_good_trial():
+    scheduler = QuotaScheduler(max_retries=0, circuit_cooldown=0.1)
+    for _ in range(10):
+        with pytest.raises(HttpError):
+            scheduler.execute(FakeRequest([http_error(503)]))
+
+    request = FakeRequest()
+    with pytest.raises(CircuitOpen):
+        scheduler.execute(request)
+    assert request.sent == 0
+    assert scheduler.snapshot()["tasks"]["circuit"] == "open"
+
+    time.sleep(0.15)
+    assert scheduler.execute(request) == {"items": []}
+    tasks = scheduler.snapshot()["tasks"]
+    assert tasks["circuit"] == "closed" and tasks["circuit_trips"] == 1
+
+
+def test_rate_limited_mcp_results_are_retried():
+    limited = {"isError": True, "content": [
+        {"type": "text", "text": "403 You have exceeded a secondary rate limit. Retry after 0"}
+    ]}
+    assert mcp_rate_limit(limited).retry_after == 0
+    assert mcp_rate_limit({"isError": True, "content": [{"text": "Not Found"}]}) is None
+    assert mcp_rate_limit({"content": [{"text": "rate limits explained"}]}) is None
+
+    results = [limited, limited, {"content": [{"text": "ok"}]}]
+    scheduler = QuotaScheduler(rates={"github": 100}, max_retries=3, retry_delay=0.01)
+
+    async def call():
+        result = results.pop(0)
+        throttled = mcp_rate_limit(result)
+        if throttled is not None:
+            raise throttled
+        return result
+
+    def rate_limited(error):
+        return isinstance(error, RateLimited)
+
+    result = asyncio.run(scheduler.call_async("github", call, retry_on=rate_limited))
+
+    assert result == {"content": [{"text": "ok"}]}
+    assert scheduler.snapshot()["github"]["retries"] == 2
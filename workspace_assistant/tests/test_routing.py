@@ -0,0 +1,100 @@
+"""
+Tests for fast/capable model routing in runtime/routing.py.
+
+Usage: python -m pytest tests/test_routing.py
+"""
+
+import asyncio
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from runtime.routing import CAPABLE, FAST, ModelRouter, classify_query
+
+
+def whoami() -> dict:
+    """Return the name of the user."""
+    return {"status": "success", "user": "alice"}
+
+
+class ScriptedLlm(BaseLlm):
+    """Calls a tool, then answers with its result; 'broken' makes it call tool_name."""
+
+    tool_name: str = "whoami"
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        last = llm_request.contents[-1]
+        results = [p.function_response for p in last.parts if p.function_response]
+        first = next(c for c in llm_request.contents if c.role == "user").parts[0].text
+        if results:
+            part = types.Part(text=f"{self.model}: you are {results[0].response['user']}.")
+        elif "broken" in last.parts[0].text:
+            part = types.Part(function_call=types.FunctionCall(name=self.tool_name, args={}))
+        elif last.parts[0].text in ("yes", "thanks") and first != last.parts[0].text:
+            part = types.Part(text=f"{self.model}: done.")
+        else:
+            part = types.Part(function_call=types.FunctionCall(name="whoami", args={}))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]),
+                          usage_metadata=types.GenerateContentResponseUsageMetadata(
+                              prompt_token_count=1000, candidates_token_count=100))
+
+
+def test_classify_query_sends_planning_to_the_capable_tier():
+    assert classify_query("What meetings do I have today?")[0] == FAST
+    assert classify_query("Mark 'Renew license #3' as done")[0] == FAST
+    assert classify_query("List open issues in acme/api")[0] == FAST
+    assert classify_query("Find a time for a 1:1 with Bob next week") == (
+        CAPABLE, "planning (find a time)")
+    assert classify_query("Which of my tasks relate to today's meetings?")[0] == CAPABLE
+    assert classify_query("Reschedule my 3pm to tomorrow")[0] == CAPABLE
+    assert classify_query("word " * 41)[0] == CAPABLE
+
+
+def test_turns_are_routed_escalated_and_accounted_per_tier():
+    fast = ScriptedLlm(model="fast-model", tool_name="who_am_i")
+    capable = ScriptedLlm(model="capable-model")
+    router = ModelRouter(fast, capable, prices={FAST: (0.1, 0.4), CAPABLE: (1.0, 10.0)})
+    agent = LlmAgent(name="assistant", model=router.model(), tools=[whoami],
+                     before_model_callback=router.before_model,
+                     after_model_callback=router.after_model)
+    runner = InMemoryRunner(agent=agent)
+    runner.auto_create_session = True
+
+    def ask(text: str) -> tuple[str, list]:
+        async def run():
+            answer, tiers = "", []
+            async for event in runner.run_async(
+                user_id="u", session_id="s",
+                new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+            ):
+                if event.author == "assistant":
+                    tiers.append((event.custom_metadata or {}).get("model_tier"))
+                if event.content and event.content.parts and event.content.parts[0].text:
+                    answer = event.content.parts[0].text
+            return answer, tiers
+        return asyncio.run(run())
+
+    assert ask("who am I?") == ("fast-model: you are alice.", [FAST, None, FAST])
+    assert ask("Plan my day, then tell me who I am") == (
+        "capable-model: you are alice.", [CAPABLE, None, CAPABLE])
+
+    # The fast model calls a tool that does not exist: the capable model
+    # answers the same request and keeps the rest of the turn.
+    answer, tiers = ask("broken: who is on my calendar?")
+    assert answer == "capable-model: you are alice." and tiers == [CAPABLE, None, CAPABLE]
+    # A short follow-up stays on the tier the previous turn ended on.
+    assert ask("yes") == ("capable-model: done.", [CAPABLE])
+
+    stats = router.stats()
+    assert (fast.calls, capable.calls) == (3, 5)
+    assert {tier: stats[tier]["turns"] for tier in stats} == {FAST: 2, CAPABLE: 2}
+    assert stats[FAST]["escalations"] == 1 and stats[CAPABLE]["escalations"] == 0
+    assert stats[FAST]["prompt_tokens"] == 3000 and stats[CAPABLE]["output_tokens"] == 500
+    assert stats[FAST]["cost_usd"] == round((3000 * 0.1 + 300 * 0.4) / 1e6, 6)
+    assert stats[CAPABLE]["cost_usd"] == round((5000 * 1.0 + 500 * 10.0) / 1e6, 6)
+    assert stats[FAST]["mean_s"] is not None
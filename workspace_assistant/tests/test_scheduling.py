@@ -0,0 +1,77 @@
+"""
+Tests for the scheduling engine in tools/scheduling.py.
+
+Usage: python -m pytest tests/test_scheduling.py
+"""
+
+import random
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from tools.scheduling import (
+    IntervalTree,
+    WorkingHours,
+    event_bounds,
+    find_free_slots,
+    merge_busy,
+)
+
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    intervals = []
+    for i in range(500):
+        start = rng.uniform(0, 10_000)
+        intervals.append((start, start + rng.uniform(1, 300), i))
+    tree = IntervalTree(intervals)
+
+    for _ in range(200):
+        qs = rng.uniform(0, 10_000)
+        qe = qs + rng.uniform(1, 500)
+        expected = {i for s, e, i in intervals if s < qe and e > qs}
+        assert set(tree.overlapping(qs, qe)) == expected
+
+
+def test_overlapping_pairs():
+    tree = IntervalTree([(0, 10, "a"), (5, 15, "b"), (15, 20, "c"), (16, 18, "d")])
+    assert {frozenset(p) for p in tree.overlapping_pairs()} == {
+        frozenset("ab"), frozenset("cd"),
+    }
+
+
+def test_merge_busy_unions_participants():
+    merged = merge_busy([(0, 10), (20, 30)], [(5, 12), (30, 35)], [])
+    assert merged.tolist() == [[0, 12], [20, 35]]
+
+
+def test_all_day_event_uses_calendar_zone():
+    zone = ZoneInfo("America/Los_Angeles")
+    start, end = event_bounds({"start": {"date": "2025-03-14"}, "end": {"date": "2025-03-15"}}, zone)
+    assert datetime.fromtimestamp(start, zone) == datetime(2025, 3, 14, tzinfo=zone)
+    assert end - start == 24 * 3600
+
+
+def test_free_slots_respect_busy_time_and_working_hours():
+    zone = ZoneInfo("Europe/Berlin")
+    day = datetime(2025, 3, 14, tzinfo=zone)  # a Friday
+    busy = merge_busy([
+        (day.replace(hour=10).timestamp(), day.replace(hour=11, minute=30).timestamp()),
+    ])
+    hours = WorkingHours(time(9), time(17), zone=zone)
+
+    slots = find_free_slots(busy, day, day + timedelta(days=3), 60, [hours])
+
+    assert [(s.astimezone(zone).hour, e.astimezone(zone).strftime("%H:%M")) for s, e in slots] == [
+        (9, "10:00"), (11, "17:00"),
+    ]
+
+
+def test_free_slots_intersect_working_hours_across_zones():
+    start = datetime(2025, 3, 12, tzinfo=timezone.utc)  # a Wednesday
+    berlin = WorkingHours(time(9), time(17), zone=ZoneInfo("Europe/Berlin"))
+    new_york = WorkingHours(time(9), time(17), zone=ZoneInfo("America/New_York"))
+
+    slots = find_free_slots(merge_busy(), start, start + timedelta(days=1), 30, [berlin, new_york])
+
+    # Berlin is UTC+1 and New York UTC-4 that week: overlap is 13:00-16:00 UTC.
+    assert slots == [(start.replace(hour=13), start.replace(hour=16))]
@@ -0,0 +1,145 @@
+"""
+Tests for the multi-user HTTP server in runtime/server.py.
+
+Usage: python -m pytest tests/test_server.py
+"""
+
+import asyncio
+import json
+import stat
+
+import httpx
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from runtime.server import AgentServer, create_app, is_loopback
+from tools import auth
+
+
+def whoami() -> dict:
+    """Return the user the tool is running for."""
+    return {"status": "success", "user": auth.current_user.get()}
+
+
+class ScriptedLlm(BaseLlm):
+    """Calls whoami once, then answers with its result; each call waits delay seconds."""
+
+    model: str = "scripted"
+    delay: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        await asyncio.sleep(self.delay)
+        last = llm_request.contents[-1]
+        results = [p.function_response for p in last.parts if p.function_response]
+        if results:
+            part = types.Part(text=f"You are {results[0].response['user']}.")
+        else:
+            part = types.Part(function_call=types.FunctionCall(name="whoami", args={}))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def runner_factory(delay: float = 0.0):
+    def build():
+        agent = LlmAgent(name="assistant", model=ScriptedLlm(delay=delay), tools=[whoami])
+        runner = InMemoryRunner(agent=agent)
+        runner.auto_create_session = True
+        return runner
+    return build
+
+
+async def serve(server: AgentServer, requests, api_key: str | None = None):
+    """Run the app around a batch of request coroutines built from a client."""
+    app = create_app(server, api_key=api_key)
+    await server.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await requests(client)
+    finally:
+        await server.stop()
+
+
+def test_chat_runs_tools_as_the_calling_user():
+    server = AgentServer(runner_factory(), runners=2, concurrency=2)
+
+    async def requests(client):
+        return await asyncio.gather(
+            client.post("/v1/chat", json={"message": "who am I?"},
+                        headers={"X-User-Id": "alice", "Authorization": "Bearer k"}),
+            client.post("/v1/chat", json={"message": "who am I?", "session_id": "s2"},
+                        headers={"X-User-Id": "bob", "Authorization": "Bearer k"}),
+            client.post("/v1/chat", json={"message": "who am I?"},
+                        headers={"Authorization": "Bearer k"}),
+            client.post("/v1/chat", json={"message": "who am I?"},
+                        headers={"X-User-Id": "alice", "Authorization": "Bearer nope"}),
+            client.get("/healthz"),
+        )
+
+    alice, bob, anonymous, bad_key, health = asyncio.run(serve(server, requests, api_key="k"))
+
+    assert alice.json()["answer"] == "You are alice."
+    assert alice.json()["tools"] == ["whoami"]
+    assert bob.json() | {"turn_s": 0} == {
+        "session_id": "s2", "answer": "You are bob.", "cached": False,
+        "tools": ["whoami"], "turn_s": 0,
+    }
+    assert anonymous.status_code == 401 and bad_key.status_code == 401
+    assert health.json()["workers"] == 2 and health.json()["runners"] == 2
+
+
+def test_overload_is_rejected_instead_of_queued():
+    server = AgentServer(runner_factory(delay=0.2), runners=1, concurrency=1,
+                         queue_size=2, user_concurrency=2)
+
+    async def requests(client):
+        return await asyncio.gather(*(
+            client.post("/v1/chat", json={"message": "who am I?", "session_id": f"s{i}"},
+                        headers={"X-User-Id": f"user{i % 3}"})
+            for i in range(8)
+        ))
+
+    responses = asyncio.run(serve(server, requests))
+    codes = sorted(r.status_code for r in responses)
+
+    # One turn running plus a full queue, at most; the rest are turned away.
+    assert 2 <= codes.count(200) <= 3
+    assert set(codes) <= {200, 429, 503}
+    busy = [r for r in responses if r.status_code == 503]
+    assert busy and all(int(r.headers["Retry-After"]) >= 1 for r in busy)
+    assert server.stats()["rejected"] == 8 - codes.count(200)
+
+
+def test_credentials_are_stored_per_user(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "USERS_DIR", tmp_path / "users")
+    server = AgentServer(runner_factory(), runners=1, concurrency=1)
+    token = {"client_id": "id", "client_secret": "secret", "refresh_token": "r",
+             "token": "t", "type": "authorized_user"}
+
+    key = {"Authorization": "Bearer k"}
+
+    async def requests(client):
+        return await asyncio.gather(
+            client.put("/v1/credentials", json=token, headers={"X-User-Id": "alice", **key}),
+            client.put("/v1/credentials", json={"token": "t"}, headers={"X-User-Id": "bob", **key}),
+            client.put("/v1/credentials", json=token, headers={"X-User-Id": "../alice", **key}),
+        )
+
+    stored, incomplete, traversal = asyncio.run(serve(server, requests, api_key="k"))
+
+    async def without_key(client):
+        return await client.put("/v1/credentials", json=token, headers={"X-User-Id": "carol"})
+
+    server = AgentServer(runner_factory(), runners=1, concurrency=1)
+    assert asyncio.run(serve(server, without_key)).status_code == 403
+    assert not (tmp_path / "users" / "carol").exists()
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and not is_loopback("0.0.0.0")
+
+    assert stored.status_code == 204
+    path = tmp_path / "users" / "alice" / "token.json"
+    assert json.loads(path.read_text()) == token
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert incomplete.status_code == 400 and traversal.status_code == 401
+    assert not (tmp_path / "users" / "bob").exists()
@@ -0,0 +1,142 @@
+"""
+Tests for the SQLite session service in runtime/sessions.py.
+
+Usage: python -m pytest tests/test_sessions.py
+"""
+
+import asyncio
+import time
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.genai import types
+
+from runtime import sessions
+from runtime.sessions import SqliteSessionService
+
+APP = "app"
+
+
+def message(author: str, text: str, timestamp: float, **state) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(
+        author=author,
+        invocation_id=f"inv-{timestamp}",
+        timestamp=timestamp,
+        content=types.Content(role=role, parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state),
+    )
+
+
+async def add_turns(service, user_id, session_id, turns, start=1000.0):
+    session = await service.get_session(app_name=APP, user_id=user_id, session_id=session_id)
+    for i in range(turns):
+        await service.append_event(session, message("user", f"question {i}", start + 2 * i))
+        await service.append_event(session, message("assistant", f"answer {i}", start + 2 * i + 1))
+
+
+def test_sessions_and_state_survive_a_restart(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+
+    async def first_process():
+        service = SqliteSessionService(path)
+        session = await service.create_session(app_name=APP, user_id="alice", session_id="s1")
+        await service.append_event(session, message(
+            "user", "hi", time.time(), **{"topic": "calendar", "user:tz": "UTC", "temp:x": 1}
+        ))
+        service.close()
+
+    async def second_process():
+        service = SqliteSessionService(path)
+        session = await service.get_session(app_name=APP, user_id="alice", session_id="s1")
+        other = await service.create_session(app_name=APP, user_id="alice")
+        return session, other
+
+    asyncio.run(first_process())
+    session, other = asyncio.run(second_process())
+
+    assert [e.content.parts[0].text for e in session.events] == ["hi"]
+    assert session.state == {"topic": "calendar", "user:tz": "UTC"}
+    assert other.state == {"user:tz": "UTC"}
+
+
+def test_history_is_windowed_and_older_events_load_lazily():
+    service = SqliteSessionService(":memory:", history_events=5)
+
+    async def scenario():
+        await service.create_session(app_name=APP, user_id="alice", session_id="s1")
+        await add_turns(service, "alice", "s1", turns=10)
+        session = await service.get_session(app_name=APP, user_id="alice", session_id="s1")
+        older = service.older_events(APP, "alice", "s1", before=session.events[0].timestamp, limit=4)
+        return session, older
+
+    session, older = asyncio.run(scenario())
+
+    # The last 5 events start mid-turn with an answer, which is dropped.
+    assert [e.content.parts[0].text for e in session.events] == [
+        "question 8", "answer 8", "question 9", "answer 9"
+    ]
+    assert [e.content.parts[0].text for e in older] == [
+        "question 6", "answer 6", "question 7", "answer 7"
+    ]
+
+
+def test_retention_trims_events_and_keeps_users_apart():
+    service = SqliteSessionService(":memory:", max_events=6, retention_days=1)
+
+    async def scenario():
+        for user in ("alice", "bob"):
+            await service.create_session(app_name=APP, user_id=user, session_id="s1")
+        await add_turns(service, "alice", "s1", turns=10, start=time.time())
+        await add_turns(service, "bob", "s1", turns=1, start=time.time() - 3 * 86400)
+        return await service.list_sessions(app_name=APP)
+
+    asyncio.run(scenario())
+
+    assert service.event_count(APP, "alice", "s1") == 6
+    assert service.event_count(APP, "bob", "s1") == 2
+    assert service.purge_expired() == 1
+    remaining = asyncio.run(service.list_sessions(app_name=APP)).sessions
+    assert [(s.user_id, s.id) for s in remaining] == [("alice", "s1")]
+
+
+def tool_round(i: int, timestamp: float) -> list[Event]:
+    call = types.FunctionCall(id=f"c{i}", name="list_tasks", args={})
+    response = types.FunctionResponse(id=f"c{i}", name="list_tasks", response={"n": i})
+    return [
+        Event(author="assistant", invocation_id="inv", timestamp=timestamp,
+              content=types.Content(role="model", parts=[types.Part(function_call=call)])),
+        Event(author="user", invocation_id="inv", timestamp=timestamp + 0.5,
+              content=types.Content(role="user", parts=[types.Part(function_response=response)])),
+    ]
+
+
+def test_a_turn_longer_than_the_window_is_loaded_from_its_start(monkeypatch):
+    monkeypatch.setattr(sessions, "PURGE_INTERVAL", 0)
+    service = SqliteSessionService(":memory:", history_events=3, retention_days=1)
+
+    now = time.time()
+
+    async def scenario():
+        for session_id in ("s1", "orphans", "old"):
+            await service.create_session(app_name=APP, user_id="alice", session_id=session_id)
+        await add_turns(service, "alice", "s1", turns=1, start=now)
+        session = await service.get_session(app_name=APP, user_id="alice", session_id="s1")
+        await service.append_event(session, message("user", "long question", now + 10))
+        orphans = await service.get_session(app_name=APP, user_id="alice", session_id="orphans")
+        for i in range(4):
+            for event in tool_round(i, now + 20 + i):
+                await service.append_event(session, event)
+                await service.append_event(orphans, event.model_copy())
+        await add_turns(service, "alice", "old", turns=1, start=time.time() - 3 * 86400)
+        return [await service.get_session(app_name=APP, user_id="alice", session_id=session_id)
+                for session_id in ("s1", "orphans", "old")]
+
+    long_turn, orphans, old = asyncio.run(scenario())
+
+    assert long_turn.events[0].content.parts[0].text == "long question"
+    assert len(long_turn.events) == 9
+    # A window of tool calls and results alone is never sent.
+    assert orphans.events == []
+    # Expired sessions are purged while the service keeps running.
+    assert old is None
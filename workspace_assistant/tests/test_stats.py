@@ -0,0 +1,89 @@
+"""
+Tests for per-turn token and timing stats in runtime/stats.py.
+
+Usage: python -m pytest tests/test_stats.py
+"""
+
+import asyncio
+import json
+import time
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from runtime.stats import StatsPlugin, estimate_tokens, turn_table
+
+
+def lookup_weather(city: str) -> dict:
+    """Look up the weather for a city.
+
+    Args:
+        city: City name.
+    """
+    time.sleep(0.05)
+    return {"status": "success", "city": city, "forecast": "sunny " * 20}
+
+
+class ScriptedLlm(BaseLlm):
+    """Calls lookup_weather once, then answers; reports usage metadata."""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1]
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=100, candidates_token_count=7
+        )
+        if any(part.function_response for part in last.parts):
+            part = types.Part(text="It is sunny.")
+        else:
+            part = types.Part(function_call=types.FunctionCall(
+                name="lookup_weather", args={"city": "Paris"}))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]),
+                          usage_metadata=usage)
+
+
+def run_turn(runner, text):
+    async def go():
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        async for _ in runner.run_async(user_id="u", session_id="s", new_message=message):
+            pass
+    asyncio.run(go())
+
+
+def test_turn_stats_are_recorded_and_exported(tmp_path):
+    path = tmp_path / "stats.jsonl"
+    plugin = StatsPlugin(path)
+    agent = LlmAgent(name="a", model=ScriptedLlm(), tools=[lookup_weather])
+    runner = InMemoryRunner(agent=agent, plugins=[plugin])
+    runner.auto_create_session = True
+
+    run_turn(runner, "Weather in Paris?")
+
+    turn = plugin.last()
+    assert turn.llm_calls == 2
+    assert turn.prompt_tokens == 200 and turn.output_tokens == 14
+    assert not turn.estimated
+    assert turn.schema_tokens["test_stats"] > 0
+    assert turn.tool_calls == 1 and turn.tool_result_tokens > 20
+    assert turn.tool_raw_tokens == turn.tool_result_tokens
+    assert turn.tool_s["lookup_weather"] >= 0.05
+    assert turn.wall_s >= turn.tool_s["lookup_weather"]
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[0])["invocation_id"] == turn.invocation_id
+    assert turn_table(turn).row_count > 5
+
+    run_turn(runner, "And tomorrow?")
+    summary = plugin.summary()
+    assert summary["turns"] == 2 and summary["tool_calls"] == 2
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens({"a": 1}) == 2
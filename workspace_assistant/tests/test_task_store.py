@@ -0,0 +1,116 @@
+"""
+Tests for the delta-synced Tasks mirror in tools/task_store.py.
+
+Usage: python -m pytest tests/test_task_store.py
+"""
+
+from benchmarks.fakes import FakeWorkspace, install_fake_google
+from tools import auth, tasks_tools
+from tools.task_store import TaskStore
+
+
+def task(task_id, title, updated, status="needsAction", **fields):
+    return {"id": task_id, "title": title, "status": status, "updated": updated,
+            "position": task_id, **fields}
+
+
+class FakeService:
+    """tasklists().list and tasks().list returning canned pages."""
+
+    def __init__(self, tasklists, pages):
+        self.tasklists_pages = list(tasklists)
+        self.pages = list(pages)
+        self.calls = []
+
+    def tasklists(self):
+        return self
+
+    def tasks(self):
+        return self
+
+    def list(self, **params):
+        self.calls.append(params)
+        self._next = self.pages.pop(0) if "tasklist" in params else self.tasklists_pages.pop(0)
+        return self
+
+    def execute(self):
+        return self._next
+
+
+def test_delta_sync_pulls_only_changed_lists_and_drops_deleted_tasks():
+    lists = [{"id": "L1", "title": "Mine", "updated": "2025-03-14T10:00:00.000Z"}]
+    changed = [{**lists[0], "updated": "2025-03-14T12:00:00.000Z"}]
+    service = FakeService(
+        [{"items": lists}, {"items": lists}, {"items": changed}],
+        [
+            {"items": [task("a", "Review PR #42", "2025-03-14T09:00:00.000Z", due="2025-03-20"),
+                       task("b", "Book travel", "2025-03-14T10:00:00.000Z", parent="a")]},
+            {"items": [task("a", "Review PR #42", "2025-03-14T11:00:00.000Z", "completed"),
+                       {"id": "b", "deleted": True, "updated": "2025-03-14T12:00:00.000Z"},
+                       task("c", "Renew license", "2025-03-14T12:00:00.000Z")]},
+        ],
+    )
+    store = TaskStore(":memory:", sync_interval=0, service_factory=lambda: service)
+
+    store.sync()
+    assert store.tasks(due_before="2025-03-21") == [
+        {"id": "a", "title": "Review PR #42", "status": "needsAction",
+         "updated": "2025-03-14T09:00:00.000Z", "due": "2025-03-20"},
+    ]
+    assert [t["id"] for t in store.tasks(parent="a")] == ["b"]
+
+    version = store.version()
+    store.sync()  # the list's 'updated' did not move: no task request
+    assert store.version() == version
+    store.sync()
+    assert store.version() == "L1@2025-03-14T12:00:00.000Z"
+
+    task_calls = [call for call in service.calls if "tasklist" in call]
+    assert len(task_calls) == 2 and "updatedMin" not in task_calls[0]
+    assert task_calls[1]["updatedMin"] == "2025-03-14T10:00:00.000Z"
+    assert task_calls[1]["showDeleted"] is True
+    assert [t["id"] for t in store.tasks("@default")] == ["c"]
+    assert [t["id"] for t in store.tasks(show_completed=True)] == ["a", "c"]
+
+
+def test_title_lookup_is_fuzzy_and_completing_by_title_costs_one_patch(monkeypatch):
+    workspace = FakeWorkspace()
+    previous = install_fake_google(workspace)
+    store = TaskStore(":memory:", sync_interval=60)
+    monkeypatch.setattr(tasks_tools, "get_task_store", lambda: store)
+    try:
+        store.sync()
+        score, found = store.find("expnse report 12")[0]
+        assert found["title"] == "Expense report #12" and score < 1
+        assert store.find("renew licence #3")[0][1]["title"] == "Renew license #3"
+        assert store.find("quarterly planning") == []
+
+        workspace.requests.clear()
+        result = tasks_tools.complete_tasks(titles=["review PR #7", "review PR"])
+        assert result["status"] == "partial"
+        assert result["succeeded"] == ["task0061"]
+        assert "matches several tasks" in result["failed"][0]["message"]
+        assert workspace.requests == {"tasks": 1}
+
+        # The PATCH response was written through to the mirror.
+        open_titles = [t["title"] for t in tasks_tools.list_tasks(max_results=100)["tasks"]]
+        assert "Review PR #7" not in open_titles and "Review PR #8" in open_titles
+        assert workspace.requests == {"tasks": 1}
+    finally:
+        auth._pool = previous
+
+
+def test_exact_titles_outrank_longer_ones_in_any_script():
+    store = TaskStore(":memory:", service_factory=None)
+    store.put("@default", [
+        task("a", "Review PR", "2025-03-14T09:00:00.000Z"),
+        task("b", "Review PR #42", "2025-03-14T09:00:00.000Z"),
+        task("c", "Купить молоко", "2025-03-14T09:00:00.000Z"),
+        task("d", "牛乳を買う", "2025-03-14T09:00:00.000Z"),
+    ])
+
+    (exact, first), (fuzzy, second) = store.find("review PR")[:2]
+    assert (first["id"], second["id"]) == ("a", "b") and exact == 1.0 > fuzzy
+    assert store.find("купить МОЛОКО")[0] == (1.0, store.tasks()[2])
+    assert store.find("купить молоко!")[0][1]["id"] == "c"
+    assert store.find("牛乳を買う")[0][1]["id"] == "d"
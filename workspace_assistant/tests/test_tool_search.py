@@ -0,0 +1,111 @@
+"""
+Tests for the GitHub tool search index in tools/tool_search.py.
+
+Usage: python -m pytest tests/test_tool_search.py
+"""
+
+import asyncio
+import importlib.util
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+import tools.mcp_tools as mcp_tools
+from tools.tool_search import ToolIndex
+
+_spec = importlib.util.spec_from_file_location(
+    "stub_mcp_server", Path(__file__).parent / "fixtures" / "stub_mcp_server.py"
+)
+stub = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stub)
+
+DESCRIPTORS = [
+    {"name": t["name"], "description": t["description"], "parameters": t["inputSchema"]}
+    for t in stub.TOOLS
+]
+
+
+def top(index, query):
+    return index.search(query, k=1)[0][0]["name"]
+
+
+def test_ranking_uses_names_descriptions_and_synonyms():
+    index = ToolIndex(DESCRIPTORS)
+    assert top(index, "show open PRs") == "list_pull_requests"
+    assert top(index, "log a new bug") == "create_issue"
+    assert top(index, "read the README") == "get_file_contents"
+    assert top(index, "commit history of main") == "list_commits"
+    assert index.search("weather forecast") == []
+
+
+def test_index_is_persisted_and_rebuilt_when_tools_change(tmp_path):
+    path = tmp_path / "index.json"
+    first = ToolIndex.load_or_build(DESCRIPTORS, path)
+    assert ToolIndex.load(path).digest == first.digest
+    assert top(ToolIndex.load(path), "show open PRs") == "list_pull_requests"
+
+    changed = DESCRIPTORS + [{"name": "merge_pull_request", "description": "Merge a PR",
+                              "parameters": {}}]
+    second = ToolIndex.load_or_build(changed, path)
+    assert second.digest != first.digest
+    assert ToolIndex.load(path).get("merge_pull_request") is not None
+
+
+def test_search_is_sub_millisecond():
+    index = ToolIndex(DESCRIPTORS * 5)
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.search("list open pull requests in my repo", k=5)
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+class NamedTool(BaseTool):
+    def __init__(self, name):
+        super().__init__(name=name, description=name)
+
+
+class FakeToolset(BaseToolset):
+    async def get_tools(self, readonly_context=None):
+        return [NamedTool(d["name"]) for d in DESCRIPTORS]
+
+
+def test_search_loads_matches_into_deferred_toolset(monkeypatch):
+    async def fake_index():
+        return ToolIndex(DESCRIPTORS)
+
+    monkeypatch.setattr(mcp_tools, "get_github_tool_index", fake_index)
+    context = SimpleNamespace(state={})
+    deferred = mcp_tools.DeferredMcpToolset(FakeToolset())
+
+    before = asyncio.run(deferred.get_tools(context))
+    assert [t.name for t in before] == ["search_repositories"]
+
+    result = asyncio.run(mcp_tools.search_github_tools("list pull requests", context))
+    assert result["tools"][0]["name"] == "list_pull_requests"
+
+    after = {t.name for t in asyncio.run(deferred.get_tools(context))}
+    assert "list_pull_requests" in after and "search_repositories" in after
+    assert len(after) <= 1 + mcp_tools.SEARCH_RESULTS
+
+
+def test_index_is_rebuilt_when_a_description_changes(monkeypatch, tmp_path):
+    descriptions = {"list_issues": "List issues", "get_file_contents": "Read a file"}
+
+    class DescribedToolset(BaseToolset):
+        async def get_tools(self, readonly_context=None):
+            return [BaseTool(name=name, description=text) for name, text in descriptions.items()]
+
+    monkeypatch.setattr(mcp_tools, "TOOL_INDEX_PATH", tmp_path / "index.json")
+    monkeypatch.setattr(mcp_tools, "_tool_index", None)
+    monkeypatch.setattr(mcp_tools, "get_github_mcp_toolset", DescribedToolset)
+
+    first = asyncio.run(mcp_tools.get_github_tool_index())
+    assert asyncio.run(mcp_tools.get_github_tool_index()) is first
+    assert first.search("read the readme")[0][0]["name"] == "get_file_contents"
+
+    descriptions["list_issues"] = "List issues or read the readme of a repository"
+    second = asyncio.run(mcp_tools.get_github_tool_index())
+    assert second is not first and second.get("list_issues")["description"].endswith("repository")
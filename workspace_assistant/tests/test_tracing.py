@@ -0,0 +1,77 @@
+"""
+Tests for tracing spans (tools/tracing.py) and their export (runtime/tracing.py).
+
+Usage: python -m pytest tests/test_tracing.py
+"""
+
+import json
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF
+
+from benchmarks.fakes import FakeWorkspace, install_fake_google
+from config.settings import Settings
+from runtime.tracing import JsonlSpanExporter, setup_tracing
+from tools import auth, tasks_tools, tracing
+
+
+def use_provider(monkeypatch, provider: TracerProvider) -> None:
+    # A local provider, so the process-wide one is left alone.
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer(tracing.SERVICE_NAME))
+
+
+def test_google_requests_and_credential_loads_are_traced_with_sizes(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    use_provider(monkeypatch, provider)
+    monkeypatch.setattr(tasks_tools, "get_task_store", lambda: None)
+    previous = install_fake_google(FakeWorkspace())
+    try:
+        with tracing.span("turn", user=None) as turn:
+            listed = tasks_tools.list_tasks(max_results=5)
+            auth.ServicePool(credentials_loader=lambda scopes: object()).get_credentials(
+                auth.SCOPES["tasks"]
+            )
+    finally:
+        auth._pool = previous
+    assert listed["status"] == "success"
+
+    spans = {s.name: s for s in exporter.get_finished_spans()}
+    request = spans["google.api.request"]
+    assert request.parent.span_id == turn.get_span_context().span_id
+    assert request.attributes["google.api"] == "tasks"
+    assert request.attributes["response_bytes"] > 100
+    assert spans["auth.load"].parent.span_id == turn.get_span_context().span_id
+    assert "user" not in spans["turn"].attributes
+
+
+def test_unsampled_spans_skip_sizes_and_spans_export_as_jsonl(monkeypatch, tmp_path):
+    use_provider(monkeypatch, TracerProvider(sampler=ALWAYS_OFF))
+
+    def fail(value):
+        raise AssertionError("sized an unsampled span")
+
+    monkeypatch.setattr(tracing, "payload_bytes", fail)
+    with tracing.span("mcp.request", **{"mcp.tool": "list_issues"}) as current:
+        tracing.set_payload(current, "request_bytes", {"repo": "x"})
+    assert not current.is_recording()
+
+    path = tmp_path / "traces.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(path)))
+    with provider.get_tracer("test").start_as_current_span("outer"):
+        with provider.get_tracer("test").start_as_current_span("inner") as inner:
+            inner.set_attribute("response_bytes", 12)
+    provider.shutdown()
+
+    inner_record, outer_record = [json.loads(line) for line in path.read_text().splitlines()]
+    assert inner_record["name"] == "inner" and inner_record["parent_id"] == outer_record["span_id"]
+    assert inner_record["trace_id"] == outer_record["trace_id"]
+    assert inner_record["attributes"] == {"response_bytes": 12}
+    assert inner_record["duration_ms"] >= 0 and outer_record["parent_id"] is None
+
+    monkeypatch.setenv("TRACING_ENABLED", "false")
+    assert setup_tracing(Settings()) is None
@@ -0,0 +1,101 @@
+"""
+Tests for the background warm-up in runtime/warmup.py.
+
+Usage: python -m pytest tests/test_warmup.py
+"""
+
+import threading
+import time
+
+from benchmarks.fakes import FakeWorkspace, install_fake_google
+from runtime import warmup as warmup_module
+from runtime.warmup import SkipStep, Step, WarmUp
+from tools import auth, task_store, tasks_tools
+from tools.task_store import TaskStore
+
+
+def sleeper(seconds: float, detail: str = ""):
+    def run(warmup):
+        time.sleep(seconds)
+        return detail
+    return run
+
+
+def test_steps_run_concurrently_in_dependency_order_with_time_limits():
+    order = []
+
+    def record(name):
+        def run(warmup):
+            order.append(name)
+        return run
+
+    def fail(warmup):
+        raise RuntimeError("no network")
+
+    def skip(warmup):
+        raise SkipStep("store disabled")
+
+    warmup = WarmUp([
+        Step("slow", sleeper(0.2), timeout=0.05),
+        Step("after_slow", record("after_slow"), after=("slow",)),
+        Step("a", sleeper(0.1, "built")),
+        Step("b", sleeper(0.1)),
+        Step("after_a", record("after_a"), after=("a",)),
+        Step("failing", fail),
+        Step("skipping", skip),
+    ], timeout=1.0)
+
+    start = time.perf_counter()
+    assert warmup.start().wait(timeout=1.0)
+    assert time.perf_counter() - start < 0.19  # a and b overlapped; slow was abandoned
+
+    results = {r.name: r for r in warmup.report()}
+    assert {name: r.status for name, r in results.items()} == {
+        "slow": "timeout", "after_slow": "skipped", "a": "ok", "b": "ok",
+        "after_a": "ok", "failing": "error", "skipping": "skipped",
+    }
+    assert order == ["after_a"]
+    assert results["a"].detail == "built" and 0.09 < results["a"].seconds < 0.19
+    assert results["failing"].detail == "no network"
+    assert "slow timeout" in warmup.summary()
+
+
+def test_cancel_stops_pending_steps_and_running_work():
+    release = threading.Event()
+    cancelled = []
+
+    def blocking(warmup):
+        warmup.on_cancel(lambda: (cancelled.append(True), release.set()))
+        release.wait()
+
+    warmup = WarmUp([Step("blocking", blocking), Step("next", sleeper(0), after=("blocking",))])
+    warmup.start()
+    time.sleep(0.05)
+    warmup.cancel()
+
+    assert warmup.wait(timeout=1.0)
+    assert cancelled == [True]
+    assert [r.status for r in warmup.report()] == ["cancelled", "skipped"]
+
+
+def test_default_steps_leave_the_first_query_warm(monkeypatch):
+    workspace = FakeWorkspace()
+    previous = install_fake_google(workspace)
+    store = TaskStore(":memory:", sync_interval=60)
+    monkeypatch.setattr(task_store, "get_task_store", lambda: store)
+    monkeypatch.setattr(tasks_tools, "get_task_store", lambda: store)
+    monkeypatch.setattr(auth, "has_usable_token", lambda: True)
+    monkeypatch.setenv("EVENT_STORE_ENABLED", "false")
+    steps = [step for step in warmup_module.default_steps() if step.name != "mcp"]
+    try:
+        warmup = WarmUp(steps, timeout=5.0).start()
+        assert warmup.wait(timeout=5.0)
+        assert {r.name: r.status for r in warmup.report()} == {
+            "credentials": "ok", "services": "ok", "events": "skipped", "tasks": "ok",
+        }
+
+        workspace.requests.clear()
+        assert len(tasks_tools.list_tasks(max_results=100)["tasks"]) == 100
+        assert workspace.requests == {}  # answered from the warmed store
+    finally:
+        auth._pool = previous
@@ -1,12 +1,36 @@
 """
 Google API Authentication Helper
+
+Authorized clients are served from a process-wide ServicePool so that
+token.json is read once and each service is built once per thread, from a
+discovery document cached on disk (see tools/discovery.py).
+
+The CLI acts as a single local user with config/credentials/token.json. In
+server mode each request sets current_user, and credentials come from that
+user's own token file under config/credentials/users/; there is no
+interactive OAuth flow for them. Code that hands tool work to other threads
+must carry the context along (contextvars.copy_context()).
 """
 
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+
+from tools.discovery import get_discovery_document
+from tools.tracing import span
 
 SCOPES = {
     'calendar': ['https://www.googleapis.com/auth/calendar'],
@@ -16,38 +40,247 @@ SCOPES = {
 CREDENTIALS_DIR = Path(__file__).parent.parent / "config" / "credentials"
 CREDENTIALS_FILE = CREDENTIALS_DIR / "credentials.json"
 TOKEN_FILE = CREDENTIALS_DIR / "token.json"
+USERS_DIR = CREDENTIALS_DIR / "users"
+
+# The user whose Google account tools act on; None is the local CLI user.
+current_user: ContextVar[str | None] = ContextVar("current_user", default=None)
+
+_USER_ID = re.compile(r"[A-Za-z0-9_@-][A-Za-z0-9_.@-]{0,127}")
+
+# Refresh access tokens this long before they expire, so a request never
+# starts with a token that lapses mid-flight.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# ServicePool drops a user's cached credentials and lock once the user has
+# been idle this long, or when more users than this are cached (least
+# recently used first). Tokens stay on disk, so the next call just reloads.
+USER_IDLE_SECONDS = 3600
+MAX_POOLED_USERS = 256
+# Clients each pool thread keeps, least recently used dropped first.
+MAX_SERVICES_PER_THREAD = 32
+
+
+def is_valid_user_id(user_id: str) -> bool:
+    """User IDs name per-user files, so only plain names are accepted."""
+    return bool(_USER_ID.fullmatch(user_id or ""))
+
+
+def token_file(user_id: str | None = None) -> Path:
+    """Return the token file of a user (TOKEN_FILE for the local CLI user)."""
+    if user_id is None:
+        return TOKEN_FILE
+    if not is_valid_user_id(user_id):
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+    return USERS_DIR / user_id / "token.json"
+
+
+def _write_token(path: Path, data: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Create the file owner-only before the token is written into it.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as token:
+        token.write(data)
+
+
+def _save_token(creds: Credentials) -> None:
+    _write_token(token_file(current_user.get()), creds.to_json())
+
+
+def has_usable_token() -> bool:
+    """True if the current user's stored token works without the interactive OAuth flow."""
+    path = token_file(current_user.get())
+    if not path.exists():
+        return False
+    try:
+        creds = Credentials.from_authorized_user_file(str(path))
+    except ValueError:
+        return False
+    return creds.valid or bool(creds.refresh_token)
+
+
+def save_user_token(user_id: str, info: dict) -> None:
+    """Store a user's authorized-user token (as in token.json) for server mode."""
+    # Fails on incomplete tokens (e.g. without a refresh token or client ID).
+    Credentials.from_authorized_user_info(info)
+    _write_token(token_file(user_id), json.dumps(info))
 
 
 def get_credentials(scopes: list[str]) -> Credentials:
-    """Get valid credentials, running OAuth flow if needed."""
+    """Get valid credentials for the current user, running OAuth flow if needed.
+
+    Only the local CLI user gets the interactive flow; server users must
+    have stored a token with save_user_token().
+    """
     creds = None
+    user_id = current_user.get()
+    path = token_file(user_id)
 
-    if TOKEN_FILE.exists():
-        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), scopes)
+    if path.exists():
+        creds = Credentials.from_authorized_user_file(str(path), scopes)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            with span("auth.refresh", **{"auth.reason": "expired"}):
+                creds.refresh(Request())
+        elif user_id is not None:
+            raise PermissionError(f"No Google credentials stored for user {user_id}")
         else:
             if not CREDENTIALS_FILE.exists():
                 raise FileNotFoundError(f"Credentials not found at {CREDENTIALS_FILE}")
             flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), scopes)
             creds = flow.run_local_server(port=0)
 
-        TOKEN_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TOKEN_FILE, 'w') as token:
-            token.write(creds.to_json())
+        _save_token(creds)
 
     return creds
 
 
+def _expires_soon(creds: Credentials) -> bool:
+    if creds.expiry is None:
+        return False
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now < REFRESH_MARGIN
+
+
+class ServicePool:
+    """Process-wide cache of authorized Google API clients.
+
+    Credentials are loaded once per (user, scope set) and shared by every
+    thread. Loads and refreshes (network and disk) hold a lock of the user's
+    own, so one user's token refresh never stalls another user's calls.
+    Service objects are cached per (user, API, version, scopes) and
+    per thread, because the httplib2 transport underneath them is not
+    thread-safe. Idle users are evicted (see USER_IDLE_SECONDS), and each
+    thread keeps at most MAX_SERVICES_PER_THREAD clients.
+    """
+
+    def __init__(self, credentials_loader=get_credentials,
+                 max_users: int = MAX_POOLED_USERS, idle_seconds: float = USER_IDLE_SECONDS):
+        self._credentials_loader = credentials_loader
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._credentials: dict[tuple, Credentials] = {}
+        self._user_locks: dict[str | None, threading.Lock] = {}
+        self._last_used: OrderedDict[str | None, float] = OrderedDict()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def _touch(self, user_id: str | None) -> threading.Lock:
+        """Mark user_id as used, evict idle users and return user_id's lock.
+
+        Must be called with self._lock held.
+        """
+        now = time.monotonic()
+        self._last_used[user_id] = now
+        self._last_used.move_to_end(user_id)
+        while len(self._last_used) > 1:
+            oldest, used = next(iter(self._last_used.items()))
+            if len(self._last_used) <= self.max_users and now - used < self.idle_seconds:
+                break
+            del self._last_used[oldest]
+            self._drop_credentials(oldest)
+            lock = self._user_locks.get(oldest)
+            # A held lock means a load or refresh is still running for the user.
+            if lock is not None and not lock.locked():
+                del self._user_locks[oldest]
+            self.evictions += 1
+        return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def _drop_credentials(self, user_id: str | None) -> None:
+        for key in [key for key in self._credentials if key[0] == user_id]:
+            del self._credentials[key]
+
+    def get_credentials(self, scopes: list[str]) -> Credentials:
+        """Return the current user's credentials for scopes, refreshing them if they expire soon."""
+        key = (current_user.get(), tuple(sorted(scopes)))
+        with self._lock:
+            # The user's scope sets share one token file, so they share a lock.
+            user_lock = self._touch(key[0])
+        with user_lock:
+            with self._lock:
+                creds = self._credentials.get(key)
+            if creds is None:
+                with span("auth.load", **{"auth.scopes": len(key[1])}):
+                    creds = self._credentials_loader(list(key[1]))
+                with self._lock:
+                    self._credentials[key] = creds
+            elif creds.refresh_token and _expires_soon(creds):
+                with span("auth.refresh", **{"auth.reason": "expires_soon"}):
+                    creds.refresh(Request())
+                    _save_token(creds)
+                with self._lock:
+                    self.refreshes += 1
+        return creds
+
+    def get(self, api: str, version: str, scopes: list[str]):
+        """Return this thread's client for api/version, building it on first use."""
+        key = (current_user.get(), api, version, tuple(sorted(scopes)))
+        creds = self.get_credentials(scopes)
+
+        services = self._local.__dict__.setdefault('services', OrderedDict())
+        cached = services.get(key)
+        # A service is only reusable while it wraps the current credentials.
+        hit = cached is not None and cached[0] is creds
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            services.move_to_end(key)
+            return cached[1]
+
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        service = build_from_document(get_discovery_document(api, version), http=http)
+        services[key] = (creds, service)
+        services.move_to_end(key)
+        while len(services) > MAX_SERVICES_PER_THREAD:
+            services.popitem(last=False)
+        return service
+
+    def stats(self) -> dict:
+        """Return hit/miss/refresh/eviction counters."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "credentials": len(self._credentials),
+                "users": len(self._last_used),
+            }
+
+    def forget_user(self, user_id: str | None) -> None:
+        """Drop a user's cached credentials, e.g. after a new token was stored."""
+        with self._lock:
+            self._drop_credentials(user_id)
+
+    def clear(self) -> None:
+        """Drop cached credentials and services and reset counters."""
+        with self._lock:
+            self._credentials.clear()
+            self._last_used.clear()
+            self.hits = self.misses = self.refreshes = self.evictions = 0
+        self._local = threading.local()
+
+
+_pool = ServicePool()
+
+
+def get_service_pool() -> ServicePool:
+    """Return the process-wide ServicePool."""
+    return _pool
+
+
 def get_calendar_service():
     """Get authorized Google Calendar service."""
-    creds = get_credentials(SCOPES['calendar'])
-    return build('calendar', 'v3', credentials=creds)
+    return _pool.get('calendar', 'v3', SCOPES['calendar'])
 
 
 def get_tasks_service():
     """Get authorized Google Tasks service."""
-    creds = get_credentials(SCOPES['tasks'])
-    return build('tasks', 'v1', credentials=creds)
+    return _pool.get('tasks', 'v1', SCOPES['tasks'])
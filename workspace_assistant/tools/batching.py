@@ -0,0 +1,136 @@
+"""
+Batched Google API Execution
+
+Groups many requests into multipart batch calls (up to 50 per HTTP
+round-trip), maps each sub-response back to the request that produced it and
+retries only the items that failed with a retryable error.
+
+Batches go through the quota scheduler (tools/quota.py) as bulk work: each
+costs one token per request in it, and backoff, Retry-After and the circuit
+breaker apply as for single requests. A batch that fails as a whole (an
+HTTP or network error) fails each of its items; if the breaker opens part
+way, the items not yet sent fail with CircuitOpen and the results of the
+batches already sent are kept.
+"""
+
+import time
+
+from googleapiclient.errors import HttpError
+
+from tools.quota import (
+    BULK,
+    CircuitOpen,
+    api_name,
+    get_quota_scheduler,
+    is_retryable,
+    retry_after,
+)
+from tools.tracing import set_payload, span
+
+# Google's documented per-batch limit for Calendar and Tasks.
+MAX_BATCH_SIZE = 50
+
+# Errors of a whole round-trip, reported per item: HTTP errors and network
+# failures (ConnectionError, socket timeouts).
+BATCH_ERRORS = (HttpError, OSError)
+
+
+def _error_result(exception: Exception) -> dict:
+    code = exception.status_code if isinstance(exception, HttpError) else None
+    return {"status": "error", "code": code, "message": str(exception)}
+
+
+def execute_batch(
+    service,
+    requests: list,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_retries: int | None = None,
+    retry_delay: float | None = None,
+) -> list[dict]:
+    """Execute requests in batches and return one result per request, in order.
+
+    Each result is {"status": "success", "response": ...} or
+    {"status": "error", "code": ..., "message": ...}. Items that fail with a
+    retryable error are re-sent together in new batches with jittered
+    exponential backoff; items that succeeded are never sent twice.
+    max_retries and retry_delay default to the quota scheduler's settings.
+
+    A single request is sent on its own, without the multipart envelope,
+    under the scheduler's retry settings.
+    """
+    scheduler = get_quota_scheduler()
+    if len(requests) == 1:
+        try:
+            return [{"status": "success", "response": scheduler.execute(requests[0])}]
+        except (*BATCH_ERRORS, CircuitOpen) as e:
+            return [_error_result(e)]
+
+    max_retries = scheduler.max_retries if max_retries is None else max_retries
+    api = api_name(requests[0]) if requests else "google"
+    results: list[dict | None] = [None] * len(requests)
+    errors: dict[int, Exception] = {}
+
+    def on_response(request_id, response, exception):
+        index = int(request_id)
+        if exception is None:
+            results[index] = {"status": "success", "response": response}
+            errors.pop(index, None)
+        else:
+            results[index] = _error_result(exception)
+            errors[index] = exception
+
+    pending = list(range(len(requests)))
+    circuit_open = False
+    for attempt in range(max_retries + 1):
+        for start in range(0, len(pending), max_batch_size):
+            chunk = pending[start:start + max_batch_size]
+            try:
+                scheduler.acquire(api, BULK, cost=len(chunk))
+            except CircuitOpen as e:
+                for index in pending[start:]:
+                    on_response(str(index), None, e)
+                circuit_open = True
+                break
+            batch = service.new_batch_http_request(callback=on_response)
+            for index in chunk:
+                batch.add(requests[index], request_id=str(index))
+            with span("google.api.batch", **{"google.api": api, "batch.requests": len(chunk),
+                                             "batch.attempt": attempt}) as current:
+                set_payload(current, "request_bytes",
+                            [getattr(requests[i], "body", None) for i in chunk])
+                try:
+                    batch.execute()
+                except BATCH_ERRORS as e:
+                    for index in chunk:
+                        on_response(str(index), None, e)
+                set_payload(current, "response_bytes", [results[i] for i in chunk])
+                if current.is_recording():
+                    current.set_attribute("batch.errors", sum(i in errors for i in chunk))
+            # One outcome per batch for the breaker and the adaptive rate.
+            transient = [errors[i] for i in chunk if i in errors and is_retryable(errors[i])]
+            scheduler.record(api, transient[0] if transient else None)
+
+        pending = [i for i in pending if i in errors and is_retryable(errors[i])]
+        if not pending or attempt == max_retries or circuit_open:
+            break
+        wait = max((retry_after(errors[i]) or 0 for i in pending), default=0)
+        time.sleep(scheduler.backoff(attempt, wait or None, retry_delay))
+
+    return results
+
+
+def summarize_results(ids: list[str], results: list[dict]) -> dict:
+    """Turn per-item batch results into a tool response keyed by item ID."""
+    succeeded = [item_id for item_id, r in zip(ids, results) if r["status"] == "success"]
+    failed = [
+        {"id": item_id, "message": r["message"]}
+        for item_id, r in zip(ids, results)
+        if r["status"] != "success"
+    ]
+    if not failed:
+        status = "success"
+    elif succeeded:
+        status = "partial"
+    else:
+        status = "error"
+    return {"status": status, "succeeded": succeeded, "failed": failed}
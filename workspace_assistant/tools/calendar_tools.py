@@ -1,18 +1,314 @@
 """
 Option A: Calendar Assistant Tools
 
-Implement at least 3 tools for Google Calendar operations.
+Tools for Google Calendar operations. Each tool returns a dict with 'status'
+and relevant data.
 """
 
-from typing import Optional
-from google.adk.tools import tool
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, tzinfo
 
+from tools.auth import get_calendar_service
+from tools.batching import execute_batch, summarize_results
+from tools.event_store import EVENT_FIELDS, get_event_store
+from tools.pagination import iter_items, partial_fields
+from tools.quota import get_quota_scheduler
+from tools.scheduling import (
+    IntervalTree,
+    WorkingHours,
+    event_bounds,
+    find_free_slots,
+    merge_busy,
+)
 
-# TODO: Implement your calendar tools
-# Use the @tool decorator
-# Each tool should return a dict with 'status' and relevant data
+# Working hours used when searching for free slots (calendar-local time).
+WORK_START_HOUR = 9
+WORK_END_HOUR = 17
+
+# freebusy().query accepts at most this many calendars per request; larger
+# groups are split and queried concurrently.
+FREEBUSY_MAX_CALENDARS = 50
+FREEBUSY_MAX_WORKERS = 4
+
+# Long-lived, so each thread keeps its pooled Calendar service between calls.
+_freebusy_pool = ThreadPoolExecutor(max_workers=FREEBUSY_MAX_WORKERS,
+                                    thread_name_prefix="freebusy")
+
+# Events per page when listing from the API (the service allows up to 2500).
+LIST_PAGE_SIZE = 250
+
+
+def _calendar_zone(calendar_id: str) -> tzinfo:
+    """Return the calendar's time zone, falling back to the local zone."""
+    store = get_event_store()
+    zone = store.time_zone(calendar_id) if store is not None else None
+    return zone or datetime.now().astimezone().tzinfo
+
+
+def _parse_time(value: str, zone: tzinfo) -> datetime:
+    """Parse an ISO 8601 time; naive values are taken as calendar-local."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=zone)
+
+
+def _load_events(calendar_id: str, start: datetime, end: datetime,
+                 max_results: int | None = None) -> list[dict]:
+    """Return events overlapping [start, end), ordered by start time.
+
+    Served from the local event store after a delta sync; listed from the
+    API only when the store is disabled.
+    """
+    store = get_event_store()
+    if store is not None:
+        store.sync(calendar_id)
+        return store.events_between(calendar_id, start, end, max_results)
+
+    params = {
+        "calendarId": calendar_id,
+        "timeMin": start.isoformat(),
+        "timeMax": end.isoformat(),
+        "singleEvents": True,
+        "orderBy": "startTime",
+        "maxResults": min(max_results or LIST_PAGE_SIZE, LIST_PAGE_SIZE),
+        "fields": partial_fields(EVENT_FIELDS),
+    }
+
+    def request(page_token: str | None):
+        page_params = params if page_token is None else {**params, "pageToken": page_token}
+        return get_calendar_service().events().list(**page_params)
+
+    # Follow pages until max_results events are collected (all of them if None).
+    return list(iter_items(request, limit=max_results))
+
+
+def _is_busy(event: dict) -> bool:
+    return event.get("transparency") != "transparent"
+
+
+def _query_freebusy(calendar_ids: list[str], start: datetime,
+                    end: datetime) -> tuple[dict[str, list], dict[str, str]]:
+    """Return busy (start, end) epoch intervals per calendar, plus per-calendar errors.
+
+    Only busy-interval boundaries come back from the API, never event
+    payloads. Calendars are queried in chunks of FREEBUSY_MAX_CALENDARS;
+    a single chunk is queried on the calling thread, several run
+    concurrently on a shared pool whose threads keep their pooled services.
+    """
+    def query(chunk: list[str]) -> dict:
+        return get_quota_scheduler().execute(get_calendar_service().freebusy().query(body={
+            "timeMin": start.isoformat(),
+            "timeMax": end.isoformat(),
+            "items": [{"id": calendar_id} for calendar_id in chunk],
+        }))
+
+    chunks = [
+        calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]
+        for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS)
+    ]
+    if len(chunks) == 1:
+        responses = [query(chunks[0])]
+    else:
+        # Each thread runs in a copy of this context, so it queries as the same user.
+        futures = [_freebusy_pool.submit(contextvars.copy_context().run, query, chunk)
+                   for chunk in chunks]
+        responses = [future.result() for future in futures]
+
+    busy, errors = {}, {}
+    for response in responses:
+        for calendar_id, info in response.get("calendars", {}).items():
+            if info.get("errors"):
+                errors[calendar_id] = info["errors"][0].get("reason", "unknown")
+                continue
+            busy[calendar_id] = [
+                (datetime.fromisoformat(b["start"]).timestamp(),
+                 datetime.fromisoformat(b["end"]).timestamp())
+                for b in info.get("busy", [])
+            ]
+    return busy, errors
+
+
+def list_upcoming_events(days: int = 7, max_results: int = 10,
+                         calendar_id: str = "primary") -> dict:
+    """List upcoming calendar events.
+
+    Args:
+        days: How many days ahead to look, starting now.
+        max_results: Maximum number of events to return.
+        calendar_id: Calendar to read (default: 'primary').
+
+    Returns:
+        dict with 'status' and 'events' keys.
+    """
+    try:
+        start = datetime.now().astimezone()
+        events = _load_events(calendar_id, start, start + timedelta(days=days), max_results)
+        return {"status": "success", "events": events}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def check_conflicts(start_time: str, end_time: str, calendar_id: str = "primary") -> dict:
+    """Check a time range for conflicts.
+
+    Reports the busy events overlapping the range (i.e. what a new meeting
+    there would clash with) and any existing events in the range that are
+    double-booked against each other.
+
+    Args:
+        start_time: Range start, ISO 8601 (e.g. '2025-03-14T14:00:00').
+            Times without an offset are in the calendar's time zone.
+        end_time: Range end, ISO 8601.
+        calendar_id: Calendar to check (default: 'primary').
+
+    Returns:
+        dict with 'status', 'has_conflicts', the overlapping 'events' and
+        'double_booked' pairs of {first, second} events.
+    """
+    try:
+        zone = _calendar_zone(calendar_id)
+        start, end = _parse_time(start_time, zone), _parse_time(end_time, zone)
+        if end <= start:
+            return {"status": "error", "message": "end_time must be after start_time"}
+
+        busy = [e for e in _load_events(calendar_id, start, end) if _is_busy(e)]
+        tree = IntervalTree((*event_bounds(e, zone), e) for e in busy)
+        overlapping = tree.overlapping(start.timestamp(), end.timestamp())
+        double_booked = [
+            {"first": first, "second": second} for first, second in tree.overlapping_pairs()
+        ]
+        return {
+            "status": "success",
+            "has_conflicts": bool(overlapping),
+            "events": overlapping,
+            "double_booked": double_booked,
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def find_available_slots(duration_minutes: int = 60, days_ahead: int = 7,
+                         max_slots: int = 10, participants: list[str] | None = None,
+                         calendar_id: str = "primary") -> dict:
+    """Find free time slots during working hours, optionally across participants.
+
+    Args:
+        duration_minutes: Required length of each slot in minutes.
+        days_ahead: How many days ahead to search, starting now.
+        max_slots: Maximum number of slots to return.
+        participants: Email addresses (or calendar IDs) of other attendees
+            who must also be free. Leave empty to check only your calendar.
+        calendar_id: Your calendar to check (default: 'primary').
+
+    Returns:
+        dict with 'status' and 'slots', a list of {start, end} ISO times.
+        Each slot is a free stretch at least duration_minutes long. When
+        participants are given, 'unavailable' lists calendars whose
+        free/busy could not be read, with the reason.
+    """
+    try:
+        zone = _calendar_zone(calendar_id)
+        now = datetime.now(zone)
+        window_end = now + timedelta(days=days_ahead)
+
+        unavailable = {}
+        if participants:
+            calendar_ids = list(dict.fromkeys([calendar_id, *participants]))
+            busy_by_calendar, unavailable = _query_freebusy(calendar_ids, now, window_end)
+            busy = merge_busy(*busy_by_calendar.values())
+        else:
+            busy = merge_busy(
+                event_bounds(e, zone)
+                for e in _load_events(calendar_id, now, window_end) if _is_busy(e)
+            )
+
+        hours = WorkingHours(time(WORK_START_HOUR), time(WORK_END_HOUR), zone=zone)
+        slots = find_free_slots(busy, now, window_end, duration_minutes, [hours], max_slots)
+        result = {
+            "status": "success",
+            "slots": [
+                {"start": s.astimezone(zone).isoformat(), "end": e.astimezone(zone).isoformat()}
+                for s, e in slots
+            ],
+        }
+        if participants:
+            result["unavailable"] = unavailable
+        return result
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def _shift_time(when: dict, delta: timedelta) -> dict:
+    """Shift an event start/end by delta, keeping its all-day or timed form."""
+    shifted = dict(when)
+    if "dateTime" in when:
+        shifted["dateTime"] = (datetime.fromisoformat(when["dateTime"]) + delta).isoformat()
+    else:
+        if delta % timedelta(days=1):
+            raise ValueError("All-day events can only be moved by whole days")
+        shifted["date"] = (date.fromisoformat(when["date"]) + delta).isoformat()
+    return shifted
+
+
+def reschedule_events(
+    event_ids: list[str], shift_minutes: int, calendar_id: str = "primary"
+) -> dict:
+    """Move several events by the same amount of time using batched requests.
+
+    Args:
+        event_ids: IDs of the events to move.
+        shift_minutes: Minutes to move each event by (negative moves earlier).
+            All-day events can only be moved by whole days (multiples of 1440).
+        calendar_id: Calendar containing the events (default: 'primary').
+
+    Returns:
+        dict with 'status' ('success', 'partial' or 'error'), the 'succeeded'
+        event IDs and a 'failed' list of {id, message}.
+    """
+    try:
+        service = get_calendar_service()
+        delta = timedelta(minutes=shift_minutes)
+
+        fetched = execute_batch(
+            service,
+            [service.events().get(calendarId=calendar_id, eventId=event_id)
+             for event_id in event_ids],
+        )
+
+        results = list(fetched)
+        patch_indexes, patches = [], []
+        for index, result in enumerate(fetched):
+            if result["status"] != "success":
+                continue
+            event = result["response"]
+            try:
+                body = {
+                    "start": _shift_time(event["start"], delta),
+                    "end": _shift_time(event["end"], delta),
+                }
+            except ValueError as e:
+                results[index] = {"status": "error", "code": None, "message": str(e)}
+                continue
+            patch_indexes.append(index)
+            patches.append(service.events().patch(
+                calendarId=calendar_id, eventId=event_ids[index], body=body
+            ))
+
+        for index, result in zip(patch_indexes, execute_batch(service, patches)):
+            results[index] = result
+
+        store = get_event_store()
+        if store is not None:
+            store.mark_stale(calendar_id)
+
+        return summarize_results(event_ids, results)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 calendar_tools = [
-    # Add your implemented tools here
+    list_upcoming_events,
+    check_conflicts,
+    find_available_slots,
+    reschedule_events,
 ]
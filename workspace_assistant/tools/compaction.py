@@ -0,0 +1,347 @@
+"""
+Tool Result Compaction
+
+Raw Calendar events and GitHub issues carry a lot of JSON the model never
+reads: etags, htmlLinks, avatar URLs, reactions, attendee metadata. This
+module declares, per tool, which fields of a result are kept (PROJECTIONS),
+truncates long strings to a character budget and pages long lists behind a
+continuation cursor that the model can follow with more_results().
+
+compact_tool_result() is installed as the agent's after_tool_callback, so it
+applies to the Calendar, Tasks and MCP tools alike. MCP results are JSON
+inside text content parts; those are parsed, compacted and re-serialized.
+Every call records the bytes (and approximate tokens) it saved.
+"""
+
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from google.adk.tools import ToolContext
+
+from config.settings import Settings
+from tools.auth import current_user
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Continuation cursors kept for more_results(); the oldest are dropped first.
+MAX_CURSORS = 64
+
+# (user_id, session_id) a continuation cursor was issued to.
+Owner = tuple[str | None, str | None] | None
+
+
+@dataclass(frozen=True)
+class Projection:
+    """How to compact one tool's result.
+
+    fields: Dotted paths to keep (lists are traversed transparently, so
+        'events.start.dateTime' keeps that field of every event). None keeps
+        everything.
+    items: Dotted path of the list to page ('' for a top-level list), or None.
+    page_size / text_budget: Override the Settings defaults.
+    """
+
+    fields: tuple[str, ...] | None = None
+    items: str | None = None
+    page_size: int | None = None
+    text_budget: int | None = None
+
+
+def _prefixed(prefix: str, fields: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(f"{prefix}.{field}" for field in fields)
+
+
+STATUS_FIELDS = ("status", "message")
+
+EVENT_FIELDS = (
+    "id", "summary", "description", "location", "status", "transparency",
+    "start.dateTime", "start.date", "end.dateTime", "end.date", "recurringEventId",
+    "organizer.email", "attendees.email", "attendees.responseStatus", "attendees.self",
+)
+
+ISSUE_FIELDS = (
+    "number", "title", "state", "body", "html_url", "user.login", "labels.name",
+    "assignees.login", "comments", "created_at", "updated_at", "closed_at",
+    "pull_request.html_url",
+)
+
+PULL_FIELDS = (
+    "number", "title", "state", "body", "html_url", "user.login", "draft",
+    "head.ref", "base.ref", "created_at", "updated_at", "merged_at",
+)
+
+REPO_FIELDS = (
+    "full_name", "description", "html_url", "private", "language",
+    "stargazers_count", "default_branch", "updated_at",
+)
+
+COMMIT_FIELDS = ("sha", "html_url", "commit.message", "commit.author.name",
+                 "commit.author.date", "author.login")
+
+COMMENT_FIELDS = ("id", "html_url", "body", "user.login", "created_at")
+
+PROJECTIONS = {
+    # Calendar
+    "list_upcoming_events": Projection(
+        STATUS_FIELDS + _prefixed("events", EVENT_FIELDS), items="events"
+    ),
+    "check_conflicts": Projection(
+        STATUS_FIELDS + ("has_conflicts",)
+        + _prefixed("events", EVENT_FIELDS)
+        + _prefixed("double_booked.first", EVENT_FIELDS)
+        + _prefixed("double_booked.second", EVENT_FIELDS),
+        items="events",
+    ),
+    "find_available_slots": Projection(items="slots"),
+    "reschedule_events": Projection(
+        STATUS_FIELDS + ("succeeded", "failed.id", "failed.message")
+    ),
+    # Tasks
+    "list_tasks": Projection(items="tasks"),
+    "complete_tasks": Projection(
+        STATUS_FIELDS + ("succeeded", "failed.id", "failed.message")
+    ),
+    "update_tasks": Projection(
+        STATUS_FIELDS + ("succeeded", "failed.id", "failed.message")
+    ),
+    # GitHub MCP
+    "search_repositories": Projection(
+        ("total_count",) + _prefixed("items", REPO_FIELDS), items="items"
+    ),
+    "search_issues": Projection(
+        ("total_count",) + _prefixed("items", ISSUE_FIELDS), items="items"
+    ),
+    "list_issues": Projection(ISSUE_FIELDS, items=""),
+    "get_issue": Projection(ISSUE_FIELDS),
+    "create_issue": Projection(("number", "title", "state", "html_url")),
+    "update_issue": Projection(("number", "title", "state", "html_url")),
+    "add_issue_comment": Projection(COMMENT_FIELDS),
+    "get_issue_comments": Projection(COMMENT_FIELDS, items=""),
+    "list_pull_requests": Projection(PULL_FIELDS, items=""),
+    "get_pull_request": Projection(PULL_FIELDS),
+    "create_pull_request": Projection(("number", "title", "state", "html_url")),
+    "list_commits": Projection(COMMIT_FIELDS, items=""),
+    "get_file_contents": Projection(text_budget=4000),
+}
+
+DEFAULT_PROJECTION = Projection(items="")
+
+
+def _trie(paths: tuple[str, ...]) -> dict:
+    root: dict = {}
+    for path in paths:
+        node = root
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return root
+
+
+def project(value: Any, fields: tuple[str, ...] | None) -> Any:
+    """Keep only the dotted field paths of value; lists are traversed transparently."""
+    if fields is None:
+        return value
+
+    def walk(node: Any, trie: dict) -> Any:
+        if not trie:
+            return node
+        if isinstance(node, list):
+            return [walk(item, trie) for item in node]
+        if isinstance(node, dict):
+            return {key: walk(node[key], sub) for key, sub in trie.items() if key in node}
+        return node
+
+    return walk(value, _trie(fields))
+
+
+def truncate(value: Any, budget: int) -> Any:
+    """Shorten every string longer than budget characters."""
+    if isinstance(value, str) and len(value) > budget:
+        return value[:budget] + f"… [{len(value) - budget} more chars]"
+    if isinstance(value, list):
+        return [truncate(item, budget) for item in value]
+    if isinstance(value, dict):
+        return {key: truncate(item, budget) for key, item in value.items()}
+    return value
+
+
+class CursorStore:
+    """Bounded store for the remainder of paged lists.
+
+    Each cursor records its owner, a (user, session) pair, and take() only
+    hands the items back to that owner, so one user cannot page through
+    another user's results by guessing or replaying a cursor.
+    """
+
+    def __init__(self, max_cursors: int = MAX_CURSORS):
+        self.max_cursors = max_cursors
+        self._pages: OrderedDict[str, tuple[Owner, list, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, items: list, page_size: int, owner: Owner = None) -> str:
+        cursor = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._pages[cursor] = (owner, items, page_size)
+            while len(self._pages) > self.max_cursors:
+                self._pages.popitem(last=False)
+        return cursor
+
+    def take(self, cursor: str, owner: Owner = None) -> tuple[list, int] | None:
+        with self._lock:
+            entry = self._pages.get(cursor)
+            if entry is None or entry[0] != owner:
+                return None
+            del self._pages[cursor]
+            return entry[1], entry[2]
+
+
+def _page(items: list, page_size: int, cursors: CursorStore,
+          owner: Owner = None) -> tuple[list, dict]:
+    """Return the first page and the paging fields to add next to it."""
+    if len(items) <= page_size:
+        return items, {}
+    cursor = cursors.put(items[page_size:], page_size, owner)
+    return items[:page_size], {"total": len(items), "next_cursor": cursor}
+
+
+class Compactor:
+    """Applies PROJECTIONS to tool results and accounts for the savings."""
+
+    def __init__(self, projections: dict[str, Projection] | None = None,
+                 page_size: int = 20, text_budget: int = 500):
+        self.projections = PROJECTIONS if projections is None else projections
+        self.page_size = page_size
+        self.text_budget = text_budget
+        self.cursors = CursorStore()
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _compact_value(self, value: Any, spec: Projection, owner: Owner) -> Any:
+        # truncate() returns a new structure, so paging below never touches the input.
+        value = truncate(project(value, spec.fields), spec.text_budget or self.text_budget)
+        page_size = spec.page_size or self.page_size
+        if spec.items == "" and isinstance(value, list):
+            page, paging = _page(value, page_size, self.cursors, owner)
+            value = {"items": page, **paging} if paging else page
+        elif spec.items and isinstance(value, dict):
+            *path, key = spec.items.split(".")
+            parent = value
+            for part in path:
+                parent = parent.get(part) if isinstance(parent, dict) else None
+            if isinstance(parent, dict) and isinstance(parent.get(key), list):
+                parent[key], paging = _page(parent[key], page_size, self.cursors, owner)
+                parent.update(paging)
+        return value
+
+    def _compact_mcp(self, result: dict, spec: Projection, owner: Owner) -> dict:
+        content = []
+        for part in result.get("content", []):
+            if part.get("type") == "text":
+                try:
+                    payload = json.loads(part["text"])
+                except ValueError:
+                    text = truncate(part["text"], spec.text_budget or self.text_budget)
+                    part = {**part, "text": text}
+                else:
+                    compacted = self._compact_value(payload, spec, owner)
+                    part = {**part, "text": json.dumps(compacted, separators=(",", ":"))}
+            content.append(part)
+        # structuredContent repeats the text payload in full.
+        return {key: value for key, value in result.items()
+                if key not in ("content", "structuredContent")} | {"content": content}
+
+    def compact(self, tool_name: str, result: Any, owner: Owner = None) -> Any:
+        """Return the compacted form of one tool result; owner owns its cursors."""
+        spec = self.projections.get(tool_name, DEFAULT_PROJECTION)
+        if isinstance(result, dict) and isinstance(result.get("content"), list):
+            compacted = self._compact_mcp(result, spec, owner)
+        else:
+            compacted = self._compact_value(result, spec, owner)
+        self._record(tool_name, result, compacted)
+        return compacted
+
+    def page(self, cursor: str, owner: Owner = None) -> dict:
+        """Return the next page for a continuation cursor issued to owner."""
+        entry = self.cursors.take(cursor, owner)
+        if entry is None:
+            return {"status": "error", "message": "Unknown or expired cursor"}
+        items, page_size = entry
+        page, paging = _page(items, page_size, self.cursors, owner)
+        return {"status": "success", "items": page, **paging}
+
+    def _record(self, tool_name: str, before: Any, after: Any) -> None:
+        size_in = len(json.dumps(before, default=str))
+        size_out = len(json.dumps(after, default=str))
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, {"calls": 0, "bytes_in": 0, "bytes_out": 0})
+            stats["calls"] += 1
+            stats["bytes_in"] += size_in
+            stats["bytes_out"] += size_out
+        logger.debug("%s result: %d -> %d bytes (~%d tokens saved)", tool_name,
+                     size_in, size_out, (size_in - size_out) // CHARS_PER_TOKEN)
+
+    def stats(self) -> dict:
+        """Per-tool calls, bytes in/out and approximate tokens saved."""
+        with self._lock:
+            return {
+                name: {**s, "tokens_saved": (s["bytes_in"] - s["bytes_out"]) // CHARS_PER_TOKEN}
+                for name, s in self._stats.items()
+            }
+
+
+_compactor: Compactor | None = None
+_compactor_lock = threading.Lock()
+
+
+def get_compactor() -> Compactor | None:
+    """Return the shared Compactor, or None when disabled in Settings."""
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None:
+            settings = Settings()
+            if not settings.compaction_enabled:
+                return None
+            _compactor = Compactor(
+                page_size=settings.tool_result_page_size,
+                text_budget=settings.tool_result_text_budget,
+            )
+        return _compactor
+
+
+def _owner(tool_context) -> Owner:
+    """Return the (user, session) a tool call runs for."""
+    session = getattr(tool_context, "session", None)
+    return current_user.get(), getattr(session, "id", None)
+
+
+def compact_tool_result(tool, args: dict, tool_context, tool_response) -> dict | None:
+    """after_tool_callback replacing a tool's result with its compacted form."""
+    compactor = get_compactor()
+    if compactor is None or tool.name == "more_results":
+        return None
+    try:
+        return compactor.compact(tool.name, tool_response, _owner(tool_context))
+    except Exception:
+        logger.exception("Compacting the %s result failed; passing it through", tool.name)
+        return None
+
+
+def more_results(cursor: str, tool_context: ToolContext) -> dict:
+    """Fetch the next page of a long tool result.
+
+    Args:
+        cursor: The 'next_cursor' value from a previous tool result.
+
+    Returns:
+        dict with 'items' and, if more remain, a new 'next_cursor'.
+    """
+    compactor = get_compactor()
+    if compactor is None:
+        return {"status": "error", "message": "Result paging is disabled"}
+    return compactor.page(cursor, _owner(tool_context))
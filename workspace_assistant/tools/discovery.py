@@ -0,0 +1,151 @@
+"""
+Offline Discovery Document Cache
+
+Discovery documents for the Google APIs we call are stored on disk with a
+cache format version and a TTL, and parsed at most once per process. Clients
+are then built with build_from_document(), so building a service never
+touches the network and never re-reads the document from disk.
+
+When the on-disk entry is missing or expired, get_discovery_document() starts
+from the stale entry or the document bundled with googleapiclient and fetches
+the current one on a background thread, so startup does not wait on the
+network.
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from urllib.request import urlopen
+
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_CACHE_DIR = Path(__file__).parent.parent / "config" / "discovery"
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest"
+DISCOVERY_TTL_SECONDS = 7 * 24 * 3600
+
+# Bump when the on-disk entry layout changes; older entries are ignored.
+CACHE_FORMAT_VERSION = 1
+
+_documents: dict[tuple[str, str], dict] = {}
+_refreshing: set[tuple[str, str]] = set()
+_lock = threading.Lock()
+
+
+def _cache_path(api: str, version: str) -> Path:
+    return DISCOVERY_CACHE_DIR / f"{api}.{version}.json"
+
+
+def _read_cache(api: str, version: str) -> dict | None:
+    try:
+        with open(_cache_path(api, version)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("format") != CACHE_FORMAT_VERSION or "document" not in entry:
+        return None
+    return entry
+
+
+def _write_cache(api: str, version: str, document: dict) -> None:
+    entry = {
+        "format": CACHE_FORMAT_VERSION,
+        "api": api,
+        "version": version,
+        "revision": document.get("revision"),
+        "fetched_at": time.time(),
+        "document": document,
+    }
+    DISCOVERY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _cache_path(api, version).with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    tmp.replace(_cache_path(api, version))
+
+
+def _fetch_document(api: str, version: str) -> dict:
+    with urlopen(DISCOVERY_URL.format(api=api, version=version), timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def load_document(api: str, version: str, ttl: float = DISCOVERY_TTL_SECONDS) -> dict:
+    """Load a discovery document from disk, refreshing it once the TTL lapses.
+
+    A fresh on-disk entry is used as is. An expired or missing entry is
+    re-fetched; if that fails we fall back to the stale entry and then to the
+    document bundled with googleapiclient.
+    """
+    entry = _read_cache(api, version)
+    if entry and time.time() - entry.get("fetched_at", 0) < ttl:
+        return entry["document"]
+
+    try:
+        document = _fetch_document(api, version)
+    except (OSError, ValueError):
+        if entry:
+            return entry["document"]
+        document = _bundled_document(api, version)
+        if document is None:
+            raise
+
+    _write_cache(api, version, document)
+    return document
+
+
+def _bundled_document(api: str, version: str) -> dict | None:
+    static = get_static_doc(api, version)
+    return json.loads(static) if static else None
+
+
+def _refresh(api: str, version: str) -> None:
+    """Fetch api/version, then store it on disk and for clients built after this."""
+    try:
+        document = _fetch_document(api, version)
+        _write_cache(api, version, document)
+    except (OSError, ValueError) as e:
+        logger.debug("Refreshing the %s %s discovery document failed: %s", api, version, e)
+    else:
+        with _lock:
+            _documents[(api, version)] = document
+    finally:
+        with _lock:
+            _refreshing.discard((api, version))
+
+
+def refresh_in_background(api: str, version: str) -> None:
+    """Start fetching api/version on a daemon thread, unless a fetch is already running."""
+    with _lock:
+        if (api, version) in _refreshing:
+            return
+        _refreshing.add((api, version))
+    threading.Thread(target=_refresh, args=(api, version), daemon=True,
+                     name=f"discovery-{api}").start()
+
+
+def get_discovery_document(api: str, version: str) -> dict:
+    """Return the parsed discovery document for api/version, memoized per process.
+
+    The lock only guards the memo: disk reads and the (rare) blocking fetch,
+    needed when there is neither a cached nor a bundled document, run outside
+    it, and the first document stored wins.
+    """
+    key = (api, version)
+    with _lock:
+        document = _documents.get(key)
+    if document is not None:
+        return document
+
+    entry = _read_cache(api, version)
+    if entry and time.time() - entry.get("fetched_at", 0) < DISCOVERY_TTL_SECONDS:
+        document = entry["document"]
+    else:
+        document = entry["document"] if entry else _bundled_document(api, version)
+        if document is None:
+            document = load_document(api, version)
+        else:
+            refresh_in_background(api, version)
+    with _lock:
+        return _documents.setdefault(key, document)
@@ -0,0 +1,241 @@
+"""
+Local Calendar Event Store
+
+A SQLite mirror of Calendar events kept current with incremental sync:
+the first sync lists every event and stores the returned nextSyncToken;
+later syncs send only that token and apply the delta. A 410 Gone reply
+means the token has expired, so the calendar is listed again in full and
+events missing from that listing are dropped. Pages are downloaded without
+holding the store lock, so reads keep being answered while a sync runs.
+
+Read tools query this store instead of listing the event window from the
+API on every question.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from config.settings import Settings
+from tools.auth import current_user, get_calendar_service
+from tools.pagination import iter_pages, partial_fields
+from tools.scheduling import event_bounds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    all_day INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_by_start ON events (calendar_id, start_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token TEXT,
+    time_zone TEXT,
+    synced_at REAL
+);
+"""
+
+PAGE_SIZE = 2500
+
+# Event fields the read tools use; etags, links and attendee metadata are not
+# downloaded.
+EVENT_FIELDS = (
+    "id,status,summary,description,location,transparency,start,end,"
+    "recurringEventId,organizer/email,attendees(email,responseStatus,self)"
+)
+SYNC_FIELDS = partial_fields(EVENT_FIELDS, page_fields=("nextPageToken", "nextSyncToken", "timeZone"))
+
+# Per-user stores kept open; the least recently used one is closed first.
+MAX_OPEN_STORES = 32
+
+
+class EventStore:
+    """SQLite mirror of one or more calendars, synced with syncToken."""
+
+    def __init__(self, path: Path, sync_interval: float = 15.0,
+                 service_factory=get_calendar_service):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._service_factory = service_factory
+        self._sync_interval = sync_interval
+        self._last_sync: dict[str, float] = {}
+        # Bumped by mark_stale(), so a sync that was already running does not
+        # mark the calendar fresh.
+        self._generation: dict[str, int] = {}
+        self._sync_locks: dict[str, threading.Lock] = {}
+
+    def time_zone(self, calendar_id: str = "primary") -> ZoneInfo | None:
+        """Return the calendar's time zone as reported by the last sync."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT time_zone FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return ZoneInfo(row[0]) if row and row[0] else None
+
+    def sync_token(self, calendar_id: str = "primary") -> str | None:
+        """Return the sync token of the last sync; it changes whenever the calendar does."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _due(self, calendar_id: str) -> bool:
+        with self._lock:
+            last = self._last_sync.get(calendar_id)
+        return last is None or time.monotonic() - last >= self._sync_interval
+
+    def sync(self, calendar_id: str = "primary", force: bool = False) -> None:
+        """Bring the calendar up to date, at most once per sync interval.
+
+        One sync per calendar runs at a time. The store lock is only taken
+        to write each downloaded page and the sync state.
+        """
+        if not force and not self._due(calendar_id):
+            return
+        with self._lock:
+            sync_lock = self._sync_locks.setdefault(calendar_id, threading.Lock())
+        with sync_lock:
+            # Another thread may have synced while this one waited.
+            if not force and not self._due(calendar_id):
+                return
+            with self._lock:
+                generation = self._generation.get(calendar_id, 0)
+            token = self.sync_token(calendar_id)
+            try:
+                self._pull(calendar_id, token)
+            except HttpError as e:
+                if token is None or e.status_code != 410:
+                    raise
+                # Sync token expired: list everything again and drop what is gone.
+                self._pull(calendar_id, None, replace=True)
+            with self._lock:
+                if self._generation.get(calendar_id, 0) == generation:
+                    self._last_sync[calendar_id] = time.monotonic()
+
+    def mark_stale(self, calendar_id: str = "primary") -> None:
+        """Force a delta pull before the next read, e.g. after a local write."""
+        with self._lock:
+            self._last_sync.pop(calendar_id, None)
+            self._generation[calendar_id] = self._generation.get(calendar_id, 0) + 1
+
+    def _pull(self, calendar_id: str, sync_token: str | None, replace: bool = False) -> None:
+        params = {"calendarId": calendar_id, "singleEvents": True,
+                  "maxResults": PAGE_SIZE, "fields": SYNC_FIELDS}
+        if sync_token:
+            params["syncToken"] = sync_token
+
+        def request(page_token: str | None):
+            # Runs on the prefetch thread, so get that thread's service.
+            page_params = params if page_token is None else {**params, "pageToken": page_token}
+            return self._service_factory().events().list(**page_params)
+
+        # The next page downloads while this one is written to SQLite.
+        tz_name = sync_token_out = None
+        seen = set()
+        for page in iter_pages(request):
+            tz_name = page.get("timeZone")
+            sync_token_out = page.get("nextSyncToken")
+            items = page.get("items", [])
+            seen.update(event["id"] for event in items)
+            self._apply(calendar_id, items, ZoneInfo(tz_name or "UTC"))
+
+        with self._lock, self._conn:
+            if replace:
+                stored = self._conn.execute(
+                    "SELECT event_id FROM events WHERE calendar_id = ?", (calendar_id,)
+                ).fetchall()
+                self._conn.executemany(
+                    "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                    [(calendar_id, event_id) for (event_id,) in stored if event_id not in seen],
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (calendar_id, sync_token_out, tz_name, time.time()),
+            )
+
+    def _apply(self, calendar_id: str, items: list[dict], tz: ZoneInfo) -> None:
+        with self._lock, self._conn:
+            for event in items:
+                if event.get("status") == "cancelled":
+                    self._conn.execute(
+                        "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                        (calendar_id, event["id"]),
+                    )
+                    continue
+                start, end = event_bounds(event, tz)
+                all_day = "date" in event["start"]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    (calendar_id, event["id"], start, end, all_day, json.dumps(event)),
+                )
+
+    def events_between(self, calendar_id: str, start: datetime, end: datetime,
+                       limit: int | None = None) -> list[dict]:
+        """Return events overlapping [start, end), ordered by start time."""
+        query = (
+            "SELECT payload FROM events WHERE calendar_id = ? "
+            "AND start_ts < ? AND end_ts > ? ORDER BY start_ts"
+        )
+        args = [calendar_id, end.timestamp(), start.timestamp()]
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def clear(self, calendar_id: str) -> None:
+        """Forget every stored event and the sync token for a calendar."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            self._conn.execute("DELETE FROM sync_state WHERE calendar_id = ?", (calendar_id,))
+            self._last_sync.pop(calendar_id, None)
+
+    def close(self) -> None:
+        """Close the database connection once in-flight reads and writes finish."""
+        with self._lock:
+            self._conn.close()
+
+
+_stores: OrderedDict[str | None, EventStore] = OrderedDict()
+_store_lock = threading.Lock()
+
+
+def get_event_store() -> EventStore | None:
+    """Return the current user's EventStore, or None when disabled in Settings.
+
+    Each server user gets a database of their own next to the CLI user's. At
+    most MAX_OPEN_STORES stay open; the least recently used one is closed.
+    """
+    user_id = current_user.get()
+    with _store_lock:
+        if user_id in _stores:
+            _stores.move_to_end(user_id)
+            return _stores[user_id]
+        settings = Settings()
+        if not settings.event_store_enabled:
+            return None
+        path = settings.event_store_path
+        if user_id is not None:
+            path = path.parent / "users" / user_id / path.name
+        _stores[user_id] = store = EventStore(path, settings.event_sync_interval)
+        while len(_stores) > MAX_OPEN_STORES:
+            _, evicted = _stores.popitem(last=False)
+            evicted.close()
+        return store
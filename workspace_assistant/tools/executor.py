@@ -0,0 +1,191 @@
+"""
+Concurrent Tool Execution
+
+ADK runs the function calls of one model turn concurrently with asyncio, but
+a plain (sync) tool function runs inline on the event loop, so independent
+googleapiclient calls still happen one after another. ToolExecutor wraps
+each sync tool in an async function that runs it on a shared thread pool,
+and caps how many calls of each tool may run at once so bursts stay under
+Google API quotas. MCP tools are already async; they are wrapped in a toolset
+that applies the same per-tool caps.
+
+Results keep the order of the calls that produced them: ADK gathers the
+wrapped coroutines in call order, and run_all() does the same.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+from config.settings import Settings
+
+# Per-tool concurrency caps that differ from Settings.tool_concurrency.
+# Bulk writes already fan out 50 requests per call, so run them one at a time.
+TOOL_CONCURRENCY_LIMITS = {
+    "complete_tasks": 1,
+    "update_tasks": 1,
+    "reschedule_events": 1,
+}
+
+
+class _LimitedTool(BaseTool):
+    """Forwards to another tool while holding its concurrency slot."""
+
+    def __init__(self, tool: BaseTool, executor: "ToolExecutor"):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+        )
+        self._tool = tool
+        self._executor = executor
+
+    def _get_declaration(self):
+        return self._tool._get_declaration()
+
+    async def run_async(self, *, args: dict[str, Any], tool_context) -> Any:
+        async with self._executor.async_slot(self.name):
+            return await self._tool.run_async(args=args, tool_context=tool_context)
+
+
+class LimitedMcpToolset(BaseToolset):
+    """McpToolset wrapper applying ToolExecutor's per-tool concurrency caps."""
+
+    def __init__(self, toolset: BaseToolset, executor: "ToolExecutor"):
+        super().__init__()
+        self.toolset = toolset
+        self._executor = executor
+        # ADK caches a toolset's tools per invocation; keep the wrapped toolset's choice.
+        self._use_invocation_cache = toolset._use_invocation_cache
+
+    async def get_tools(self, readonly_context=None) -> list[BaseTool]:
+        tools = await self.toolset.get_tools(readonly_context)
+        return [_LimitedTool(tool, self._executor) for tool in tools]
+
+    async def close(self) -> None:
+        await self.toolset.close()
+
+
+class ToolExecutor:
+    """Thread pool plus per-tool concurrency limits for agent tools."""
+
+    def __init__(self, max_workers: int = 8, default_limit: int = 4,
+                 limits: dict[str, int] | None = None):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._default_limit = default_limit
+        self._limits = dict(TOOL_CONCURRENCY_LIMITS if limits is None else limits)
+        self._lock = threading.Lock()
+        self._thread_slots: dict[str, threading.BoundedSemaphore] = {}
+        # asyncio semaphores are bound to one event loop, so keep one set per loop.
+        self._async_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def limit(self, name: str) -> int:
+        """Return the maximum number of concurrent calls allowed for a tool."""
+        return self._limits.get(name, self._default_limit)
+
+    def _thread_slot(self, name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if name not in self._thread_slots:
+                self._thread_slots[name] = threading.BoundedSemaphore(self.limit(name))
+            return self._thread_slots[name]
+
+    def async_slot(self, name: str) -> asyncio.Semaphore:
+        """Return the asyncio semaphore limiting name on the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.setdefault(loop, {})
+            if name not in slots:
+                slots[name] = asyncio.Semaphore(self.limit(name))
+            return slots[name]
+
+    def _call_limited(self, func: Callable, kwargs: dict) -> Any:
+        # Backstop for calls from several event loops (server threads, batch
+        # mode): the asyncio slot only limits calls on one loop.
+        with self._thread_slot(func.__name__):
+            return func(**kwargs)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Return an async version of a sync tool that runs on the thread pool.
+
+        The wrapper keeps the name, docstring and signature of func, so ADK
+        builds the same function declaration for it. A call waits for its
+        tool's slot on the event loop before it takes a pool thread, so calls
+        queued behind a tool's limit do not hold workers other tools need.
+        """
+        if inspect.iscoroutinefunction(func):
+            return func
+
+        @functools.wraps(func)
+        async def run_in_pool(**kwargs):
+            loop = asyncio.get_running_loop()
+            # Carry context variables (e.g. the current user) into the pool thread.
+            context = contextvars.copy_context()
+            async with self.async_slot(func.__name__):
+                return await loop.run_in_executor(
+                    self._pool, functools.partial(context.run, self._call_limited, func, kwargs)
+                )
+
+        return run_in_pool
+
+    def wrap_tools(self, tools: list) -> list:
+        """Wrap an agent's tools list: functions run on the pool, toolsets get limits."""
+        wrapped = []
+        for tool in tools:
+            if isinstance(tool, BaseToolset):
+                wrapped.append(LimitedMcpToolset(tool, self))
+            elif isinstance(tool, BaseTool):
+                wrapped.append(_LimitedTool(tool, self))
+            else:
+                wrapped.append(self.wrap(tool))
+        return wrapped
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Run func(*args) on the pool, in a copy of the caller's context."""
+        return self._pool.submit(contextvars.copy_context().run, func, *args)
+
+    def on_every_thread(self, func: Callable, timeout: float = 10.0) -> list[Future]:
+        """Run func() once on each pool thread, e.g. to fill thread-local caches.
+
+        Each call holds its thread until all of them have started (or timeout
+        passes, if other work keeps threads busy), so no thread runs two.
+        """
+        barrier = threading.Barrier(self.max_workers)
+
+        def run():
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+            return func()
+
+        return [self.submit(run) for _ in range(self.max_workers)]
+
+    async def run_all(self, calls: list[tuple[Callable, dict]]) -> list[Any]:
+        """Run independent (func, kwargs) calls concurrently; results keep call order."""
+        return await asyncio.gather(*(self.wrap(func)(**kwargs) for func, kwargs in calls))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: ToolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Return the process-wide ToolExecutor configured from Settings."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = Settings()
+            _executor = ToolExecutor(settings.tool_max_workers, settings.tool_concurrency)
+        return _executor
@@ -0,0 +1,212 @@
+"""
+MCP Response Cache
+
+Read-only GitHub calls (search_repositories, list_issues, get_file_contents,
+...) are often repeated with identical arguments within a conversation, and
+each repeat costs an MCP round trip plus GitHub rate-limit budget.
+
+CachingMcpToolset wraps an MCP toolset and serves repeated read calls from a
+TTL + LRU cache bounded by entry count and bytes. Tools are classified by
+name: get_/list_/search_ tools are reads, anything else is treated as a write.
+A successful or failed write invalidates the cached reads for the same
+owner/repo, plus reads that are not scoped to a repository (searches), since
+their results may include it.
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+from config.settings import Settings
+
+READ_PREFIXES = ("get_", "list_", "search_")
+
+# Argument names that identify the repository a call touches.
+OWNER_ARGS = ("owner", "org", "organization")
+REPO_ARGS = ("repo", "repository")
+
+
+def is_read_tool(name: str) -> bool:
+    """Return True for tools that only read GitHub state."""
+    return name.startswith(READ_PREFIXES)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _scope(args: dict) -> tuple[str, str] | None:
+    owner = next((args[k] for k in OWNER_ARGS if args.get(k)), None)
+    repo = next((args[k] for k in REPO_ARGS if args.get(k)), None)
+    if owner is None or repo is None:
+        return None
+    return str(owner).strip().lower(), str(repo).strip().lower()
+
+
+def cache_key(tool_name: str, args: dict) -> str:
+    """Key on the tool name plus arguments normalized for order and whitespace."""
+    normalized = _normalize(args or {})
+    for name in OWNER_ARGS + REPO_ARGS:
+        if isinstance(normalized.get(name), str):
+            normalized[name] = normalized[name].lower()
+    return tool_name + ":" + json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("error") or result.get("isError"))
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache bounded by entries and approximate bytes."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256,
+                 max_bytes: int = 4 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, Any, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def _remove(self, key: str) -> None:
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, value); expired entries count as misses."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                # Callers may post-process results, so never hand out the cached object.
+                return True, copy.deepcopy(entry[3])
+            if entry is not None:
+                self._remove(key)
+            self._misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any, scope: tuple[str, str] | None = None) -> None:
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, scope, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, scope: tuple[str, str] | None) -> int:
+        """Drop entries for a repo and all unscoped entries; None drops everything."""
+        with self._lock:
+            stale = [
+                key for key, (_, entry_scope, _, _) in self._entries.items()
+                if scope is None or entry_scope is None or entry_scope == scope
+            ]
+            for key in stale:
+                self._remove(key)
+            self._invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+class _CachingTool(BaseTool):
+    """Forwards to an MCP tool, caching reads and invalidating on writes."""
+
+    def __init__(self, tool: BaseTool, cache: ResponseCache):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+        )
+        self._tool = tool
+        self._cache = cache
+
+    def _get_declaration(self):
+        return self._tool._get_declaration()
+
+    async def run_async(self, *, args: dict[str, Any], tool_context) -> Any:
+        if not is_read_tool(self.name):
+            try:
+                return await self._tool.run_async(args=args, tool_context=tool_context)
+            finally:
+                # Invalidate even on failure: the write may have been applied.
+                self._cache.invalidate(_scope(args or {}))
+
+        key = cache_key(self.name, args)
+        hit, value = self._cache.get(key)
+        if hit:
+            return value
+        result = await self._tool.run_async(args=args, tool_context=tool_context)
+        if not _is_error(result):
+            self._cache.put(key, result, _scope(args or {}))
+        return result
+
+
+class CachingMcpToolset(BaseToolset):
+    """MCP toolset wrapper that caches read-only tool results."""
+
+    def __init__(self, toolset: BaseToolset, cache: ResponseCache):
+        super().__init__()
+        self.toolset = toolset
+        self.cache = cache
+
+    async def get_tools(self, readonly_context=None) -> list[BaseTool]:
+        tools = await self.toolset.get_tools(readonly_context)
+        return [_CachingTool(tool, self.cache) for tool in tools]
+
+    async def close(self) -> None:
+        await self.toolset.close()
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_mcp_cache() -> ResponseCache | None:
+    """Return the shared MCP response cache, or None when disabled in Settings."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = Settings()
+            if not settings.mcp_cache_enabled:
+                return None
+            _cache = ResponseCache(
+                settings.mcp_cache_ttl,
+                settings.mcp_cache_max_entries,
+                settings.mcp_cache_max_bytes,
+            )
+        return _cache
@@ -0,0 +1,387 @@
+"""
+MCP Server Pool
+
+A McpToolset normally owns its server connection, and ADK binds that
+connection to the event loop that first used it. Each new agent, runner or
+asyncio loop therefore ends up spawning its own `npx` GitHub server, paying an
+npm resolution and a Node cold start every time.
+
+McpServerPool keeps one long-lived connection per registered server on a
+dedicated background event loop. PooledMcpToolset is a lightweight toolset
+that any agent can hold: its tools forward calls into the pool, so every
+session and runner in the process shares the same server. A supervisor task
+pings each connected server periodically and restarts it if it stops
+answering, and warm_up() lets the caller start connecting before the first
+prompt. McpMetrics records connect times and per-tool call latencies.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool import McpToolset
+
+from config.settings import Settings
+from tools.mcp_cache import is_read_tool
+from tools.quota import BULK, INTERACTIVE, RateLimited, get_quota_scheduler, mcp_rate_limit
+from tools.tracing import set_payload, span
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per tool for percentiles.
+LATENCY_SAMPLES = 1000
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summarize(samples) -> dict:
+    samples = list(samples)
+    if not samples:
+        return {}
+    return {
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 1),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+class McpMetrics:
+    """Thread-safe connect and call latency counters for pooled servers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connects: dict[str, list[float]] = {}
+        self._restarts: dict[str, int] = {}
+        self._calls: dict[str, deque] = {}
+        self._errors: dict[str, int] = {}
+
+    def record_connect(self, server: str, seconds: float) -> None:
+        with self._lock:
+            self._connects.setdefault(server, []).append(seconds)
+
+    def record_restart(self, server: str) -> None:
+        with self._lock:
+            self._restarts[server] = self._restarts.get(server, 0) + 1
+
+    def record_call(self, tool: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._calls.setdefault(tool, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+            if error:
+                self._errors[tool] = self._errors.get(tool, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Return connect and per-tool latency statistics."""
+        with self._lock:
+            servers = {
+                name: {
+                    "connects": len(times),
+                    "first_connect_ms": round(times[0] * 1000, 1),
+                    "last_connect_ms": round(times[-1] * 1000, 1),
+                    "restarts": self._restarts.get(name, 0),
+                }
+                for name, times in self._connects.items()
+            }
+            tools = {
+                name: {"calls": len(samples), "errors": self._errors.get(name, 0),
+                       **_summarize(samples)}
+                for name, samples in self._calls.items()
+            }
+        return {"servers": servers, "tools": tools}
+
+
+class _PooledServer:
+    """One MCP server connection owned by the pool's event loop."""
+
+    def __init__(self, name: str, connection_params: Any, pool: "McpServerPool"):
+        self.name = name
+        self.connection_params = connection_params
+        self._pool = pool
+        self._toolset: McpToolset | None = None
+        self._tools: dict[str, BaseTool] = {}
+        self._lock: asyncio.Lock | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._toolset is not None
+
+    async def _connect(self) -> None:
+        start = time.perf_counter()
+        toolset = McpToolset(connection_params=self.connection_params)
+        try:
+            tools = await asyncio.wait_for(toolset.get_tools(), self._pool.connect_timeout)
+        except BaseException:
+            await toolset.close()
+            raise
+        self._toolset = toolset
+        self._tools = {tool.name: tool for tool in tools}
+        self._pool.metrics.record_connect(self.name, time.perf_counter() - start)
+        logger.info("MCP server %r connected with %d tools", self.name, len(tools))
+
+    async def _disconnect(self) -> None:
+        toolset, self._toolset, self._tools = self._toolset, None, {}
+        if toolset is not None:
+            try:
+                await toolset.close()
+            except Exception:
+                logger.debug("Error closing MCP server %r", self.name, exc_info=True)
+
+    async def ensure_connected(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._toolset is None:
+                await self._connect()
+
+    async def restart(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._disconnect()
+            self._pool.metrics.record_restart(self.name)
+            await self._connect()
+
+    async def check_health(self) -> bool:
+        """List tools as a liveness ping; restart the server if it fails."""
+        if self._toolset is None:
+            return False
+        try:
+            await asyncio.wait_for(self._toolset.get_tools(), self._pool.connect_timeout)
+            return True
+        except Exception as e:
+            logger.warning("MCP server %r failed health check (%s); restarting", self.name, e)
+        try:
+            await self.restart()
+        except Exception:
+            logger.exception("Restarting MCP server %r failed", self.name)
+        return False
+
+    async def list_tools(self) -> list[BaseTool]:
+        await self.ensure_connected()
+        return list(self._tools.values())
+
+    async def call_tool(self, tool_name: str, args: dict, tool_context) -> Any:
+        await self.ensure_connected()
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            raise ValueError(f"MCP server {self.name!r} has no tool {tool_name!r}")
+        return await tool.run_async(args=args, tool_context=tool_context)
+
+    async def close(self) -> None:
+        await self._disconnect()
+        self._lock = None
+
+
+class _PooledMcpTool(BaseTool):
+    """Proxy for an MCP tool that runs the call on the pool's event loop."""
+
+    def __init__(self, tool: BaseTool, server: _PooledServer, pool: "McpServerPool"):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+        )
+        self._tool = tool
+        self._server = server
+        self._pool = pool
+
+    def _get_declaration(self):
+        return self._tool._get_declaration()
+
+    async def run_async(self, *, args: dict[str, Any], tool_context) -> Any:
+        async def call() -> Any:
+            with span("mcp.request", **{"mcp.server": self._server.name,
+                                        "mcp.tool": self.name}) as current:
+                set_payload(current, "request_bytes", args)
+                result = await self._pool.run(
+                    self._server.call_tool(self.name, args, tool_context)
+                )
+                set_payload(current, "response_bytes", result)
+            throttled = mcp_rate_limit(result)
+            if throttled is not None:
+                raise throttled
+            return result
+
+        start = time.perf_counter()
+        priority = INTERACTIVE if is_read_tool(self.name) else BULK
+        try:
+            # Only rate-limit answers are retried: the server refused those
+            # before acting. Other failures may have had side effects.
+            result = await get_quota_scheduler().call_async(
+                self._server.name, call, priority,
+                retry_on=lambda e: isinstance(e, RateLimited),
+            )
+        except RateLimited as e:
+            result = e.result
+        except Exception:
+            self._pool.metrics.record_call(self.name, time.perf_counter() - start, error=True)
+            # The server is checked so the next call gets a working connection.
+            self._pool.submit(self._server.check_health())
+            raise
+        failed = isinstance(result, dict) and ("error" in result or result.get("isError"))
+        self._pool.metrics.record_call(self.name, time.perf_counter() - start, error=failed)
+        return result
+
+
+class PooledMcpToolset(BaseToolset):
+    """Toolset backed by a shared server in McpServerPool.
+
+    Creating one is cheap and never spawns a process; the connection is made
+    (once per process) when the pool warms up or the tools are first listed.
+    """
+
+    def __init__(self, pool: "McpServerPool", server_name: str, tool_filter=None):
+        super().__init__(tool_filter=tool_filter)
+        self.pool = pool
+        self.server_name = server_name
+
+    async def get_tools(self, readonly_context=None) -> list[BaseTool]:
+        server = self.pool.server(self.server_name)
+        tools = await self.pool.run(server.list_tools())
+        return [
+            _PooledMcpTool(tool, server, self.pool)
+            for tool in tools
+            if self._is_tool_selected(tool, readonly_context)
+        ]
+
+    async def close(self) -> None:
+        # The connection belongs to the pool and outlives any one agent.
+        pass
+
+
+class McpServerPool:
+    """Long-lived MCP server connections shared by every agent in the process."""
+
+    def __init__(self, health_interval: float = 30.0, connect_timeout: float = 30.0):
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.metrics = McpMetrics()
+        self._servers: dict[str, _PooledServer] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._supervisor: Future | None = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="mcp-pool", daemon=True
+                )
+                self._thread.start()
+                if self.health_interval > 0:
+                    self._supervisor = asyncio.run_coroutine_threadsafe(
+                        self._supervise(), self._loop
+                    )
+                atexit.register(self.close)
+            return self._loop
+
+    def register(self, name: str, connection_params: Any) -> PooledMcpToolset:
+        """Register a server (if new) and return a toolset that uses it.
+
+        Registering the same name again returns a toolset for the existing
+        server; its connection parameters are not replaced.
+        """
+        with self._lock:
+            if name not in self._servers:
+                self._servers[name] = _PooledServer(name, connection_params, self)
+        return self.toolset(name)
+
+    def names(self) -> list[str]:
+        """Names of the registered servers."""
+        with self._lock:
+            return list(self._servers)
+
+    def server(self, name: str) -> _PooledServer:
+        try:
+            return self._servers[name]
+        except KeyError:
+            raise KeyError(f"MCP server {name!r} is not registered") from None
+
+    def toolset(self, name: str, tool_filter=None) -> PooledMcpToolset:
+        self.server(name)
+        return PooledMcpToolset(self, name, tool_filter=tool_filter)
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the pool loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def run(self, coro: Coroutine) -> Any:
+        """Await a coroutine on the pool loop from another event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def warm_up(self, callback: Callable[[str, BaseException | None], None] | None = None
+                ) -> dict[str, Future]:
+        """Start connecting every registered server in the background.
+
+        Returns one future per server; warm-up failures are logged (and passed
+        to callback) rather than raised, and the connection is retried on the
+        first real use.
+        """
+        futures = {}
+        for name, server in list(self._servers.items()):
+            future = self.submit(server.ensure_connected())
+
+            def done(f: Future, name=name):
+                error = f.exception()
+                if error is not None:
+                    logger.warning("Warm-up of MCP server %r failed: %s", name, error)
+                if callback is not None:
+                    callback(name, error)
+
+            future.add_done_callback(done)
+            futures[name] = future
+        return futures
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for server in list(self._servers.values()):
+                if server.connected:
+                    await server.check_health()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Close every server connection and stop the pool loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+
+        async def close_all():
+            await asyncio.gather(
+                *(server.close() for server in self._servers.values()),
+                return_exceptions=True,
+            )
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_all(), loop).result(timeout)
+        except Exception:
+            logger.debug("Timed out closing MCP servers", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+
+
+_pool: McpServerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_mcp_pool() -> McpServerPool:
+    """Return the process-wide MCP server pool configured from Settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = Settings()
+            _pool = McpServerPool(settings.mcp_health_interval, settings.mcp_connect_timeout)
+        return _pool
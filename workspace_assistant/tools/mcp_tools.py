@@ -8,41 +8,69 @@ Optional: File-based configuration from config/mcp_servers.json
 """
 
 import json
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from google.adk.tools.mcp_tool import McpToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from google.adk.tools import ToolContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    SseConnectionParams,
+    StdioConnectionParams,
+    StreamableHTTPConnectionParams,
+)
 from mcp import StdioServerParameters
 
+from config.settings import Settings
+from tools.mcp_cache import CachingMcpToolset, get_mcp_cache
+from tools.mcp_pool import PooledMcpToolset, get_mcp_pool
+from tools.tool_search import ToolIndex, describe_tool, tools_hash
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Path to MCP server configuration (for Option B)
 MCP_CONFIG_PATH = Path(__file__).parent.parent / "config" / "mcp_servers.json"
 
+GITHUB_SERVER = "github"
+
+
+def _github_connection_params(token: str, command: str = "npx",
+                              args: list[str] | None = None, env: dict | None = None):
+    """Connection parameters for the GitHub server: a URL if configured, else stdio."""
+    settings = Settings()
+    if settings.github_mcp_url:
+        headers = {"Authorization": f"Bearer {token}"}
+        if settings.github_mcp_url.rstrip("/").endswith("/sse"):
+            return SseConnectionParams(url=settings.github_mcp_url, headers=headers)
+        return StreamableHTTPConnectionParams(url=settings.github_mcp_url, headers=headers)
+
+    server_params = StdioServerParameters(
+        command=command,
+        args=args or ["-y", "@modelcontextprotocol/server-github"],
+        env={**os.environ, **(env or {}), "GITHUB_PERSONAL_ACCESS_TOKEN": token},
+    )
+    return StdioConnectionParams(
+        server_params=server_params, timeout=settings.mcp_connect_timeout
+    )
+
 
 # =============================================================================
 # REQUIRED: Direct Configuration
 # =============================================================================
-# TODO: Implement get_github_mcp_toolset()
-# Configure the GitHub MCP server directly in Python code.
-#
-# Example structure:
-#
-# def get_github_mcp_toolset() -> McpToolset:
-#     token = os.getenv("GITHUB_PERSONAL_ACCESS_TOKEN")
-#     if not token:
-#         raise ValueError("GITHUB_PERSONAL_ACCESS_TOKEN not set in .env")
-#
-#     server_params = StdioServerParameters(
-#         command="npx",
-#         args=["-y", "@modelcontextprotocol/server-github"],
-#         env={"GITHUB_PERSONAL_ACCESS_TOKEN": token}
-#     )
-#
-#     return McpToolset(
-#         connection_params=StdioConnectionParams(server_params=server_params)
-#     )
+def get_github_mcp_toolset() -> PooledMcpToolset:
+    """Return a toolset for the shared, pooled GitHub MCP server.
+
+    The server is started once per process by the pool (see tools/mcp_pool.py)
+    and reused by every agent, session and runner.
+    """
+    token = os.getenv("GITHUB_PERSONAL_ACCESS_TOKEN")
+    if not token:
+        raise ValueError("GITHUB_PERSONAL_ACCESS_TOKEN not set in .env")
+
+    return get_mcp_pool().register(GITHUB_SERVER, _github_connection_params(token))
 
 
 # =============================================================================
@@ -67,91 +95,135 @@ def load_mcp_config() -> dict:
     return config
 
 
-# TODO: Implement get_github_mcp_toolset_from_config()
-# Load configuration from config/mcp_servers.json
-#
-# Example structure:
-#
-# def get_github_mcp_toolset_from_config() -> McpToolset:
-#     config = load_mcp_config()
-#     github = config["mcpServers"]["github"]
-#
-#     token = github["env"].get("GITHUB_PERSONAL_ACCESS_TOKEN")
-#     if not token:
-#         raise ValueError("GITHUB_PERSONAL_ACCESS_TOKEN not set in .env")
-#
-#     server_params = StdioServerParameters(
-#         command=github["command"],
-#         args=github["args"],
-#         env=github["env"]
-#     )
-#
-#     return McpToolset(
-#         connection_params=StdioConnectionParams(server_params=server_params)
-#     )
+def get_github_mcp_toolset_from_config() -> PooledMcpToolset:
+    """Return a pooled GitHub toolset configured from config/mcp_servers.json."""
+    config = load_mcp_config()
+    github = config["mcpServers"]["github"]
+
+    token = github["env"].get("GITHUB_PERSONAL_ACCESS_TOKEN")
+    if not token:
+        raise ValueError("GITHUB_PERSONAL_ACCESS_TOKEN not set in .env")
+
+    params = _github_connection_params(
+        token, command=github["command"], args=github["args"], env=github["env"]
+    )
+    return get_mcp_pool().register(GITHUB_SERVER, params)
 
 
 # =============================================================================
-# BONUS (+25 points) - Tool Search Pattern
+# BONUS - Tool Search Pattern
 # =============================================================================
-# Implement defer_loading to reduce token usage by ~80%
-#
-# Why: GitHub MCP has 15+ tools (~8K tokens). Loading all upfront is wasteful.
-# With defer_loading, tools are discovered on-demand (~1.5K tokens).
-#
-# Points breakdown:
-# - search_github_tools function (10 pts)
-# - defer_loading=True configured (10 pts)
-# - create_agent_with_tool_search works (5 pts)
-#
-# Steps:
-# 1. Create a search_github_tools tool that searches available MCP tools
-# 2. Configure McpToolset with defer_loading=True
-# 3. Keep only 1-2 frequently-used tools always loaded
-#
-# REQUIRED: In your reflection, compare context/token usage:
-# - Run WITHOUT defer_loading, note context size (~8K tokens for 15+ tools)
-# - Run WITH defer_loading, note context size (~1.5K tokens)
-# - Calculate and report the % reduction
-#
-# Example structure:
-#
-# from google.adk.tools import tool
-#
-# @tool
-# def search_github_tools(query: str) -> dict:
-#     """Search for available GitHub tools by keyword.
-#
-#     Args:
-#         query: Search term (e.g., "issues", "repository", "pull request")
-#
-#     Returns:
-#         dict with matching tool names and descriptions
-#     """
-#     # TODO: Implement tool search logic
-#     pass
-#
-#
-# def get_github_mcp_toolset_deferred() -> McpToolset:
-#     """Create McpToolset with defer_loading for on-demand tool discovery."""
-#     token = os.getenv("GITHUB_PERSONAL_ACCESS_TOKEN")
-#     if not token:
-#         raise ValueError("GITHUB_PERSONAL_ACCESS_TOKEN not set")
-#
-#     server_params = StdioServerParameters(
-#         command="npx",
-#         args=["-y", "@modelcontextprotocol/server-github"],
-#         env={"GITHUB_PERSONAL_ACCESS_TOKEN": token}
-#     )
-#
-#     return McpToolset(
-#         connection_params=StdioConnectionParams(server_params=server_params),
-#         defer_loading=True  # Key: tools loaded on-demand
-#     )
-
-
-mcp_tools = [
-    # Add your McpToolset here after implementing one of the options above
-    # Example: get_github_mcp_toolset()
-    # Example: get_github_mcp_toolset_from_config()
-]
+# McpToolset has no defer_loading option, so deferral is done here instead:
+# DeferredMcpToolset only declares the GitHub tools that search_github_tools
+# has loaded into the session (plus ALWAYS_LOADED_TOOLS), so the next model
+# request carries a handful of schemas instead of the whole server.
+
+# Tools declared even before any search.
+ALWAYS_LOADED_TOOLS = ("search_repositories",)
+# Session state key holding the names of tools loaded by search.
+LOADED_TOOLS_KEY = "github_loaded_tools"
+# Most recently searched tools kept loaded; older ones drop out.
+MAX_LOADED_TOOLS = 8
+SEARCH_RESULTS = 3
+
+TOOL_INDEX_PATH = Path(__file__).parent.parent / "config" / "cache" / "github_tool_index.json"
+
+_tool_index: ToolIndex | None = None
+
+
+def _github_toolset():
+    """The pooled GitHub toolset, behind the read cache when it is enabled."""
+    toolset = get_github_mcp_toolset()
+    cache = get_mcp_cache()
+    return CachingMcpToolset(toolset, cache) if cache is not None else toolset
+
+
+async def get_github_tool_index() -> ToolIndex:
+    """Return the search index for the GitHub server's current tool list.
+
+    The index is rebuilt when any tool's name, description or schema changes.
+    """
+    global _tool_index
+    tools = await get_github_mcp_toolset().get_tools()
+    descriptors = [describe_tool(tool) for tool in tools]
+    if _tool_index is None or _tool_index.digest != tools_hash(descriptors):
+        _tool_index = ToolIndex.load_or_build(descriptors, TOOL_INDEX_PATH)
+    return _tool_index
+
+
+async def search_github_tools(query: str, tool_context: ToolContext) -> dict:
+    """Search for available GitHub tools by keyword and load the best matches.
+
+    The returned tools can be called from the next step of the conversation.
+
+    Args:
+        query: What you want to do (e.g., "list open PRs", "read a README", "create issue")
+
+    Returns:
+        dict with matching tool names, descriptions and parameters
+    """
+    try:
+        index = await get_github_tool_index()
+        matches = index.search(query, k=SEARCH_RESULTS)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+    if not matches:
+        return {"status": "success", "tools": [], "message": f"No GitHub tools match '{query}'"}
+
+    found = [tool["name"] for tool, _ in matches]
+    previous = tool_context.state.get(LOADED_TOOLS_KEY, [])
+    tool_context.state[LOADED_TOOLS_KEY] = (
+        found + [name for name in previous if name not in found]
+    )[:MAX_LOADED_TOOLS]
+
+    return {
+        "status": "success",
+        "tools": [
+            {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": list(tool["parameters"].get("properties", {})),
+                "required": tool["parameters"].get("required", []),
+            }
+            for tool, _ in matches
+        ],
+    }
+
+
+class DeferredMcpToolset(BaseToolset):
+    """Declares only the MCP tools loaded into the session by search_github_tools."""
+
+    def __init__(self, toolset: BaseToolset, always_loaded=ALWAYS_LOADED_TOOLS):
+        super().__init__()
+        self.toolset = toolset
+        self.always_loaded = tuple(always_loaded)
+        # Re-read the loaded tools on every model step, not once per invocation,
+        # so a search takes effect within the same turn.
+        self._use_invocation_cache = False
+
+    async def get_tools(self, readonly_context=None) -> list[BaseTool]:
+        loaded = set(self.always_loaded)
+        if readonly_context is not None:
+            loaded.update(readonly_context.state.get(LOADED_TOOLS_KEY, []))
+        tools = await self.toolset.get_tools(readonly_context)
+        return [tool for tool in tools if tool.name in loaded]
+
+    async def close(self) -> None:
+        await self.toolset.close()
+
+
+def get_github_mcp_toolset_deferred() -> DeferredMcpToolset:
+    """GitHub toolset whose tools are declared on demand (see search_github_tools)."""
+    return DeferredMcpToolset(_github_toolset())
+
+
+def _load_mcp_tools() -> list:
+    try:
+        return [_github_toolset()]
+    except ValueError as e:
+        logger.warning("GitHub tools disabled: %s", e)
+        return []
+
+
+mcp_tools = _load_mcp_tools()
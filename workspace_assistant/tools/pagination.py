@@ -0,0 +1,95 @@
+"""
+Paginated Listing
+
+Generators over list endpoints such as events().list and tasks().list.
+iter_pages() fetches the next page on a background thread while the caller
+processes the current one, and iter_items() flattens pages into items with
+optional filtering and early stopping, so the remaining pages are never
+requested. Only one page (plus the one being prefetched) is held in memory,
+however many items the account has.
+
+Requests are built inside the fetching thread by a make_request(page_token)
+callable. googleapiclient services are not thread-safe, and the getters in
+tools/auth.py hand out one client per thread, so the callable should call
+get_calendar_service() / get_tasks_service() rather than capture a service.
+It runs in a copy of the caller's context, so it acts as the same user.
+Pages are fetched through the quota scheduler (tools/quota.py) as
+interactive reads.
+"""
+
+import contextvars
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+from tools.quota import get_quota_scheduler
+
+# Threads shared by all iterators for fetching the next page.
+PREFETCH_WORKERS = 4
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="page")
+
+
+def partial_fields(item_fields: str, item_key: str = "items",
+                   page_fields: tuple[str, ...] = ("nextPageToken",)) -> str:
+    """Build a fields= partial-response selector, e.g. 'nextPageToken,items(id,title)'."""
+    return ",".join((*page_fields, f"{item_key}({item_fields})"))
+
+
+def iter_pages(make_request: Callable[[str | None], Any],
+               prefetch: bool = True) -> Iterator[dict]:
+    """Yield response pages, following nextPageToken.
+
+    Args:
+        make_request: Returns the HttpRequest for a page token (None for the
+            first page). Called on the fetching thread.
+        prefetch: Request page n+1 while page n is being processed.
+    """
+    def fetch(page_token: str | None) -> dict:
+        return get_quota_scheduler().execute(make_request(page_token))
+
+    def submit(page_token: str | None) -> Future:
+        return _prefetch_pool.submit(contextvars.copy_context().run, fetch, page_token)
+
+    if not prefetch:
+        page_token = None
+        while True:
+            page = fetch(page_token)
+            yield page
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+
+    future: Future | None = submit(None)
+    try:
+        while future is not None:
+            page = future.result()
+            page_token = page.get("nextPageToken")
+            future = submit(page_token) if page_token else None
+            yield page
+    finally:
+        # The consumer stopped early: drop the page being prefetched.
+        if future is not None:
+            future.cancel()
+
+
+def iter_items(make_request: Callable[[str | None], Any], item_key: str = "items",
+               where: Callable[[dict], bool] | None = None, limit: int | None = None,
+               prefetch: bool = True) -> Iterator[dict]:
+    """Yield items across pages, stopping as soon as limit matching items are found.
+
+    Args:
+        make_request: See iter_pages().
+        item_key: Key of the item list in each page.
+        where: Only yield items for which this returns True.
+        limit: Stop (and stop fetching) after this many yielded items.
+        prefetch: See iter_pages().
+    """
+    pages = iter_pages(make_request, prefetch=prefetch)
+    items = itertools.chain.from_iterable(page.get(item_key, []) for page in pages)
+    if where is not None:
+        items = filter(where, items)
+    try:
+        yield from itertools.islice(items, limit)
+    finally:
+        pages.close()
@@ -0,0 +1,482 @@
+"""
+Client-Side Quota Scheduler
+
+Every Google API request and GitHub MCP call goes through QuotaScheduler,
+so that load from many turns and users is spread out before the servers
+start answering 429 / 403 rateLimitExceeded:
+
+- Token buckets per API (the project-wide quota) and per user and API
+  refill at the configured rate, with BURST_SECONDS of burst. A batch
+  costs one token per request in it, as Google counts it.
+- Priority: bulk writes (batched updates, GitHub writes) leave
+  BULK_RESERVE of each bucket to interactive reads and wait while reads are
+  queued for the same API.
+- Retries: rate-limit, 5xx and network errors are retried up to
+  Settings.max_retries times with exponential backoff and full jitter
+  (base Settings.retry_delay). A Retry-After from the server is honored and
+  also pauses the API's bucket for every other caller. Each throttle halves
+  the bucket's rate; successes restore it gradually.
+- A circuit breaker per API opens when at least CIRCUIT_MIN_CALLS calls in
+  the last CIRCUIT_WINDOW seconds failed at Settings.circuit_error_rate or
+  more. While open, calls fail fast; after Settings.circuit_cooldown one
+  trial call is let through, and its outcome closes or reopens the circuit.
+
+snapshot() reports live headroom, throttling and breaker state per API.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlparse
+
+from googleapiclient.errors import HttpError
+
+from config.settings import Settings
+from tools.auth import current_user
+from tools.tracing import set_payload, span
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+
+# Seconds of traffic at the full rate a bucket can absorb at once.
+BURST_SECONDS = 10.0
+# Fraction of each bucket that bulk calls must leave for interactive ones.
+BULK_RESERVE = 0.3
+# A throttled bucket never drops below this fraction of its configured rate,
+# and each success gives back this fraction.
+MIN_RATE_FRACTION = 0.1
+RECOVERY_STEP = 0.05
+
+CIRCUIT_WINDOW = 30.0
+CIRCUIT_MIN_CALLS = 10
+
+MAX_BACKOFF = 60.0
+# Longest single sleep while waiting for tokens, so new arrivals are seen.
+MAX_POLL = 0.25
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded")
+
+_RATE_LIMIT_TEXT = re.compile(r"rate limit|too many requests|\b429\b", re.IGNORECASE)
+_RETRY_AFTER_TEXT = re.compile(r"retry[- ]after\D{0,3}(\d+)|try again in (\d+) ?s", re.IGNORECASE)
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling an API whose circuit breaker is open."""
+
+    def __init__(self, api: str, retry_in: float):
+        super().__init__(
+            f"The {api} API is failing or rate limited; not calling it for another "
+            f"{retry_in:.0f}s"
+        )
+        self.api = api
+        self.retry_in = retry_in
+
+
+class RateLimited(Exception):
+    """A rate-limit response that was not raised as an HttpError (e.g. from MCP)."""
+
+    def __init__(self, result: Any = None, retry_after: float | None = None):
+        super().__init__("Rate limited")
+        self.result = result
+        self.retry_after = retry_after
+
+
+def api_name(request: Any) -> str:
+    """Name of the API a googleapiclient request targets ('calendar', 'tasks', ...)."""
+    path = urlparse(getattr(request, "uri", "") or "").path
+    return path.strip("/").split("/")[0] or "google"
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds the server asked us to wait (Retry-After), if it said."""
+    if isinstance(error, RateLimited):
+        return error.retry_after
+    if isinstance(error, HttpError):
+        value = error.resp.get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+    return None
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if isinstance(error, RateLimited):
+        return True
+    if not isinstance(error, HttpError):
+        return False
+    return error.status_code == 429 or (
+        error.status_code == 403 and any(r in (error.content or b"") for r in RATE_LIMIT_REASONS)
+    )
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for errors worth retrying: rate limits, 5xx and network failures."""
+    if isinstance(error, HttpError):
+        return error.status_code in RETRYABLE_STATUS or _is_rate_limit(error)
+    return isinstance(error, (RateLimited, ConnectionError, TimeoutError))
+
+
+def mcp_rate_limit(result: Any) -> RateLimited | None:
+    """Return RateLimited if an MCP tool result is a rate-limit error."""
+    if not isinstance(result, dict) or not (result.get("isError") or "error" in result):
+        return None
+    text = " ".join(
+        str(item.get("text", "")) for item in result.get("content") or [] if isinstance(item, dict)
+    ) + " " + str(result.get("error", ""))
+    if not _RATE_LIMIT_TEXT.search(text):
+        return None
+    match = _RETRY_AFTER_TEXT.search(text)
+    return RateLimited(result, float(match.group(1) or match.group(2)) if match else None)
+
+
+class TokenBucket:
+    """Token bucket whose rate adapts to throttling. Not thread-safe by itself."""
+
+    def __init__(self, rate: float, burst_seconds: float = BURST_SECONDS):
+        self.limit = rate
+        self.rate = rate
+        self.capacity = max(rate * burst_seconds, 1.0)
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def wait_time(self, cost: float, reserve: float, now: float) -> float:
+        """Seconds until cost tokens can be taken while keeping reserve of the bucket."""
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        # Calls larger than the bucket run once it is full and leave it in debt.
+        need = min(cost + reserve * self.capacity, self.capacity)
+        return max(need - self.tokens, 0.0) / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+    def throttle(self, retry_after: float | None, now: float) -> None:
+        self.rate = max(self.limit * MIN_RATE_FRACTION, self.rate / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+    def recover(self) -> None:
+        self.rate = min(self.limit, self.rate + self.limit * RECOVERY_STEP)
+
+    def headroom(self, now: float) -> float:
+        self._refill(now)
+        return round(max(self.tokens, 0.0) / self.capacity, 3)
+
+
+class CircuitBreaker:
+    """Opens when the recent error rate spikes; half-opens after a cooldown."""
+
+    def __init__(self, error_rate: float = 0.5, cooldown: float = 30.0,
+                 window: float = CIRCUIT_WINDOW, min_calls: int = CIRCUIT_MIN_CALLS):
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.window = window
+        self.min_calls = min_calls
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial_at = 0.0
+        self.trips = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+
+    def blocked_for(self, now: float) -> float:
+        """0 if a call may go ahead, else roughly how long until one may."""
+        if self.state == "closed":
+            return 0.0
+        if self.state == "half_open" and now - self.trial_at < self.cooldown:
+            # One trial call at a time; others fail fast until it reports back
+            # (or, if it never does, until another cooldown has passed).
+            return 1.0
+        return max(self.opened_at + self.cooldown - now, 0.0)
+
+    def admit(self, now: float) -> None:
+        """Let a call through; after the cooldown it becomes the trial call."""
+        if self.state != "closed":
+            self.state = "half_open"
+            self.trial_at = now
+
+    def record(self, failed: bool, now: float) -> None:
+        if self.state == "half_open":
+            if failed:
+                self._open(now)
+            else:
+                self.state = "closed"
+                self._outcomes.clear()
+            return
+        self._outcomes.append((now, failed))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(failed for _, failed in self._outcomes)
+        if (self.state == "closed" and len(self._outcomes) >= self.min_calls
+                and failures >= self.error_rate * len(self._outcomes)):
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.trips += 1
+        self._outcomes.clear()
+
+
+class QuotaScheduler:
+    """Rate limits, retries and circuit breaking shared by all API calls."""
+
+    def __init__(self, rates: dict[str, float] | None = None, user_rate: float = 0.0,
+                 max_retries: int = 3, retry_delay: float = 1.0,
+                 circuit_error_rate: float = 0.5, circuit_cooldown: float = 30.0):
+        # API -> requests per second for the whole process; APIs without a
+        # (positive) rate are not rate limited, only retried.
+        self.rates = {api: rate for api, rate in (rates or {}).items() if rate > 0}
+        self.user_rate = user_rate
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.circuit_error_rate = circuit_error_rate
+        self.circuit_cooldown = circuit_cooldown
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {
+            api: TokenBucket(rate) for api, rate in self.rates.items()
+        }
+        self._user_buckets: dict[tuple[str, str | None], TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._waiting_interactive: dict[str, int] = {}
+        self._metrics: dict[str, dict[str, float]] = {}
+
+    def _metric(self, api: str, name: str, amount: float = 1) -> None:
+        counters = self._metrics.setdefault(
+            api, {"calls": 0, "retries": 0, "throttled": 0, "failures": 0, "wait_s": 0.0}
+        )
+        counters[name] += amount
+
+    def _breaker(self, api: str) -> CircuitBreaker:
+        if api not in self._breakers:
+            self._breakers[api] = CircuitBreaker(self.circuit_error_rate, self.circuit_cooldown)
+        return self._breakers[api]
+
+    def _buckets_for(self, api: str) -> list[TokenBucket]:
+        if api not in self._buckets:
+            return []
+        buckets = [self._buckets[api]]
+        if self.user_rate > 0:
+            key = (api, current_user.get())
+            if key not in self._user_buckets:
+                self._user_buckets[key] = TokenBucket(self.user_rate)
+            buckets.append(self._user_buckets[key])
+        return buckets
+
+    def _try_acquire(self, api: str, priority: int, cost: float) -> float:
+        """Take tokens from the API and user buckets and return 0, or return the wait."""
+        now = time.monotonic()
+        with self._lock:
+            breaker = self._breaker(api)
+            blocked = breaker.blocked_for(now)
+            if blocked:
+                raise CircuitOpen(api, blocked)
+            reserve = BULK_RESERVE if priority == BULK else 0.0
+            buckets = self._buckets_for(api)
+            wait = max((b.wait_time(cost, reserve, now) for b in buckets), default=0.0)
+            if priority == BULK and self._waiting_interactive.get(api):
+                wait = max(wait, MAX_POLL)
+            if wait:
+                return wait
+            breaker.admit(now)
+            for bucket in buckets:
+                bucket.take(cost)
+            self._metric(api, "calls")
+            return 0.0
+
+    def _waiting(self, api: str, priority: int, delta: int) -> None:
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._waiting_interactive[api] = self._waiting_interactive.get(api, 0) + delta
+
+    def acquire(self, api: str, priority: int = INTERACTIVE, cost: float = 1) -> float:
+        """Block until the call may go ahead; return the seconds waited."""
+        start = time.monotonic()
+        wait = self._try_acquire(api, priority, cost)
+        if not wait:
+            return 0.0
+        self._waiting(api, priority, 1)
+        try:
+            while wait:
+                time.sleep(min(wait, MAX_POLL))
+                wait = self._try_acquire(api, priority, cost)
+        finally:
+            self._waiting(api, priority, -1)
+        return self._waited(api, start)
+
+    async def acquire_async(self, api: str, priority: int = INTERACTIVE, cost: float = 1) -> float:
+        """acquire() for coroutines: waits without blocking the event loop."""
+        start = time.monotonic()
+        wait = self._try_acquire(api, priority, cost)
+        if not wait:
+            return 0.0
+        self._waiting(api, priority, 1)
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, MAX_POLL))
+                wait = self._try_acquire(api, priority, cost)
+        finally:
+            self._waiting(api, priority, -1)
+        return self._waited(api, start)
+
+    def _waited(self, api: str, start: float) -> float:
+        waited = time.monotonic() - start
+        with self._lock:
+            self._metric(api, "wait_s", waited)
+        return waited
+
+    def record(self, api: str, error: Exception | None) -> None:
+        """Feed a call's outcome to the breaker and the adaptive rate."""
+        now = time.monotonic()
+        transient = error is not None and is_retryable(error)
+        with self._lock:
+            breaker = self._breaker(api)
+            was_open = breaker.state == "open"
+            breaker.record(transient, now)
+            if breaker.state == "open" and not was_open:
+                logger.warning("Circuit for the %s API opened after repeated failures", api)
+            if transient:
+                self._metric(api, "failures")
+            if error is not None and _is_rate_limit(error):
+                self._metric(api, "throttled")
+                for bucket in self._buckets_for(api):
+                    bucket.throttle(retry_after(error), now)
+            elif error is None:
+                for bucket in self._buckets_for(api):
+                    bucket.recover()
+
+    def backoff(self, attempt: int, retry_after: float | None = None,
+                retry_delay: float | None = None) -> float:
+        """Delay before retry number attempt + 1: full jitter, at least Retry-After."""
+        base = self.retry_delay if retry_delay is None else retry_delay
+        delay = random.uniform(0, min(MAX_BACKOFF, base * 2 ** attempt))
+        if retry_after is not None:
+            delay += retry_after
+        return delay
+
+    def _retry_delay(self, api: str, error: Exception, attempt: int,
+                     retry_on: Callable[[Exception], bool]) -> float | None:
+        """Record a failed attempt; return the delay before retrying, or None to give up."""
+        self.record(api, error)
+        if not retry_on(error) or attempt >= self.max_retries:
+            return None
+        with self._lock:
+            self._metric(api, "retries")
+        return self.backoff(attempt, retry_after(error))
+
+    def call(self, api: str, func: Callable[[], Any], priority: int = INTERACTIVE,
+             cost: float = 1, retry_on: Callable[[Exception], bool] = is_retryable) -> Any:
+        """Run func under the API's limits, retrying the failures retry_on accepts."""
+        attempt = 0
+        while True:
+            self.acquire(api, priority, cost)
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._retry_delay(api, e, attempt, retry_on)
+                if delay is None:
+                    raise
+            else:
+                self.record(api, None)
+                return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, api: str, func: Callable[[], Awaitable[Any]],
+                         priority: int = INTERACTIVE, cost: float = 1,
+                         retry_on: Callable[[Exception], bool] = is_retryable) -> Any:
+        """call() for coroutine functions."""
+        attempt = 0
+        while True:
+            await self.acquire_async(api, priority, cost)
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._retry_delay(api, e, attempt, retry_on)
+                if delay is None:
+                    raise
+            else:
+                self.record(api, None)
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def execute(self, request: Any, priority: int = INTERACTIVE) -> Any:
+        """Execute a googleapiclient request through the scheduler."""
+        api = api_name(request)
+
+        def send() -> Any:
+            # One span per attempt, so retries and backoff show up as gaps.
+            with span("google.api.request", **{
+                "google.api": api,
+                "google.method": getattr(request, "methodId", None),
+                "http.method": getattr(request, "method", None),
+            }) as current:
+                set_payload(current, "request_bytes", getattr(request, "body", None))
+                response = request.execute()
+                set_payload(current, "response_bytes", response)
+                return response
+
+        return self.call(api, send, priority)
+
+    def snapshot(self) -> dict:
+        """Live quota headroom (fraction of each bucket left), throttling and breaker state."""
+        now = time.monotonic()
+        with self._lock:
+            apis = {}
+            for api in sorted(set(self._buckets) | set(self._breakers) | set(self._metrics)):
+                bucket = self._buckets.get(api)
+                breaker = self._breakers.get(api)
+                users = [b.headroom(now) for (a, _), b in self._user_buckets.items() if a == api]
+                apis[api] = {
+                    "limit_per_s": bucket.limit if bucket else None,
+                    "rate_per_s": round(bucket.rate, 3) if bucket else None,
+                    "headroom": bucket.headroom(now) if bucket else None,
+                    "paused_s": round(max(bucket.paused_until - now, 0.0), 1) if bucket else 0.0,
+                    "min_user_headroom": min(users) if users else None,
+                    "users": len(users),
+                    "circuit": breaker.state if breaker else "closed",
+                    "circuit_trips": breaker.trips if breaker else 0,
+                    **{name: round(value, 3) for name, value in self._metrics.get(api, {}).items()},
+                }
+            return apis
+
+
+_scheduler: QuotaScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Return the process-wide QuotaScheduler, configured from Settings."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            settings = Settings()
+            _scheduler = QuotaScheduler(
+                rates={
+                    "calendar": settings.calendar_rate_limit,
+                    "tasks": settings.tasks_rate_limit,
+                    "github": settings.github_rate_limit,
+                },
+                user_rate=settings.user_rate_limit,
+                max_retries=settings.max_retries if settings.enable_retry else 0,
+                retry_delay=settings.retry_delay,
+                circuit_error_rate=settings.circuit_error_rate,
+                circuit_cooldown=settings.circuit_cooldown,
+            )
+        return _scheduler
@@ -0,0 +1,200 @@
+"""
+Scheduling Engine
+
+Conflict detection and free-slot search that scale to large calendars:
+
+- IntervalTree answers "what overlaps [start, end)?" in O(log n + k).
+- merge_busy() unions busy intervals from many participants with a
+  vectorized sweep line (sort by start, running max of ends).
+- find_free_slots() scans the search window at minute resolution with
+  NumPy, masked to each participant's working hours.
+
+All times are handled internally as UTC epoch seconds. All-day events span
+local midnight to midnight in the calendar's time zone.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Iterable
+
+import numpy as np
+
+
+def event_bounds(event: dict, zone: tzinfo) -> tuple[float, float]:
+    """Return an event's (start, end) as UTC epoch seconds."""
+    def to_ts(when: dict) -> float:
+        if "dateTime" in when:
+            return datetime.fromisoformat(when["dateTime"]).timestamp()
+        return datetime.combine(date.fromisoformat(when["date"]), time(), tzinfo=zone).timestamp()
+
+    return to_ts(event["start"]), to_ts(event["end"])
+
+
+class IntervalTree:
+    """Static interval tree over half-open [start, end) intervals.
+
+    Intervals are sorted by start and laid out as an implicit balanced binary
+    tree; each node records the largest end in its subtree so that queries
+    skip every subtree that ends before the query begins.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[float, float, Any]]):
+        items = sorted(intervals, key=lambda iv: iv[0])
+        self._starts = [iv[0] for iv in items]
+        self._ends = [iv[1] for iv in items]
+        self._data = [iv[2] for iv in items]
+        self._max_end = [0.0] * len(items)
+        self._build(0, len(items))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _build(self, lo: int, hi: int) -> float:
+        if lo >= hi:
+            return float("-inf")
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(
+            self._ends[mid], self._build(lo, mid), self._build(mid + 1, hi)
+        )
+        return self._max_end[mid]
+
+    def _overlapping_indexes(self, start: float, end: float) -> list[int]:
+        found = []
+        stack = [(0, len(self._starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            # Everything right of mid starts at or after starts[mid].
+            if self._starts[mid] < end:
+                if self._ends[mid] > start:
+                    found.append(mid)
+                stack.append((mid + 1, hi))
+        found.sort()
+        return found
+
+    def overlapping(self, start: float, end: float) -> list[Any]:
+        """Return the data of every interval overlapping [start, end), by start."""
+        return [self._data[i] for i in self._overlapping_indexes(start, end)]
+
+    def overlapping_pairs(self) -> list[tuple[Any, Any]]:
+        """Return every pair of stored intervals that overlap each other."""
+        pairs = []
+        for i, (start, end) in enumerate(zip(self._starts, self._ends)):
+            for j in self._overlapping_indexes(start, end):
+                if j > i:
+                    pairs.append((self._data[i], self._data[j]))
+        return pairs
+
+
+def merge_busy(*participants: Iterable[tuple[float, float]]) -> np.ndarray:
+    """Union the busy intervals of any number of participants.
+
+    Returns an (n, 2) array of disjoint [start, end) intervals sorted by
+    start. Touching intervals are merged.
+    """
+    chunks = [np.asarray(list(p), dtype=float).reshape(-1, 2) for p in participants]
+    intervals = np.concatenate(chunks) if chunks else np.empty((0, 2))
+    if len(intervals) == 0:
+        return intervals
+
+    intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+    starts, ends = intervals[:, 0], np.maximum.accumulate(intervals[:, 1])
+    # A new merged interval begins wherever a start clears every earlier end.
+    opens = np.empty(len(starts), dtype=bool)
+    opens[0] = True
+    opens[1:] = starts[1:] > ends[:-1]
+    first = np.flatnonzero(opens)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    return np.column_stack((starts[first], ends[last]))
+
+
+@dataclass(frozen=True)
+class WorkingHours:
+    """Daily working hours in a time zone; weekdays use Monday=0."""
+
+    start: time = time(9)
+    end: time = time(17)
+    weekdays: frozenset[int] = field(default_factory=lambda: frozenset(range(5)))
+    zone: tzinfo = timezone.utc
+
+
+def _minute_index(ts: np.ndarray | float, origin: float, minutes: int, ceil: bool = False):
+    offsets = (np.asarray(ts, dtype=float) - origin) / 60.0
+    offsets = np.ceil(offsets) if ceil else np.floor(offsets)
+    return np.clip(offsets, 0, minutes).astype(np.int64)
+
+
+def working_mask(origin: datetime, minutes: int, hours: WorkingHours) -> np.ndarray:
+    """Return a per-minute boolean mask of working time starting at origin.
+
+    Working hours are laid out per local day, so DST transitions shift the
+    UTC minutes they cover as expected.
+    """
+    mask = np.zeros(minutes, dtype=bool)
+    origin_ts = origin.timestamp()
+    day = origin.astimezone(hours.zone).date()
+    last_day = (origin + timedelta(minutes=minutes)).astimezone(hours.zone).date()
+    while day <= last_day:
+        if day.weekday() in hours.weekdays:
+            start = datetime.combine(day, hours.start, tzinfo=hours.zone).timestamp()
+            end = datetime.combine(day, hours.end, tzinfo=hours.zone).timestamp()
+            lo = _minute_index(start, origin_ts, minutes, ceil=True)
+            hi = _minute_index(end, origin_ts, minutes)
+            mask[lo:hi] = True
+        day += timedelta(days=1)
+    return mask
+
+
+def busy_mask(busy: np.ndarray, origin: float, minutes: int) -> np.ndarray:
+    """Return a per-minute boolean mask of minutes covered by any busy interval."""
+    busy = np.asarray(busy, dtype=float).reshape(-1, 2)
+    delta = np.zeros(minutes + 1, dtype=np.int64)
+    np.add.at(delta, _minute_index(busy[:, 0], origin, minutes), 1)
+    np.add.at(delta, _minute_index(busy[:, 1], origin, minutes, ceil=True), -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def find_free_slots(
+    busy: np.ndarray,
+    window_start: datetime,
+    window_end: datetime,
+    duration_minutes: int,
+    working_hours: Iterable[WorkingHours] = (),
+    max_slots: int | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """Find free runs of at least duration_minutes inside the window.
+
+    busy is an (n, 2) array of epoch-second intervals, e.g. from
+    merge_busy(). Every WorkingHours given must contain a slot (one per
+    participant time zone, say); with none, any free minute counts.
+    Slots are aligned to whole minutes and returned as UTC datetimes.
+    """
+    origin = window_start.replace(second=0, microsecond=0)
+    if origin < window_start:
+        origin += timedelta(minutes=1)
+    minutes = int((window_end - origin).total_seconds() // 60)
+    if minutes < duration_minutes:
+        return []
+
+    free = ~busy_mask(busy, origin.timestamp(), minutes)
+    for hours in working_hours:
+        free &= working_mask(origin, minutes, hours)
+
+    edges = np.diff(np.concatenate(([0], free.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) >= duration_minutes
+    run_starts, run_ends = run_starts[long_enough], run_ends[long_enough]
+    if max_slots is not None:
+        run_starts, run_ends = run_starts[:max_slots], run_ends[:max_slots]
+
+    utc_origin = origin.astimezone(timezone.utc)
+    return [
+        (utc_origin + timedelta(minutes=int(s)), utc_origin + timedelta(minutes=int(e)))
+        for s, e in zip(run_starts, run_ends)
+    ]
@@ -0,0 +1,315 @@
+"""
+Local Tasks Store
+
+A SQLite mirror of every task list, kept current with delta pulls: each
+sync lists the task lists, and for every list whose 'updated' time moved
+since the last sync asks only for tasks changed since then
+(tasks().list(updatedMin=..., showDeleted=True)). Deleted tasks in the
+delta are dropped from the mirror.
+
+Tasks are indexed by due date, status, parent and normalized title, and
+every title is split into trigrams so a task can be found by an
+approximate title ("review PR" -> "Review PR #42") without listing
+anything from the API. Writes made by the tools are applied to the mirror
+from the PATCH response.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+from config.settings import Settings
+from tools.auth import current_user, get_tasks_service
+from tools.pagination import iter_items, iter_pages, partial_fields
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    tasklist_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    grams INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    due TEXT,
+    parent TEXT,
+    position TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (tasklist_id, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_due ON tasks (tasklist_id, due);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (tasklist_id, status, position);
+CREATE INDEX IF NOT EXISTS tasks_by_parent ON tasks (tasklist_id, parent);
+CREATE INDEX IF NOT EXISTS tasks_by_title ON tasks (title_norm);
+CREATE TABLE IF NOT EXISTS trigrams (
+    gram TEXT NOT NULL,
+    tasklist_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    PRIMARY KEY (gram, tasklist_id, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trigrams_by_task ON trigrams (tasklist_id, task_id);
+CREATE TABLE IF NOT EXISTS tasklists (
+    tasklist_id TEXT PRIMARY KEY,
+    title TEXT,
+    position INTEGER NOT NULL,
+    updated TEXT,
+    watermark TEXT,
+    synced_at REAL
+);
+"""
+
+PAGE_SIZE = 100
+
+# Task fields kept in the mirror and returned by the read tools.
+TASK_FIELDS = "id,title,notes,status,due,completed,parent,updated"
+SYNC_FIELDS = partial_fields(f"{TASK_FIELDS},position,deleted")
+TASKLIST_FIELDS = partial_fields("id,title,updated")
+
+# Fraction of a title query's trigrams a task title must contain to match.
+MIN_SIMILARITY = 0.6
+
+# Best score of a fuzzy match, so an exact title (1.0) outranks titles that
+# merely contain it ("Review PR" vs "Review PR #42").
+MAX_FUZZY_SCORE = 0.999
+
+# Trigram candidates scored per title lookup.
+MAX_CANDIDATES = 50
+
+DEFAULT_TASKLIST = "@default"
+
+
+def normalize_title(title: str) -> str:
+    """Casefold, strip accents and punctuation, collapse whitespace (any script)."""
+    text = unicodedata.normalize("NFKD", title or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    return " ".join(re.findall(r"[^\W_]+", text))
+
+
+def trigrams(normalized: str) -> set[str]:
+    """Trigrams of each word, padded like pg_trgm ('pr' -> '  p', ' pr', 'pr ')."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TaskStore:
+    """SQLite mirror of all task lists, synced with updatedMin deltas."""
+
+    def __init__(self, path: Path, sync_interval: float = 15.0,
+                 service_factory=get_tasks_service):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._service_factory = service_factory
+        self._sync_interval = sync_interval
+        self._last_sync: float | None = None
+
+    def sync(self, force: bool = False) -> None:
+        """Bring every task list up to date, at most once per sync interval."""
+        with self._lock:
+            if (not force and self._last_sync is not None
+                    and time.monotonic() - self._last_sync < self._sync_interval):
+                return
+
+            def request(page_token: str | None):
+                params = {"maxResults": PAGE_SIZE, "fields": TASKLIST_FIELDS}
+                if page_token is not None:
+                    params["pageToken"] = page_token
+                return self._service_factory().tasklists().list(**params)
+
+            tasklists = list(iter_items(request))
+            known = {
+                row[0]: row[1:] for row in self._conn.execute(
+                    "SELECT tasklist_id, updated, watermark FROM tasklists"
+                )
+            }
+            for position, tasklist in enumerate(tasklists):
+                pulled = tasklist["id"] in known
+                updated, watermark = known.pop(tasklist["id"], (None, None))
+                if pulled and updated == tasklist.get("updated"):
+                    # Nothing in this list changed since the last pull.
+                    self._save_tasklist(tasklist, position, watermark)
+                    continue
+                watermark = self._pull(tasklist["id"], watermark)
+                self._save_tasklist(tasklist, position, watermark)
+            for tasklist_id in known:
+                self.clear(tasklist_id)
+            self._last_sync = time.monotonic()
+
+    def mark_stale(self) -> None:
+        """Force a pull before the next read."""
+        with self._lock:
+            self._last_sync = None
+
+    def _pull(self, tasklist_id: str, watermark: str | None) -> str | None:
+        """Apply tasks changed since watermark (all tasks if None); return the new watermark."""
+        params = {"tasklist": tasklist_id, "showCompleted": True, "showHidden": True,
+                  "showDeleted": True, "maxResults": PAGE_SIZE, "fields": SYNC_FIELDS}
+        if watermark:
+            params["updatedMin"] = watermark
+
+        def request(page_token: str | None):
+            # Runs on the prefetch thread, so get that thread's service.
+            page_params = params if page_token is None else {**params, "pageToken": page_token}
+            return self._service_factory().tasks().list(**page_params)
+
+        for page in iter_pages(request):
+            items = page.get("items", [])
+            self._apply(tasklist_id, items)
+            # updatedMin is inclusive, so the newest task is pulled again next
+            # time; applying it twice is harmless.
+            watermark = max([watermark or "", *(t.get("updated", "") for t in items)]) or None
+        return watermark
+
+    def _save_tasklist(self, tasklist: dict, position: int, watermark: str | None) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasklists VALUES (?, ?, ?, ?, ?, ?)",
+                (tasklist["id"], tasklist.get("title"), position, tasklist.get("updated"),
+                 watermark, time.time()),
+            )
+
+    def _apply(self, tasklist_id: str, items: list[dict]) -> None:
+        with self._conn:
+            for task in items:
+                self._delete(tasklist_id, task["id"])
+                if task.get("deleted"):
+                    continue
+                title_norm = normalize_title(task.get("title", ""))
+                grams = trigrams(title_norm)
+                payload = {key: task[key] for key in TASK_FIELDS.split(",") if key in task}
+                self._conn.execute(
+                    "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tasklist_id, task["id"], title_norm, len(grams), task.get("status", ""),
+                     task.get("due"), task.get("parent"), task.get("position"),
+                     json.dumps(payload)),
+                )
+                self._conn.executemany(
+                    "INSERT INTO trigrams VALUES (?, ?, ?)",
+                    [(gram, tasklist_id, task["id"]) for gram in grams],
+                )
+
+    def _delete(self, tasklist_id: str, task_id: str) -> None:
+        self._conn.execute("DELETE FROM trigrams WHERE tasklist_id = ? AND task_id = ?",
+                           (tasklist_id, task_id))
+        self._conn.execute("DELETE FROM tasks WHERE tasklist_id = ? AND task_id = ?",
+                           (tasklist_id, task_id))
+
+    def put(self, tasklist_id: str, tasks: list[dict]) -> None:
+        """Apply tasks returned by writes (e.g. PATCH responses) in one transaction."""
+        with self._lock:
+            self._apply(self.resolve_tasklist(tasklist_id), tasks)
+
+    def resolve_tasklist(self, tasklist_id: str) -> str:
+        """Map '@default' to the ID of the first task list."""
+        if tasklist_id != DEFAULT_TASKLIST:
+            return tasklist_id
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tasklist_id FROM tasklists ORDER BY position LIMIT 1"
+            ).fetchone()
+        return row[0] if row else tasklist_id
+
+    def version(self) -> str | None:
+        """Return the lists' IDs and 'updated' times; it changes whenever any list does."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tasklist_id, updated FROM tasklists ORDER BY tasklist_id"
+            ).fetchall()
+        return ",".join(f"{tasklist_id}@{updated}" for tasklist_id, updated in rows) or None
+
+    def tasks(self, tasklist_id: str = DEFAULT_TASKLIST, show_completed: bool = False,
+              due_before: str | None = None, query: str | None = None,
+              parent: str | None = None, limit: int | None = None) -> list[dict]:
+        """Return tasks of a list in position order, filtered like list_tasks."""
+        sql = "SELECT payload FROM tasks WHERE tasklist_id = ?"
+        args: list = [self.resolve_tasklist(tasklist_id)]
+        if not show_completed:
+            sql += " AND status = 'needsAction'"
+        if due_before:
+            sql += " AND due < ?"
+            args.append(due_before)
+        if parent:
+            sql += " AND parent = ?"
+            args.append(parent)
+        if query:
+            # Text search covers notes too, so it scans the list's rows.
+            sql += " AND instr(lower(json_extract(payload, '$.title') || ' ' || " \
+                   "coalesce(json_extract(payload, '$.notes'), '')), ?) > 0"
+            args.append(query.lower())
+        sql += " ORDER BY position, task_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def find(self, title: str, tasklist_id: str = DEFAULT_TASKLIST,
+             show_completed: bool = True, limit: int = 5) -> list[tuple[float, dict]]:
+        """Return (score, task) for the tasks best matching an approximate title.
+
+        An exact match of the normalized title scores 1.0; otherwise the
+        score is the share of the query's trigrams found in the task title,
+        at most MAX_FUZZY_SCORE, with shorter titles first among equal scores. Matches below
+        MIN_SIMILARITY are left out.
+        """
+        tasklist_id = self.resolve_tasklist(tasklist_id)
+        query = normalize_title(title)
+        grams = trigrams(query)
+        if not grams:
+            return []
+        status = "" if show_completed else " AND t.status = 'needsAction'"
+        with self._lock:
+            exact = self._conn.execute(
+                "SELECT 1.0, t.grams, t.payload FROM tasks t "
+                f"WHERE t.title_norm = ? AND t.tasklist_id = ?{status}",
+                (query, tasklist_id),
+            ).fetchall()
+            placeholders = ",".join("?" * len(grams))
+            fuzzy = self._conn.execute(
+                "SELECT MIN(CAST(COUNT(*) AS REAL) / ?, ?), t.grams, t.payload "
+                "FROM trigrams g JOIN tasks t "
+                "ON t.tasklist_id = g.tasklist_id AND t.task_id = g.task_id "
+                f"WHERE g.gram IN ({placeholders}) AND g.tasklist_id = ?{status} "
+                "AND t.title_norm != ? "
+                "GROUP BY g.tasklist_id, g.task_id ORDER BY COUNT(*) DESC, t.grams LIMIT ?",
+                (len(grams), MAX_FUZZY_SCORE, *grams, tasklist_id, query, MAX_CANDIDATES),
+            ).fetchall()
+        matches = [(score, size, payload) for score, size, payload in exact + fuzzy
+                   if score >= MIN_SIMILARITY]
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [(round(score, 3), json.loads(payload)) for score, _, payload in matches[:limit]]
+
+    def clear(self, tasklist_id: str | None = None) -> None:
+        """Forget a task list (every list if None) and its sync state."""
+        where, args = ("WHERE tasklist_id = ?", (tasklist_id,)) if tasklist_id else ("", ())
+        with self._lock, self._conn:
+            for table in ("trigrams", "tasks", "tasklists"):
+                self._conn.execute(f"DELETE FROM {table} {where}", args)
+            self._last_sync = None
+
+
+_stores: dict[str | None, TaskStore] = {}
+_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStore | None:
+    """Return the current user's TaskStore, or None when disabled in Settings."""
+    user_id = current_user.get()
+    with _store_lock:
+        if user_id not in _stores:
+            settings = Settings()
+            if not settings.task_store_enabled:
+                return None
+            path = settings.task_store_path
+            if user_id is not None:
+                path = path.parent / "users" / user_id / path.name
+            _stores[user_id] = TaskStore(path, settings.task_sync_interval)
+        return _stores[user_id]
@@ -1,18 +1,184 @@
 """
 Option B: Tasks Manager Tools
 
-Implement at least 3 tools for Google Tasks operations.
+Tools for Google Tasks operations. Each tool returns a dict with 'status'
+and relevant data.
 """
 
-from typing import Optional
-from google.adk.tools import tool
+from tools.auth import get_tasks_service
+from tools.batching import execute_batch, summarize_results
+from tools.pagination import iter_items, partial_fields
+from tools.task_store import get_task_store
 
+# Task fields the bulk update tool is allowed to change.
+UPDATABLE_TASK_FIELDS = {"title", "notes", "due", "status"}
 
-# TODO: Implement your tasks tools
-# Use the @tool decorator
-# Each tool should return a dict with 'status' and relevant data
+# Task fields downloaded by list_tasks; links and etags are left out.
+# tools/task_store.py keeps the same fields.
+TASK_FIELDS = "id,title,notes,status,due,completed,parent,updated"
+
+# tasks().list returns at most 100 tasks per page.
+TASKS_PAGE_SIZE = 100
+
+
+def list_tasks(tasklist_id: str = "@default", show_completed: bool = False,
+               due_before: str | None = None, query: str | None = None,
+               max_results: int = 20) -> dict:
+    """List tasks, optionally only those due before a date or matching a text query.
+
+    Args:
+        tasklist_id: Task list to read (the default list if omitted).
+        show_completed: Include completed tasks.
+        due_before: Only tasks due before this RFC 3339 timestamp.
+        query: Only tasks whose title or notes contain this text (case-insensitive).
+        max_results: Maximum number of tasks to return.
+
+    Returns:
+        dict with 'status' and a 'tasks' list.
+    """
+    try:
+        store = get_task_store()
+        if store is not None:
+            store.sync()
+            tasks = store.tasks(tasklist_id, show_completed, due_before, query,
+                                limit=max_results)
+            return {"status": "success", "tasks": tasks}
+
+        params = {
+            "tasklist": tasklist_id,
+            "showCompleted": show_completed,
+            "showHidden": show_completed,
+            "maxResults": min(max_results, TASKS_PAGE_SIZE),
+            "fields": partial_fields(TASK_FIELDS),
+        }
+        if due_before:
+            params["dueMax"] = due_before
+
+        def request(page_token: str | None):
+            page_params = params if page_token is None else {**params, "pageToken": page_token}
+            return get_tasks_service().tasks().list(**page_params)
+
+        needle = (query or "").lower()
+
+        def matches(task: dict) -> bool:
+            return needle in f"{task.get('title', '')} {task.get('notes', '')}".lower()
+
+        # Stops fetching pages once max_results matching tasks are found.
+        tasks = list(iter_items(request, where=matches if query else None, limit=max_results))
+        return {"status": "success", "tasks": tasks}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def _resolve_title(title: str, tasklist_id: str, show_completed: bool) -> tuple[str | None, str]:
+    """Find a task ID by approximate title in the local store: (task_id, error)."""
+    store = get_task_store()
+    if store is None:
+        return None, "Finding tasks by title needs the task store (TASK_STORE_ENABLED)"
+    store.sync()
+    matches = store.find(title, tasklist_id, show_completed=show_completed, limit=3)
+    if not matches:
+        return None, f"No task matches '{title}'"
+    if len(matches) > 1 and matches[1][0] == matches[0][0]:
+        found = ", ".join(f"'{task['title']}' ({task['id']})" for _, task in matches)
+        return None, f"'{title}' matches several tasks: {found}; use the task ID"
+    return matches[0][1]["id"], ""
+
+
+def _patch_tasks(ids: list[str], bodies: list[dict], tasklist_id: str,
+                 failed: dict[str, str]) -> dict:
+    """PATCH each task with its body; ids that are keys of failed are reported as such."""
+    service = get_tasks_service()
+    pending = [i for i, task_id in enumerate(ids) if task_id not in failed]
+    requests = [
+        service.tasks().patch(tasklist=tasklist_id, task=ids[i], body=bodies[i])
+        for i in pending
+    ]
+    results = [{"status": "error", "code": None, "message": failed.get(task_id, "")}
+               for task_id in ids]
+    for i, result in zip(pending, execute_batch(service, requests) if requests else []):
+        results[i] = result
+
+    store = get_task_store()
+    if store is not None:
+        store.put(tasklist_id, [r["response"] for r in results if r["status"] == "success"])
+    return summarize_results(ids, results)
+
+
+def complete_tasks(task_ids: list[str] | None = None, titles: list[str] | None = None,
+                   tasklist_id: str = "@default") -> dict:
+    """Mark several tasks as completed in a single batched request.
+
+    Args:
+        task_ids: IDs of the tasks to complete.
+        titles: Titles of tasks to complete, when their IDs are not known
+            (e.g. "review PR"). Each is matched approximately against the
+            open tasks; a title matching several tasks equally well fails.
+        tasklist_id: Task list containing the tasks (the default list if omitted).
+
+    Returns:
+        dict with 'status' ('success', 'partial' or 'error'), the 'succeeded'
+        task IDs and a 'failed' list of {id, message}; a title that matched
+        no single task is reported in 'failed' under the title.
+    """
+    try:
+        ids, failed = list(task_ids or []), {}
+        for title in titles or []:
+            task_id, error = _resolve_title(title, tasklist_id, show_completed=False)
+            ids.append(task_id or title)
+            if task_id is None:
+                failed[title] = error
+        if not ids:
+            return {"status": "error", "message": "Give task_ids or titles"}
+        return _patch_tasks(ids, [{"status": "completed"}] * len(ids), tasklist_id, failed)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def update_tasks(updates: list[dict], tasklist_id: str = "@default") -> dict:
+    """Update several tasks in a single batched request.
+
+    Args:
+        updates: One dict per task with its 'id' (or, when the ID is not
+            known, 'match': the task's approximate current title) plus the
+            fields to change: 'title', 'notes', 'due' (RFC 3339 timestamp)
+            or 'status' ('needsAction' or 'completed').
+        tasklist_id: Task list containing the tasks (the default list if omitted).
+
+    Returns:
+        dict with 'status' ('success', 'partial' or 'error'), the 'succeeded'
+        task IDs and a 'failed' list of {id, message}; a 'match' that found
+        no single task is reported in 'failed' under the title.
+    """
+    try:
+        for update in updates:
+            if "id" not in update and "match" not in update:
+                return {"status": "error", "message": "Every update needs an 'id' or 'match'"}
+            unknown = set(update) - UPDATABLE_TASK_FIELDS - {"id", "match"}
+            if unknown:
+                return {
+                    "status": "error",
+                    "message": f"Cannot update fields: {', '.join(sorted(unknown))}",
+                }
+
+        ids, failed = [], {}
+        for update in updates:
+            task_id = update.get("id")
+            if task_id is None:
+                task_id, error = _resolve_title(update["match"], tasklist_id, show_completed=True)
+                if task_id is None:
+                    task_id = update["match"]
+                    failed[task_id] = error
+            ids.append(task_id)
+        bodies = [{k: v for k, v in update.items() if k not in ("id", "match")}
+                  for update in updates]
+        return _patch_tasks(ids, bodies, tasklist_id, failed)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 tasks_tools = [
-    # Add your implemented tools here
+    list_tasks,
+    complete_tasks,
+    update_tasks,
 ]
@@ -0,0 +1,213 @@
+"""
+Tool Search Index
+
+Loading every GitHub MCP tool schema into each model request costs thousands
+of prompt tokens, most of them for tools the turn never uses. ToolIndex is a
+small, embedding-free search engine over the tool list: BM25 over tool names,
+descriptions and parameter names, with query expansion through a synonym
+table ("PR" -> pull request, "bug" -> issue, ...).
+
+The index is built from the MCP list_tools result, stored on disk, and only
+rebuilt when the hash of the tool list changes. Queries are answered from an
+in-memory inverted index and take microseconds for a few dozen tools.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+INDEX_FORMAT_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Name terms are also indexed as a separate field (with its own IDF, so words
+# like "repository" that appear in every description still single out
+# search_repositories) and their score is multiplied by NAME_WEIGHT.
+NAME_FIELD = "name:"
+NAME_WEIGHT = 2.0
+
+# Query term -> index terms it should also match.
+SYNONYMS = {
+    "pr": ["pull", "request"],
+    "mr": ["pull", "request"],
+    "bug": ["issue"],
+    "ticket": ["issue"],
+    "task": ["issue"],
+    "todo": ["issue"],
+    "repo": ["repository"],
+    "project": ["repository"],
+    "readme": ["file", "content"],
+    "code": ["file", "content"],
+    "source": ["file", "content"],
+    "doc": ["file", "content"],
+    "find": ["search"],
+    "lookup": ["search", "get"],
+    "show": ["get", "list"],
+    "view": ["get"],
+    "read": ["get", "content"],
+    "new": ["create"],
+    "add": ["create"],
+    "close": ["update"],
+    "edit": ["update"],
+    "change": ["update"],
+    "reply": ["comment"],
+    "history": ["commit"],
+    "mine": ["user"],
+}
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split snake_case, camelCase and prose into lowercase, lightly stemmed terms."""
+    terms = []
+    for word in _WORD.findall(_CAMEL.sub(" ", text or "")):
+        word = word.lower()
+        if len(word) > 3 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def expand_query(query: str) -> list[str]:
+    """Tokenize a query and add synonym terms."""
+    terms = []
+    for term in tokenize(query):
+        terms.append(term)
+        terms.extend(SYNONYMS.get(term, []))
+    return terms
+
+
+def describe_tool(tool: Any) -> dict:
+    """Return {name, description, parameters} for an ADK tool, from its declaration."""
+    declaration = tool._get_declaration()
+    schema = getattr(declaration, "parameters_json_schema", None)
+    if schema is None and getattr(declaration, "parameters", None) is not None:
+        schema = declaration.parameters.model_dump(mode="json", exclude_none=True)
+    return {
+        "name": tool.name,
+        "description": tool.description or "",
+        "parameters": schema or {},
+    }
+
+
+def tools_hash(descriptors: list[dict]) -> str:
+    """Stable hash of a tool list, used to decide whether to rebuild the index."""
+    canonical = json.dumps(
+        sorted(descriptors, key=lambda d: d["name"]), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ToolIndex:
+    """BM25 index over tool descriptors."""
+
+    def __init__(self, descriptors: list[dict], digest: str | None = None):
+        self.tools = sorted(descriptors, key=lambda d: d["name"])
+        self.digest = digest or tools_hash(self.tools)
+        self._by_name = {tool["name"]: tool for tool in self.tools}
+
+        postings: dict[str, list[list[int]]] = defaultdict(list)
+        self._lengths = []
+        for doc_id, tool in enumerate(self.tools):
+            terms = Counter()
+            for term in tokenize(tool["name"]):
+                terms[term] += 1
+                terms[NAME_FIELD + term] += 1
+            for term in tokenize(tool["description"]):
+                terms[term] += 1
+            for param in tool["parameters"].get("properties", {}):
+                for term in tokenize(param):
+                    terms[term] += 1
+            for term, tf in terms.items():
+                postings[term].append([doc_id, tf])
+            self._lengths.append(sum(terms.values()))
+        self._postings = dict(postings)
+        self._finish()
+
+    def _finish(self) -> None:
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        n = len(self.tools)
+        self._idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def get(self, name: str) -> dict | None:
+        return self._by_name.get(name)
+
+    def search(self, query: str, k: int = 5) -> list[tuple[dict, float]]:
+        """Return up to k (descriptor, score) pairs, best first."""
+        scores: dict[int, float] = defaultdict(float)
+        for query_term in set(expand_query(query)):
+            for term, weight in ((query_term, 1.0), (NAME_FIELD + query_term, NAME_WEIGHT)):
+                idf = self._idf.get(term)
+                if idf is None:
+                    continue
+                for doc_id, tf in self._postings[term]:
+                    norm = K1 * (1 - B + B * self._lengths[doc_id] / self._avg_length)
+                    scores[doc_id] += weight * idf * tf * (K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(self.tools[doc_id], round(score, 3)) for doc_id, score in ranked]
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({
+                "format": INDEX_FORMAT_VERSION,
+                "digest": self.digest,
+                "tools": self.tools,
+                "postings": self._postings,
+                "lengths": self._lengths,
+            }, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ToolIndex | None":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("format") != INDEX_FORMAT_VERSION:
+            return None
+        # Restore the inverted index as stored instead of re-tokenizing.
+        index = cls.__new__(cls)
+        index.tools = data["tools"]
+        index.digest = data["digest"]
+        index._by_name = {tool["name"]: tool for tool in index.tools}
+        index._postings = data["postings"]
+        index._lengths = data["lengths"]
+        index._finish()
+        return index
+
+    @classmethod
+    def load_or_build(cls, descriptors: list[dict], path: Path | None = None) -> "ToolIndex":
+        """Reuse the index stored at path if the tool list is unchanged, else rebuild it."""
+        digest = tools_hash(descriptors)
+        if path is not None:
+            cached = cls.load(path)
+            if cached is not None and cached.digest == digest:
+                return cached
+        index = cls(descriptors, digest)
+        if path is not None:
+            try:
+                index.save(path)
+            except OSError:
+                pass
+        return index
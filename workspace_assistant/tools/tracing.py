@@ -0,0 +1,53 @@
+"""
+Tracing Spans
+
+Spans for the work under a tool call, on the global OpenTelemetry tracer,
+so they nest under ADK's own 'execute_tool <name>' spans:
+
+- google.api.request / google.api.batch: each Google API HTTP round-trip,
+  retries included as separate spans
+- mcp.request: each call over the MCP connection (the stdio hop)
+- auth.load / auth.refresh: credential loads and access token refreshes
+
+Request and response sizes are recorded as bytes of JSON. Only the
+OpenTelemetry API is used here; runtime/tracing.py installs the SDK when
+tracing is on. Until then every span is a no-op and payload sizes are never
+computed.
+"""
+
+import json
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from opentelemetry import trace
+
+SERVICE_NAME = "workspace_assistant"
+
+tracer = trace.get_tracer(SERVICE_NAME)
+
+
+def payload_bytes(value: Any) -> int:
+    """Size of a value as JSON (bytes as-is, pydantic models dumped first)."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json", exclude_none=True)
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return len(text.encode())
+
+
+def set_payload(span: trace.Span, key: str, value: Any) -> None:
+    """Record the size of value as span attribute key, if the span is sampled."""
+    if span.is_recording():
+        span.set_attribute(key, payload_bytes(value))
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Start a child of the current span; None-valued attributes are left out."""
+    with tracer.start_as_current_span(name) as current:
+        if current.is_recording():
+            current.set_attributes({k: v for k, v in attributes.items() if v is not None})
+        yield current